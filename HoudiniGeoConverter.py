@@ -0,0 +1,218 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import argparse, os, re, sys
+
+'''
+Command line batch converter from GeoJSON and newline-delimited GeoJSON to Houdini .geo
+(or .bgeo) files, which does not need FME. It writes the same outputs as the point,
+polyline and polygon outputs of the HoudiniGeoWriter PythonCaller: one file per geometry
+type, offset to the centroid of all features and swizzled into the Houdini axes.
+
+	python HoudiniGeoConverter.py roads.ndjson parcels.geojson -o out --format bgeo
+
+Input sorted by a property can be converted one value at a time (--stream-by), and the
+collected features can be spilled to temporary files past a budget (--buffer-budget).
+'''
+
+'''
+The following routine will import the required libraries from the python files in the
+fmehougeo library folder. The standard 'import from xx' function does not seem to work
+in the FME python context therefore the importlib library is used.
+'''
+
+import importlib.util
+
+# The fmehougeo library folder next to this file
+lib_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "lib")
+
+# Import the fmehougeo convert.py module by name (see utils.py)
+if lib_dir not in sys.path:
+	sys.path.append(lib_dir)
+
+convert = importlib.import_module("convert")
+
+# Import the fmehougeo geojson.py modules
+spec = importlib.util.spec_from_file_location("geojson", os.path.join(lib_dir, "geojson.py"))
+geojson = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(geojson)
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+'''
+Converts the features collected by a geojson.GeoJSONReader and writes one file per
+geometry type into out_dir, named after the geometry type followed by the suffix when one is
+given. When tile_size is greater than zero every geometry type is split into square tiles
+as in the HoudiniGeoWriter PythonCaller: one file per tile (named <geomtype>_<col>_<row>)
+sharing the centroid offset, and a <geomtype>_index file referencing every tile as a packed
+disk primitive. Returns the paths of the written files.
+'''
+
+def convertGeoJSON(reader, out_dir, fmt="geo", group_by=None, centroid=None, precision=None, storage=None, weld=None, holes="separate", tile_size=0, suffix=None):
+
+	bbx = reader.getBounds()
+
+	if bbx[0][0] > bbx[1][0]:
+
+		return []
+
+	# Set the centroid, offset and bounds of the features (see HouGeoWriter.outputBuffers)
+	if centroid is None:
+		centroid = ((bbx[0][0] * 0.5) + (bbx[1][0] * 0.5), (bbx[0][1] * 0.5) + (bbx[1][1] * 0.5))
+
+	offset = (-centroid[0], -centroid[1], 0.0)
+	bounds = convert.getOffsetBounds(offset, bbx)
+
+	outputs = [
+		("point", "point", convert.convertPoints, "point"),
+		("polyline", "line", convert.convertLines, "primitive"),
+		("polygon", "area", convert.convertAreas, "primitive")
+	]
+
+	paths = []
+
+	for geomtype, kind, process, scope in outputs:
+
+		srcs = reader.getSources(kind)
+
+		if not srcs:
+
+			continue
+
+		name = geomtype if suffix is None else "{}_{}".format(geomtype, suffix)
+		options = {"precision": precision, "storage": storage}
+
+		# Points are never welded and only polygons have holes
+		if kind != "point":
+			options["weld"] = weld
+
+		if kind == "area":
+			options["holes"] = holes
+
+		if tile_size > 0:
+
+			index = []
+
+			for (col, row), tile_srcs in convert.tileSources(srcs, bbx[0], tile_size).items():
+
+				groups = [convert.geo.HouGroupBuilder(group_by, scope)] if group_by else []
+				hougeo = process(tile_srcs, centroid, offset, convert.getSourceBounds(offset, tile_srcs), groups, **options)
+				path = hougeo.write(os.path.join(out_dir, "{}_{}_{}.{}".format(name, col, row, fmt)), fmt)
+				paths.append(path)
+
+				# Keep only the summary of the tile for the index
+				index.append((os.path.abspath(path), hougeo.bounds, hougeo.pt_count, hougeo.prim_count))
+
+			paths.append(convert.geo.createPackedDiskIndex(index, centroid, reader.cs or "unknown").write(os.path.join(out_dir, "{}_index.{}".format(name, fmt)), fmt))
+
+		else:
+
+			groups = [convert.geo.HouGroupBuilder(group_by, scope)] if group_by else []
+			hougeo = process(srcs, centroid, offset, bounds, groups, **options)
+			paths.append(hougeo.write(os.path.join(out_dir, "{}.{}".format(name, fmt)), fmt))
+
+	return paths
+
+# --------------------------------------------------------------------------
+
+'''
+Generator over the paths of the files written from GeoJSON files whose features are sorted
+by an attribute (a property name made valid, see geojson.getAttributes). The features of
+every value are converted (see convertGeoJSON) as soon as the value changes, with the
+value as the suffix of their files, after which the reader is reset. Only the features of
+one value are held at a time. Raises a ValueError when a value comes back after another
+one, rather than overwriting its files.
+'''
+
+def streamGeoJSON(reader, inputs, stream_by, out_dir, **options):
+
+	streamed = set()
+	value = None
+
+	for path in inputs:
+
+		for feature in reader.iterFeatures(path):
+
+			current = geojson.getAttributes(feature.get("properties")).get(stream_by)
+
+			# Convert the previous value as soon as the sorted value changes
+			if streamed and current != value:
+
+				if current in streamed:
+
+					raise ValueError("Features are not sorted by '{}', the value '{}' was already output".format(stream_by, current))
+
+				for written in convertGeoJSON(reader, out_dir, suffix=re.sub(r"[^\w.-]", "_", str(value)), **options):
+					yield written
+
+				reader.reset()
+
+			value = current
+			streamed.add(current)
+			reader.addFeature(feature)
+
+	if streamed:
+
+		for written in convertGeoJSON(reader, out_dir, suffix=re.sub(r"[^\w.-]", "_", str(value)), **options):
+			yield written
+
+# --------------------------------------------------------------------------
+
+def main(argv=None):
+
+	parser = argparse.ArgumentParser(description="Convert GeoJSON and newline-delimited GeoJSON to Houdini .geo files")
+	parser.add_argument("inputs", nargs="+", help="GeoJSON files, newline-delimited GeoJSON files (.ndjson, .jsonl, .geojsonl, .geojsons) or - for newline-delimited GeoJSON on stdin")
+	parser.add_argument("-o", "--output-dir", default=".", help="folder the point.geo, polyline.geo and polygon.geo files are written to")
+	parser.add_argument("-f", "--format", default="geo", choices=["geo", "bgeo"], help="ASCII json (geo) or binary json (bgeo) output")
+	parser.add_argument("-g", "--group-by", default=None, help="property used to create one group per distinct value (e.g. zone)")
+	parser.add_argument("-c", "--centroid", default=None, help="x,y offset origin, defaults to the centre of all features")
+	parser.add_argument("--cs", default=None, help="coordinate system name written to the sr_cs attribute")
+	parser.add_argument("-p", "--precision", default=None, help="decimals the positions are rounded to (e.g. 3), or attribute names and decimals with P for the positions (e.g. P=3,height=2)")
+	parser.add_argument("-s", "--storage", default=None, help="auto for the narrowest lossless storage of every numeric attribute, or attribute names and storages (e.g. auto,class=int8,height=fpreal64)")
+	parser.add_argument("--holes", default="separate", choices=convert.HOLE_MODES, help="write the polygon holes as separate polygons with a hole attribute, bridged into their polygon or not at all")
+	parser.add_argument("-w", "--weld", type=float, default=None, help="weld the coincident line and polygon vertices within this distance into shared points (0 for exact duplicates)")
+	parser.add_argument("-t", "--tile-size", type=float, default=0, help="split every output into square tiles of this size in ground units, with an index file referencing the tiles")
+	parser.add_argument("--stream-by", default=None, help="property the input features are sorted by, the features of every value are converted as soon as the value changes (e.g. polygon_a.geo) so only one value is held at a time")
+	parser.add_argument("--buffer-budget", type=float, default=0, help="megabytes of collected features (shared between the geometry types) above which they are spilled to temporary files")
+	parser.add_argument("--spill-dir", default=None, help="folder of the temporary files, the system temporary folder by default")
+
+	args = parser.parse_args(argv)
+
+	reader = geojson.GeoJSONReader(args.cs, int(args.buffer_budget * 1024 * 1024), args.spill_dir)
+
+	if not os.path.isdir(args.output_dir):
+		os.makedirs(args.output_dir)
+
+	centroid = tuple(float(v) for v in args.centroid.split(",")) if args.centroid else None
+	group_by = geojson.getAttributes({args.group_by: None}).popitem()[0] if args.group_by else None
+	options = {"fmt": args.format, "group_by": group_by, "centroid": centroid, "precision": convert.parsePrecision(args.precision), "storage": convert.parseStorage(args.storage), "weld": args.weld, "holes": args.holes, "tile_size": args.tile_size}
+
+	try:
+
+		if args.stream_by:
+
+			paths = streamGeoJSON(reader, args.inputs, geojson.getAttributes({args.stream_by: None}).popitem()[0], args.output_dir, **options)
+
+		else:
+
+			for path in args.inputs:
+				reader.read(path)
+
+			paths = convertGeoJSON(reader, args.output_dir, **options)
+
+		for path in paths:
+			print(path)
+
+	finally:
+
+		# Remove the temporary files of spilled buffers
+		reader.close()
+
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+	main()
@@ -2,7 +2,7 @@
 # Imports
 # --------------------------------------------------------------------------
 
-import fme, fmeobjects, os
+import fme, fmeobjects, collections, concurrent.futures, multiprocessing, os, re
 
 '''
 Get the folder location of the fmehougeo python library using an FME published parameter
@@ -11,6 +11,69 @@ This published parameter macro will only work in the FME PythonCaller
 
 lib_dir = fme.macroValues["HoudiniGeoWriter_PythonLib"]
 
+'''
+Optional published parameters controlling the output. When they are not defined on the
+transformer the defaults are used.
+
+HoudiniGeoWriter_Format: "geo" writes ASCII json strings, "bgeo" writes binary json bytes
+HoudiniGeoWriter_OutputDir: when set the documents are streamed straight to files in this
+folder and only the file path is written to the output feature (hougeo_path)
+HoudiniGeoWriter_GroupBy: name of an attribute (e.g. attrib_zone) used to create one group
+per distinct value, point groups for point features and primitive groups otherwise
+HoudiniGeoWriter_TileSize: when greater than zero the point, polyline and polygon outputs are
+split into square tiles of this size (in ground units) with one .geo per tile and geomtype.
+When writing to an output folder a <geomtype>_index file referencing every tile as a
+packed disk primitive is written as well
+HoudiniGeoWriter_CacheDir: when set the object (surface) documents are cached in this folder
+keyed on their geometry and attributes, so unchanged features are not converted again
+HoudiniGeoWriter_CacheSize: size cap of the cache in megabytes (default 1024), the least
+recently used documents are evicted first
+HoudiniGeoWriter_Workers: when greater than one the object (surface) features are converted
+in a pool of this many worker processes, the features are still output in their input order
+HoudiniGeoWriter_PythonExe: the python interpreter used to start the worker processes, needed
+when the interpreter running the PythonCaller is embedded (e.g. fme.exe)
+HoudiniGeoWriter_StreamBy: name of an attribute the point, polyline and polygon features are
+sorted by (e.g. with a Sorter). The features of each value are converted and output as soon
+as the value changes, named <geomtype>_<value>, so only one group is held in memory at a
+time. The bbx feature must arrive before the first group for the groups to share its centroid
+HoudiniGeoWriter_BufferBudget: when greater than zero the buffered point, polyline and polygon
+features are spilled to temporary memory mapped files whenever they use more than this many
+megabytes (shared between the three geomtypes), for inputs that cannot be sorted. This only
+bounds the buffers while the features arrive: on close each output (or tile, see TileSize)
+is still converted in memory, as typed arrays of its points and vertices, and distinct
+string values are kept in memory
+HoudiniGeoWriter_SpillDir: the folder of the temporary files, the system temporary folder when
+not set
+HoudiniGeoWriter_Precision: number of decimals the point positions are rounded to when encoded
+(e.g. 3 for millimetres), or a comma separated list of attribute names and decimals with P for
+the positions (e.g. P=3,height=2)
+HoudiniGeoWriter_Storage: "auto" stores every numeric attribute (but P) in the narrowest lossless
+storage of its values instead of int32 or fpreal32, attributes can also be given a storage by
+name (e.g. auto,class=int8,height=fpreal64 or P=fpreal64)
+HoudiniGeoWriter_Weld: when set the coincident vertices of the polyline and polygon outputs and
+of every object are welded into shared points. A vertex joins the first point within this
+distance (in ground units) of it along every axis, 0 welds exact duplicates only
+HoudiniGeoWriter_Holes: how the holes of donut polygons are written, "separate" (the default)
+as closed polygons of their own with a hole primitive attribute of 1, "bridge" as part of a
+single polygon joined to the boundary by a bridge edge or "ignore" to drop them
+'''
+
+out_format = fme.macroValues.get("HoudiniGeoWriter_Format", "geo")
+out_dir = fme.macroValues.get("HoudiniGeoWriter_OutputDir", "")
+group_by = fme.macroValues.get("HoudiniGeoWriter_GroupBy", "")
+tile_size = float(fme.macroValues.get("HoudiniGeoWriter_TileSize", 0) or 0)
+cache_dir = fme.macroValues.get("HoudiniGeoWriter_CacheDir", "")
+cache_size = float(fme.macroValues.get("HoudiniGeoWriter_CacheSize", 1024) or 1024)
+workers = int(fme.macroValues.get("HoudiniGeoWriter_Workers", 0) or 0)
+python_exe = fme.macroValues.get("HoudiniGeoWriter_PythonExe", "")
+stream_by = fme.macroValues.get("HoudiniGeoWriter_StreamBy", "")
+buffer_budget = float(fme.macroValues.get("HoudiniGeoWriter_BufferBudget", 0) or 0)
+spill_dir = fme.macroValues.get("HoudiniGeoWriter_SpillDir", "")
+precision = fme.macroValues.get("HoudiniGeoWriter_Precision", "")
+storage = fme.macroValues.get("HoudiniGeoWriter_Storage", "")
+weld = fme.macroValues.get("HoudiniGeoWriter_Weld", "")
+holes = fme.macroValues.get("HoudiniGeoWriter_Holes", "") or "separate"
+
 '''
 The following routine will import the required libraries from the python files in the
 fmehougeo library folder. The standard 'import from xx' function does not seem to work
@@ -24,6 +87,13 @@ spec = importlib.util.spec_from_file_location("utils", os.path.join(lib_dir, "ut
 utils = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(utils)
 
+# The source kind, conversion function and group scope of the buffered geomtypes
+BUFFERED_OUTPUTS = collections.OrderedDict([
+	("point", ("point", utils.convert.convertPoints, "point")),
+	("polyline", ("line", utils.convert.convertLines, "primitive")),
+	("polygon", ("area", utils.convert.convertAreas, "primitive"))
+])
+
 # --------------------------------------------------------------------------
 # Python Caller Classes
 # --------------------------------------------------------------------------
@@ -38,9 +108,127 @@ class HouGeoWriter(object):
 	def __init__(self):
 
 		self.bbx = None
-		self.point_features = []
-		self.line_features = []
-		self.poly_features = []
+		self.cs = "unknown"
+		self.fmt = out_format
+		self.out_dir = out_dir
+		self.group_by = group_by
+		self.tile_size = tile_size
+		self.nobjects = 0
+		self.cache = utils.cache.HouGeoCache(cache_dir, int(cache_size * 1024 * 1024)) if cache_dir else None
+		self.workers = workers
+		self.executor = None
+		self.pending = collections.deque()
+		self.stream_by = stream_by
+		self.stream_value = None
+		self.streamed = set()
+		self.budget = int(buffer_budget * 1024 * 1024 / len(BUFFERED_OUTPUTS))
+		self.spill_dir = spill_dir
+		self.precision = utils.convert.parsePrecision(precision)
+		self.storage = utils.convert.parseStorage(storage)
+		self.weld = float(weld) if weld != "" else None
+		self.holes = holes
+		self.buffers = self.createBuffers()
+
+	def getPath(self, name):
+
+		'''
+		Returns the target file path for a named output when writing straight to files,
+		otherwise None so the document is returned as a string instead
+		'''
+
+		if not self.out_dir:
+
+			return None
+
+		return os.path.join(self.out_dir, "{}.{}".format(name, self.fmt))
+
+	def setOutput(self, feature, result):
+
+		'''
+		Writes the file path (when streaming to files) or the .geo string to the feature
+		'''
+
+		if self.out_dir:
+
+			feature.setAttribute("hougeo_path", result)
+
+		else:
+
+			feature.setAttribute("hougeo", result)
+
+	def getGroups(self, scope):
+
+		'''
+		Returns the attribute driven group builders for an output
+		'''
+
+		if not self.group_by:
+
+			return []
+
+		return [utils.geo.HouGroupBuilder(self.group_by, scope)]
+
+	def createBuffers(self):
+
+		'''
+		Returns empty source buffers for the point, polyline and polygon features. Only the
+		coordinates and attribute values of the features are kept, not the FMEFeatures.
+		'''
+
+		return collections.OrderedDict([(geomtype, utils.convert.source.SourceBuffer([self.group_by], self.budget, self.spill_dir)) for geomtype in BUFFERED_OUTPUTS])
+
+	def getOptions(self, geomtype):
+
+		'''
+		Returns the conversion options of a geomtype, points are never welded and only
+		polygons have holes
+		'''
+
+		options = {"precision": self.precision, "storage": self.storage}
+
+		if geomtype != "point":
+
+			options["weld"] = self.weld
+
+		if geomtype == "polygon":
+
+			options["holes"] = self.holes
+
+		return options
+
+	def getExecutor(self):
+
+		'''
+		Returns the process pool converting the object features, started on first use
+		'''
+
+		if self.executor is None:
+
+			context = multiprocessing.get_context("spawn")
+
+			if python_exe:
+				context.set_executable(python_exe)
+
+			self.executor = concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=context)
+
+		return self.executor
+
+	def outputObjects(self, limit=0):
+
+		'''
+		Outputs the converted object features in their input order, waiting on the oldest
+		conversion while more than limit are still in flight
+		'''
+
+		while self.pending and (len(self.pending) > limit or self.pending[0][2].done()):
+
+			feature, name, future, key = self.pending.popleft()
+
+			# Write .geo string (or file path) to output feature
+			self.setOutput(feature, utils.finishFMESurface(future, key, self.fmt, self.getPath(name), self.cache))
+
+			# Output feature
+			self.pyoutput(feature)
 
 	def input(self, feature):
 
@@ -53,26 +241,48 @@ class HouGeoWriter(object):
 		if geomtype == "bbx":
 			
 			self.bbx = feature.getGeometry()
+			self.cs = feature.getCoordSys()
+
+		elif geomtype in self.buffers:
 
-		elif geomtype == "point":
+			if self.stream_by:
 
-			self.point_features.append(feature)
+				value = feature.getAttribute(self.stream_by)
 
-		elif geomtype == "polyline":
+				# Output the previous group as soon as the sorted value changes
+				if self.streamed and value != self.stream_value:
 
-			self.line_features.append(feature)
+					if value in self.streamed:
 
-		elif geomtype == "polygon":
+						raise ValueError("Features are not sorted by '{}', the value '{}' was already output".format(self.stream_by, value))
 
-			self.poly_features.append(feature)
+					self.outputBuffers()
+
+				self.stream_value = value
+				self.streamed.add(value)
+
+			# Reduce the feature (every part of an aggregate) to its coordinates and attribute values
+			self.buffers[geomtype].appendParts(utils.getFMESources([feature], BUFFERED_OUTPUTS[geomtype][0]))
 
 		elif geomtype == "object":
 
+			self.nobjects += 1
+			name = "object_{}".format(self.nobjects)
+
+			if self.workers > 1:
+
+				# Convert the feature in the process pool, bounding the number in flight
+				future, key = utils.submitFMESurface(self.getExecutor(), feature, self.fmt, self.cache, **self.getOptions(geomtype))
+				self.pending.append((feature, name, future, key))
+				self.outputObjects(self.workers * 4)
+
+				return
+
 			# Process feature
-			geo = utils.processFMESurface(feature)
+			geo = utils.processFMESurface(feature, fmt=self.fmt, dest=self.getPath(name), geo_cache=self.cache, **self.getOptions(geomtype))
 
-			# Write .geo string to output feature
-			feature.setAttribute("hougeo", geo)
+			# Write .geo string (or file path) to output feature
+			self.setOutput(feature, geo)
 
 			# Output feature
 			self.pyoutput(feature)
@@ -81,48 +291,141 @@ class HouGeoWriter(object):
 
 			pass
 
-	def close(self):
+	def processFeatures(self, geomtype, name, srcs, convert, scope, centroid, offset, bounds, origin):
 
 		'''
-		Operate on all stored FMEFeatures
+		Converts the buffered sources of one geomtype into output features. When tiling is
+		enabled there is one output per tile, each with the bounds of its own sources but
+		all sharing the global centroid offset so the tiles line up in Houdini. Tiles written
+		to files are also referenced from an index file of packed disk primitives.
 		'''
 
-		# Create empty list to store outputs
 		outputs = []
 
+		if self.tile_size > 0:
+
+			tiles = utils.tileSources(srcs, origin, self.tile_size)
+			index = []
+
+			for (col, row), tile_srcs in tiles.items():
+
+				tile_name = "{}_{}_{}".format(name, col, row)
+				tile_bounds = utils.getSourceBounds(offset, tile_srcs)
+				hougeo = convert(tile_srcs, centroid, offset, tile_bounds, groups=self.getGroups(scope), **self.getOptions(geomtype))
+				path = self.getPath(tile_name)
+
+				# Create output feature to store the .geo string
+				out = fmeobjects.FMEFeature()
+				out.setAttribute("geomtype", geomtype)
+				out.setAttribute("tile_col", col)
+				out.setAttribute("tile_row", row)
+				self.setOutput(out, utils.encodeHouGeo(hougeo, self.fmt, path))
+				outputs.append(out)
+
+				# Keep only the summary of the tile for the index
+				if path:
+					index.append((os.path.abspath(path), hougeo.bounds, hougeo.pt_count, hougeo.prim_count))
+
+			if index:
+
+				# Create output feature to store the index file path
+				index_name = "{}_index".format(name)
+				out = fmeobjects.FMEFeature()
+				out.setAttribute("geomtype", "{}_index".format(geomtype))
+				self.setOutput(out, utils.geo.createPackedDiskIndex(index, centroid, self.cs).write(self.getPath(index_name), self.fmt))
+				outputs.append(out)
+
+		else:
+
+			# Create output feature to store the .geo string
+			out = fmeobjects.FMEFeature()
+			out.setAttribute("geomtype", geomtype)
+			self.setOutput(out, utils.encodeHouGeo(convert(srcs, centroid, offset, bounds, groups=self.getGroups(scope), **self.getOptions(geomtype)), self.fmt, self.getPath(name)))
+			outputs.append(out)
+
+		return outputs
+
+	def outputBuffers(self):
+
+		'''
+		Converts and outputs the buffered point, polyline and polygon features: all of them
+		on close, or the current group when streaming. Streamed groups are named after their
+		value and bounded by their own extent.
+		'''
+
+		buffers = [buffer for buffer in self.buffers.values() if len(buffer) > 0]
+
+		if not buffers:
+
+			return
+
 		# Set the centroid, offset and bounds of the features using provided inputs
 		if self.bbx:
+
 			centroid = utils.getCentroid(self.bbx)
 			offset = fmeobjects.FMEPoint(-centroid[0], -centroid[1], 0.0)
 			bounds = utils.setBounds(offset, self.bbx)
+			origin = self.bbx.boundingBox()[0]
 
-		# Process point features
-		if len(self.point_features) > 0:
+		else:
 
-			# Create output feature to store the .geo string
-			out = fmeobjects.FMEFeature()
-			out.setAttribute("geomtype", "point")
-			out.setAttribute("hougeo", utils.processFMEPoints(self.point_features, centroid, offset, bounds))
-			outputs.append(out)
+			# Without a bbx feature use the extent of the buffered features
+			bbx = utils.getSourceExtent(buffers)
+			centroid = utils.lerp(bbx[0], bbx[1], 0.5)
+			offset = fmeobjects.FMEPoint(-centroid[0], -centroid[1], 0.0)
+			bounds = utils.convert.getOffsetBounds(offset, bbx)
+			origin = bbx[0]
 
-		# Process polyline features
-		if len(self.line_features) > 0:
-			
-			# Create output feature to store the .geo string
-			out = fmeobjects.FMEFeature()
-			out.setAttribute("geomtype", "polyline")
-			out.setAttribute("hougeo", utils.processFMELines(self.line_features, centroid, offset, bounds))
-			outputs.append(out)
+		# Create empty list to store outputs
+		outputs = []
 
-		# Process polygon features
-		if len(self.poly_features) > 0:
-			
-			# Create output feature to store the .geo string
-			out = fmeobjects.FMEFeature()
-			out.setAttribute("geomtype", "polygon")
-			out.setAttribute("hougeo", utils.processFMEAreas(self.poly_features, centroid, offset, bounds))
-			outputs.append(out)
+		try:
+
+			for geomtype, (kind, convert, scope) in BUFFERED_OUTPUTS.items():
+
+				srcs = self.buffers[geomtype]
+
+				if len(srcs) == 0:
+
+					continue
+
+				if self.stream_by:
+
+					name = "{}_{}".format(geomtype, re.sub(r"[^\w.-]", "_", str(self.stream_value)))
+					group_outputs = self.processFeatures(geomtype, name, srcs, convert, scope, centroid, offset, utils.getSourceBounds(offset, srcs), origin)
+
+					for out in group_outputs:
+						out.setAttribute(self.stream_by, self.stream_value)
+
+					outputs += group_outputs
+
+				else:
+
+					outputs += self.processFeatures(geomtype, geomtype, srcs, convert, scope, centroid, offset, bounds, origin)
+
+		finally:
+
+			# Release the buffered features and their temporary files
+			for buffer in self.buffers.values():
+				buffer.close()
+
+			self.buffers = self.createBuffers()
 
 		# Output features
 		for out in outputs:
-			self.pyoutput(out)
\ No newline at end of file
+			self.pyoutput(out)
+
+	def close(self):
+
+		'''
+		Operate on all stored FMEFeatures
+		'''
+
+		# Output the object features still converting in the process pool
+		self.outputObjects()
+
+		if self.executor is not None:
+			self.executor.shutdown()
+
+		# Output the buffered (or the last group of) point, polyline and polygon features
+		self.outputBuffers()
@@ -0,0 +1,52 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import importlib.util, os, random, time
+
+'''
+Benchmark of HouGeo.setPrimGroups with tens of thousands of groups (one group per
+building in a city block export). The time per group should stay flat as the number
+of groups grows, showing that group construction is linear.
+
+Usage: python bench/bench_primgroups.py
+'''
+
+# Get the fmehougeo library folder relative to this file
+lib_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "lib")
+
+# Import the fmehougeo geo.py modules (does not require FME)
+geo_spec = importlib.util.spec_from_file_location("geo", os.path.join(lib_dir, "geo.py"))
+geo = importlib.util.module_from_spec(geo_spec)
+geo_spec.loader.exec_module(geo)
+
+# --------------------------------------------------------------------------
+# Benchmark
+# --------------------------------------------------------------------------
+
+def run(ngroups, seed=0):
+
+	rng = random.Random(seed)
+
+	# Number of primitives in each (consecutive) group
+	pgrps_rle = [rng.randint(1, 40) for i in range(ngroups)]
+
+	hougeo = geo.HouGeo([0.0, 0.0, 0.0, 1.0, 1.0, 1.0])
+
+	start = time.perf_counter()
+	hougeo.setPrimGroups(pgrps_rle, "bldg")
+	elapsed = time.perf_counter() - start
+
+	return elapsed, len(hougeo.prim_groups)
+
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+	print("{:>10} {:>12} {:>14}".format("groups", "seconds", "us/group"))
+
+	for ngroups in [6250, 12500, 25000, 50000]:
+
+		elapsed, count = run(ngroups)
+
+		print("{:>10} {:>12.4f} {:>14.2f}".format(count, elapsed, elapsed / count * 1e6))
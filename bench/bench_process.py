@@ -0,0 +1,404 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import argparse, importlib.util, json, os, subprocess, sys, time
+
+'''
+Benchmark harness for the process* conversion paths of lib/utils.py on the synthetic
+datasets of bench/datasets.py. Every case runs in its own python process so that the peak
+memory (RSS) is measured per case, and reports the throughput in features and vertices
+per second, the peak RSS and the size of the output.
+
+	points            processFMEPoints on a point cloud
+	points_wide       processFMEPoints on a point cloud with 50 attributes per point
+	roads             processFMELines on a road network
+	parcels           processFMEAreas on parcel polygons
+	buildings         processFMESurface on every multipatch building
+	merged_buildings  processFMESurface on a single multisurface of all the buildings
+	points_attribs_N  processFMEPoints on a point cloud with N attributes per point
+
+The results can be saved as json (--save) and compared against a saved baseline
+(--compare): the run fails when the throughput of a case drops by more than the tolerance.
+The --sweep option runs the points_attribs_N cases for 1, 10, 50 and 200 attributes (or
+the counts given with --attribs) and reports the cost per feature and per attribute. The
+--scaling option runs merged_buildings at a small and a large number of faces and fails
+when the time per vertex grows by more than --max-ratio between them, i.e. when merging
+the meshes of a multisurface is clearly superlinear.
+
+Usage: python bench/bench_process.py --scales 1k,100k --format geo
+       python bench/bench_process.py --scales 100k --sweep
+       python bench/bench_process.py --scaling 10000,100000
+'''
+
+bench_dir = os.path.dirname(os.path.realpath(__file__))
+
+# Get the fmehougeo library folder relative to this file
+lib_dir = os.path.join(bench_dir, "..", "lib")
+
+# Import the datasets, it puts the fmeobjects stand-in on sys.path when needed
+datasets_spec = importlib.util.spec_from_file_location("datasets", os.path.join(bench_dir, "datasets.py"))
+datasets = importlib.util.module_from_spec(datasets_spec)
+datasets_spec.loader.exec_module(datasets)
+
+CASES = ["points", "points_wide", "roads", "parcels", "buildings", "merged_buildings"]
+
+# Attribute counts of the points_attribs_N cases run by --sweep
+SWEEP_ATTRIBS = [1, 10, 50, 200]
+
+# Faces of every box part of the buildings of bench/datasets.py
+BOX_FACES = 6
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns the peak resident set size of this process in bytes, or None when it cannot be
+measured on this platform
+'''
+
+def getPeakRSS():
+
+	try:
+		import resource
+	except ImportError:
+		return None
+
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	# Linux reports kilobytes, macOS bytes
+	return rss if sys.platform == "darwin" else rss * 1024
+
+# --------------------------------------------------------------------------
+
+def countVertices(features):
+
+	nverts = 0
+
+	for feature in features:
+
+		geom = feature.getGeometry()
+
+		if isinstance(geom, datasets.fmeobjects.FMEPoint):
+
+			nverts += 1
+
+		elif isinstance(geom, datasets.fmeobjects.FMEArea):
+
+			nverts += len(geom.getBoundaryAsCurve().getAsLine().getPoints()) - 1
+
+		elif isinstance(geom, datasets.fmeobjects.FMEMultiSurface):
+
+			nverts += sum([len(mesh.getVertices()) for mesh in geom])
+
+		else:
+
+			nverts += len(geom.getAsLine().getPoints())
+
+	return nverts
+
+# --------------------------------------------------------------------------
+
+def getOutputSize(output):
+
+	if isinstance(output, list):
+
+		return sum([getOutputSize(o) for o in output])
+
+	return len(output) if output else 0
+
+# --------------------------------------------------------------------------
+
+'''
+Runs one case in this process and returns its measurements
+'''
+
+def runCase(case, n, fmt, repeat):
+
+	spec = importlib.util.spec_from_file_location("utils", os.path.join(lib_dir, "utils.py"))
+	utils = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(utils)
+
+	if case == "points":
+
+		features = datasets.createPointCloud(n)
+
+	elif case == "points_wide":
+
+		features = datasets.createPointCloud(n, nattribs=50)
+
+	elif case.startswith("points_attribs_"):
+
+		features = datasets.createPointCloud(n, nattribs=int(case[15:]))
+
+	elif case == "roads":
+
+		features = datasets.createRoadNetwork(n)
+
+	elif case == "parcels":
+
+		features = datasets.createParcels(n)
+
+	elif case == "buildings":
+
+		features = datasets.createBuildings(n)
+
+	elif case == "merged_buildings":
+
+		features = datasets.createBuildings(1, nparts=n)
+
+	else:
+
+		raise ValueError("Unknown benchmark case '{}'".format(case))
+
+	nverts = countVertices(features)
+	input_rss = getPeakRSS()
+
+	# Set the centroid, offset and bounds the way HouGeoWriter.close does
+	bbx = datasets.getDatasetBounds(features)
+	centroid = utils.getCentroid(bbx)
+	offset = datasets.fmeobjects.FMEPoint(-centroid[0], -centroid[1], 0.0)
+	bounds = utils.setBounds(offset, bbx)
+
+	best = None
+
+	for i in range(repeat):
+
+		start = time.perf_counter()
+
+		if case.startswith("points"):
+
+			output = utils.processFMEPoints(features, centroid, offset, bounds, fmt=fmt)
+
+		elif case == "roads":
+
+			output = utils.processFMELines(features, centroid, offset, bounds, fmt=fmt)
+
+		elif case == "parcels":
+
+			output = utils.processFMEAreas(features, centroid, offset, bounds, fmt=fmt)
+
+		else:
+
+			output = [utils.processFMESurface(feature, fmt=fmt) for feature in features]
+
+		elapsed = time.perf_counter() - start
+
+		if best is None or elapsed < best:
+			best = elapsed
+
+		size = getOutputSize(output)
+		output = None
+
+	return {
+		"case": case,
+		"features": len(features),
+		"vertices": nverts,
+		"seconds": best,
+		"features_per_s": len(features) / best,
+		"vertices_per_s": nverts / best,
+		"input_rss": input_rss,
+		"peak_rss": getPeakRSS(),
+		"output_bytes": size,
+	}
+
+# --------------------------------------------------------------------------
+
+'''
+Runs one case in a new python process so its peak RSS is not shared with other cases
+'''
+
+def runCaseProcess(case, n, fmt, repeat):
+
+	cmd = [sys.executable, os.path.realpath(__file__), "--run", case, str(n), "--format", fmt, "--repeat", str(repeat)]
+	out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+	return json.loads(out.strip().splitlines()[-1])
+
+# --------------------------------------------------------------------------
+
+def formatMB(nbytes):
+
+	return "-" if nbytes is None else "{:.1f}".format(nbytes / (1024.0 * 1024.0))
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the cases whose throughput dropped by more than tolerance against the baseline
+'''
+
+def compareResults(results, baseline, tolerance):
+
+	previous = dict([((r["case"], r["features"]), r) for r in baseline])
+	regressions = []
+
+	for result in results:
+
+		base = previous.get((result["case"], result["features"]))
+
+		if base and result["vertices_per_s"] < base["vertices_per_s"] * (1.0 - tolerance):
+
+			regressions.append((result, base))
+
+	return regressions
+
+# --------------------------------------------------------------------------
+
+'''
+Prints the cost per feature of the points_attribs_N results against their attribute count,
+and the cost per attribute between consecutive counts, which stays flat when writing the
+attributes of a feature is linear in their number
+'''
+
+def printSweep(results):
+
+	sweep = sorted([(int(r["case"][15:]), r) for r in results if r["case"].startswith("points_attribs_")], key=lambda item: (item[1]["features"], item[0]))
+
+	print("{:>9} {:>9} {:>14} {:>16}".format("features", "attribs", "us/feature", "us/attribute"))
+
+	previous = None
+
+	for nattribs, r in sweep:
+
+		cost = r["seconds"] * 1e6 / r["features"]
+
+		if previous is not None and previous[0] < nattribs and previous[1] == r["features"]:
+
+			slope = "{:>16.3f}".format((cost - previous[2]) / (nattribs - previous[0]))
+
+		else:
+
+			slope = "{:>16}".format("-")
+
+		print("{:>9} {:>9} {:>14.2f} {}".format(r["features"], nattribs, cost, slope))
+
+		previous = (nattribs, r["features"], cost)
+
+# --------------------------------------------------------------------------
+
+'''
+Runs merged_buildings with a small and a large number of faces and returns both results
+and the growth of the time per vertex from the small to the large one, about 1 when the
+merging is linear
+'''
+
+def runScaling(small, large, fmt, repeat):
+
+	results = []
+
+	for faces in (small, large):
+
+		nparts = max(1, faces // BOX_FACES)
+
+		r = runCaseProcess("merged_buildings", nparts, fmt, repeat)
+		r["faces"] = nparts * BOX_FACES
+		results.append(r)
+
+	return results, results[0]["vertices_per_s"] / results[1]["vertices_per_s"]
+
+# --------------------------------------------------------------------------
+
+def main(argv=None):
+
+	parser = argparse.ArgumentParser(description="Benchmark the fmehougeo process* conversion paths")
+	parser.add_argument("--scales", default="1k,100k", help="comma separated dataset scales ({}) or feature counts".format(", ".join(datasets.SCALES)))
+	parser.add_argument("--cases", default=",".join(CASES), help="comma separated cases ({})".format(", ".join(CASES)))
+	parser.add_argument("--format", default="geo", choices=["geo", "bgeo"])
+	parser.add_argument("--repeat", type=int, default=1, help="number of runs per case, the fastest is reported")
+	parser.add_argument("--save", default=None, help="write the results to this json file")
+	parser.add_argument("--compare", default=None, help="json results of a previous run to compare against")
+	parser.add_argument("--tolerance", type=float, default=0.2, help="allowed drop in vertices/s against --compare")
+	parser.add_argument("--sweep", action="store_true", help="run the points_attribs_N cases for the --attribs counts instead of --cases")
+	parser.add_argument("--attribs", default=",".join([str(n) for n in SWEEP_ATTRIBS]), help="comma separated attribute counts of --sweep")
+	parser.add_argument("--scaling", default=None, metavar="SMALL,LARGE", help="face counts of a merged multisurface to check for linear scaling, e.g. 10000,100000")
+	parser.add_argument("--max-ratio", type=float, default=2.0, help="allowed growth of the time per vertex from the small to the large --scaling size")
+	parser.add_argument("--run", nargs=2, default=None, metavar=("CASE", "N"), help=argparse.SUPPRESS)
+
+	args = parser.parse_args(argv)
+
+	# Worker mode: run a single case and print its measurements as json
+	if args.run:
+
+		print(json.dumps(runCase(args.run[0], int(args.run[1]), args.format, args.repeat)))
+
+		return 0
+
+	print("python {}, format {}".format(sys.version.split()[0], args.format))
+
+	if args.scaling:
+
+		small, large = [int(faces) for faces in args.scaling.split(",")]
+		results, ratio = runScaling(small, large, args.format, args.repeat)
+
+		for r in results:
+
+			print("merged_buildings {:>9} faces {:>10} vertices {:>9.3f} seconds {:>12.0f} vertices/s".format(
+				r["faces"], r["vertices"], r["seconds"], r["vertices_per_s"]))
+
+		print("time per vertex grows {:.2f}x from {} to {} faces (allowed {:.2f}x)".format(ratio, small, large, args.max_ratio))
+
+		if ratio > args.max_ratio:
+
+			print("REGRESSION merged_buildings scales superlinearly")
+
+			return 1
+
+		return 0
+
+	print("{:>18} {:>9} {:>10} {:>9} {:>12} {:>12} {:>9} {:>9} {:>12}".format(
+		"case", "features", "vertices", "seconds", "features/s", "vertices/s", "in MB", "peak MB", "out bytes"))
+
+	results = []
+
+	if args.sweep:
+
+		cases = ["points_attribs_{}".format(n) for n in args.attribs.split(",")]
+
+	else:
+
+		cases = args.cases.split(",")
+
+	for scale in args.scales.split(","):
+
+		for case in cases:
+
+			n = datasets.SCALES[scale] if scale in datasets.SCALES else int(scale)
+			r = runCaseProcess(case, n, args.format, args.repeat)
+			results.append(r)
+
+			print("{:>18} {:>9} {:>10} {:>9.3f} {:>12.0f} {:>12.0f} {:>9} {:>9} {:>12}".format(
+				r["case"], r["features"], r["vertices"], r["seconds"], r["features_per_s"], r["vertices_per_s"],
+				formatMB(r["input_rss"]), formatMB(r["peak_rss"]), r["output_bytes"]))
+
+	if args.sweep:
+
+		print("")
+		printSweep(results)
+
+	if args.save:
+
+		with open(args.save, "w") as f:
+			json.dump(results, f, indent=1)
+
+	if args.compare:
+
+		with open(args.compare) as f:
+			regressions = compareResults(results, json.load(f), args.tolerance)
+
+		for result, base in regressions:
+
+			print("REGRESSION {} ({} features): {:.0f} vertices/s, baseline {:.0f}".format(
+				result["case"], result["features"], result["vertices_per_s"], base["vertices_per_s"]))
+
+		if regressions:
+
+			return 1
+
+	return 0
+
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+	sys.exit(main())
@@ -0,0 +1,230 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import math, os, random, sys
+
+'''
+Synthetic dataset generators for the benchmarks: point clouds, road networks, parcel
+polygons and multipatch buildings, created as FMEFeatures spread over a 10 km square.
+Every generator is seeded so the same scale always gives the same features. The real
+fmeobjects module is used when it can be imported, otherwise the stand-in in
+bench/fmestub is put on sys.path.
+'''
+
+try:
+	import fmeobjects
+except ImportError:
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "fmestub"))
+	import fmeobjects
+
+# Number of features for each named scale
+SCALES = {
+	"1k": 1000,
+	"100k": 100000,
+	"1M": 1000000,
+}
+
+# Size of the square the features are spread over (in ground units)
+EXTENT = 10000.0
+
+# Coordinate system of the generated features
+COORD_SYS = "EPSG:27700"
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+def createFeature(geometry, attributes):
+
+	feature = fmeobjects.FMEFeature()
+	feature.setGeometry(geometry)
+	feature.setCoordSys(COORD_SYS)
+
+	for name, val in attributes:
+		feature.setAttribute(name, val)
+
+	return feature
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the extent of the features as an FMEBox, the bbx input of the HoudiniGeoWriter
+'''
+
+def getDatasetBounds(features):
+
+	bbxmin = [float("inf")] * 3
+	bbxmax = [float("-inf")] * 3
+
+	for feature in features:
+
+		cube = feature.getGeometry().boundingCube()
+
+		for i in range(3):
+
+			bbxmin[i] = min(bbxmin[i], cube[0][i])
+			bbxmax[i] = max(bbxmax[i], cube[1][i])
+
+	return fmeobjects.FMEBox(tuple(bbxmin + bbxmax))
+
+# --------------------------------------------------------------------------
+
+'''
+Lidar style point cloud with a classification, an intensity and a height per point. The
+number of attributes can be lowered or raised with nattribs to measure the cost of narrow
+and wide schemas.
+'''
+
+def createPointCloud(n, seed=0, nattribs=3):
+
+	rng = random.Random(seed)
+	classes = ["ground", "vegetation", "building", "water", "bridge"]
+	features = []
+
+	for i in range(n):
+
+		x = rng.uniform(0.0, EXTENT)
+		y = rng.uniform(0.0, EXTENT)
+		z = rng.uniform(0.0, 50.0)
+
+		attributes = [
+			("attrib_class", rng.choice(classes)),
+			("attrib_intensity", rng.randint(0, 65535)),
+			("attrib_height", z)
+		][:nattribs]
+
+		for j in range(3, nattribs):
+			attributes.append(("attrib_band_{}".format(j), rng.random()))
+
+		features.append(createFeature(fmeobjects.FMEPoint(x, y, z), attributes))
+
+	return features
+
+# --------------------------------------------------------------------------
+
+'''
+Road centrelines as random walks of 2 to 30 vertices
+'''
+
+def createRoadNetwork(n, seed=0):
+
+	rng = random.Random(seed)
+	classes = ["motorway", "primary", "secondary", "residential", "service"]
+	features = []
+
+	for i in range(n):
+
+		x = rng.uniform(0.0, EXTENT)
+		y = rng.uniform(0.0, EXTENT)
+		heading = rng.uniform(0.0, 2.0 * math.pi)
+		coords = []
+
+		for j in range(rng.randint(2, 30)):
+
+			coords.append((x, y, 0.0))
+
+			heading += rng.uniform(-0.3, 0.3)
+			x += 20.0 * math.cos(heading)
+			y += 20.0 * math.sin(heading)
+
+		attributes = [
+			("attrib_class", rng.choice(classes)),
+			("attrib_lanes", rng.randint(1, 4)),
+			("attrib_speed", rng.choice([20.0, 30.0, 50.0, 70.0]))
+		]
+
+		features.append(createFeature(fmeobjects.FMELine(coords), attributes))
+
+	return features
+
+# --------------------------------------------------------------------------
+
+'''
+Parcels as convex polygons of 4 to 8 vertices laid out on a grid
+'''
+
+def createParcels(n, seed=0):
+
+	rng = random.Random(seed)
+	zones = ["R1", "R2", "C1", "I1", "OS"]
+	cols = max(int(math.sqrt(n)), 1)
+	size = EXTENT / cols
+	features = []
+
+	for i in range(n):
+
+		cx = (i % cols + 0.5) * size
+		cy = (i // cols + 0.5) * size
+		nverts = rng.randint(4, 8)
+		coords = []
+
+		for j in range(nverts):
+
+			angle = 2.0 * math.pi * j / nverts
+			radius = size * rng.uniform(0.35, 0.5)
+			coords.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle), 0.0))
+
+		attributes = [
+			("attrib_zone", rng.choice(zones)),
+			("attrib_parcel_id", i),
+			("attrib_area", size * size)
+		]
+
+		features.append(createFeature(fmeobjects.FMEPolygon(fmeobjects.FMELine(coords)), attributes))
+
+	return features
+
+# --------------------------------------------------------------------------
+
+'''
+Returns an FMEMesh box (8 vertices, 6 quad faces)
+'''
+
+def createBox(x, y, z, w, d, h):
+
+	vertices = [(x + dx * w, y + dy * d, z + dz * h) for dz in (0, 1) for dy in (0, 1) for dx in (0, 1)]
+	faces = [[0, 2, 3, 1], [4, 5, 7, 6], [0, 1, 5, 4], [1, 3, 7, 5], [3, 2, 6, 7], [2, 0, 4, 6]]
+
+	return fmeobjects.FMEMesh(vertices, faces)
+
+# --------------------------------------------------------------------------
+
+'''
+Multipatch buildings as FMEMultiSurfaces of 1 to 3 stacked boxes. Setting nparts gives
+every building that many boxes instead, e.g. to measure the merging of large multisurfaces.
+'''
+
+def createBuildings(n, seed=0, nparts=None):
+
+	rng = random.Random(seed)
+	uses = ["residential", "commercial", "industrial", "civic"]
+	features = []
+
+	for i in range(n):
+
+		x = rng.uniform(0.0, EXTENT)
+		y = rng.uniform(0.0, EXTENT)
+		w = rng.uniform(5.0, 30.0)
+		d = rng.uniform(5.0, 30.0)
+		z = 0.0
+		meshes = []
+
+		for j in range(nparts or rng.randint(1, 3)):
+
+			h = rng.uniform(3.0, 12.0)
+			meshes.append(createBox(x, y, z, w, d, h))
+
+			z += h
+			w *= 0.8
+			d *= 0.8
+
+		attributes = [
+			("attrib_use", rng.choice(uses)),
+			("attrib_height", z),
+			("attrib_storeys", len(meshes))
+		]
+
+		features.append(createFeature(fmeobjects.FMEMultiSurface(meshes), attributes))
+
+	return features
@@ -0,0 +1,6 @@
+'''
+Minimal stand-in for the FME fme module (see fmeobjects.py in this folder). The published
+parameters of the PythonCaller are read from macroValues.
+'''
+
+macroValues = {}
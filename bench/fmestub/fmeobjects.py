@@ -0,0 +1,418 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+'''
+Minimal stand-in for the parts of the FME fmeobjects module used by the fmehougeo
+library, so the conversion functions can be benchmarked on machines without FME. Only
+the methods the library calls are implemented and they follow the FME Python API
+(e.g. face vertex indices are closed and areas return their boundary as a closed line).
+It is put on sys.path by the benchmarks only when the real module cannot be imported.
+'''
+
+# --------------------------------------------------------------------------
+# Attribute Types
+# --------------------------------------------------------------------------
+
+FME_ATTR_UNDEFINED = 0
+FME_ATTR_BOOLEAN = 1
+FME_ATTR_INT32 = 6
+FME_ATTR_REAL64 = 9
+FME_ATTR_STRING = 11
+FME_ATTR_INT64 = 13
+
+# --------------------------------------------------------------------------
+# Geometry Classes
+# --------------------------------------------------------------------------
+
+class FMEGeometry(object):
+
+	def getCoords(self):
+
+		return []
+
+	# ----------------------------------------
+
+	def boundingCube(self):
+
+		coords = self.getCoords()
+
+		xs = [c[0] for c in coords]
+		ys = [c[1] for c in coords]
+		zs = [c[2] for c in coords]
+
+		return ((min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs)))
+
+	# ----------------------------------------
+
+	def boundingBox(self):
+
+		cube = self.boundingCube()
+
+		return (cube[0][:2], cube[1][:2])
+
+# --------------------------------------------------------------------------
+
+class FMEPoint(FMEGeometry):
+
+	def __init__(self, x=0.0, y=0.0, z=0.0):
+
+		self.x = float(x)
+		self.y = float(y)
+		self.z = float(z)
+
+	# ----------------------------------------
+
+	def getXYZ(self):
+
+		return (self.x, self.y, self.z)
+
+	# ----------------------------------------
+
+	def offset(self, point):
+
+		self.x += point.x
+		self.y += point.y
+		self.z += point.z
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return [self.getXYZ()]
+
+# --------------------------------------------------------------------------
+
+class FMELine(FMEGeometry):
+
+	def __init__(self, coords=()):
+
+		self.coords = [(float(c[0]), float(c[1]), float(c[2]) if len(c) > 2 else 0.0) for c in coords]
+
+	# ----------------------------------------
+
+	def getPoints(self):
+
+		return [FMEPoint(*c) for c in self.coords]
+
+	# ----------------------------------------
+
+	def getAsLine(self):
+
+		return self
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return self.coords
+
+# --------------------------------------------------------------------------
+
+class FMEArea(FMEGeometry):
+
+	def __init__(self, boundary):
+
+		# Close the boundary the way FME does
+		if boundary.coords and boundary.coords[0] != boundary.coords[-1]:
+			boundary = FMELine(boundary.coords + [boundary.coords[0]])
+
+		self.boundary = boundary
+
+	# ----------------------------------------
+
+	def getBoundaryAsCurve(self):
+
+		return self.boundary
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return self.boundary.coords
+
+# --------------------------------------------------------------------------
+
+class FMEPolygon(FMEArea):
+
+	pass
+
+# --------------------------------------------------------------------------
+
+class FMEDonut(FMEArea):
+
+	def __init__(self, outer, inners=()):
+
+		FMEArea.__init__(self, outer)
+
+		self.inners = [FMEArea(inner).boundary for inner in inners]
+
+	# ----------------------------------------
+
+	def getOuterBoundaryAsCurve(self):
+
+		return self.boundary
+
+	# ----------------------------------------
+
+	def numInnerBoundaries(self):
+
+		return len(self.inners)
+
+	# ----------------------------------------
+
+	def getInnerBoundaryAsCurve(self, index):
+
+		return self.inners[index]
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return self.boundary.coords + [c for inner in self.inners for c in inner.coords]
+
+# --------------------------------------------------------------------------
+
+class FMEAggregate(FMEGeometry):
+
+	def __init__(self, parts=()):
+
+		self.parts = list(parts)
+
+	# ----------------------------------------
+
+	def appendPart(self, part):
+
+		self.parts.append(part)
+
+	# ----------------------------------------
+
+	def numParts(self):
+
+		return len(self.parts)
+
+	# ----------------------------------------
+
+	def __iter__(self):
+
+		return iter(self.parts)
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return [c for part in self.parts for c in part.getCoords()]
+
+# --------------------------------------------------------------------------
+
+class FMEMultiPoint(FMEAggregate):
+
+	pass
+
+# --------------------------------------------------------------------------
+
+class FMEMultiCurve(FMEAggregate):
+
+	pass
+
+# --------------------------------------------------------------------------
+
+class FMEMultiArea(FMEAggregate):
+
+	pass
+
+# --------------------------------------------------------------------------
+
+class FMEBox(FMEGeometry):
+
+	def __init__(self, bounds):
+
+		self.bounds = tuple(float(v) for v in bounds)
+
+	# ----------------------------------------
+
+	def getLocalMinPointXYZ(self):
+
+		return self.bounds[:3]
+
+	# ----------------------------------------
+
+	def getLocalMaxPointXYZ(self):
+
+		return self.bounds[3:]
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return [self.bounds[:3], self.bounds[3:]]
+
+# --------------------------------------------------------------------------
+
+class FMEFace(object):
+
+	def __init__(self, indices):
+
+		self.indices = indices
+
+	# ----------------------------------------
+
+	def getVertexIndices(self):
+
+		# Face vertex indices are closed (the first index is repeated)
+		return self.indices + [self.indices[0]]
+
+# --------------------------------------------------------------------------
+
+class FMEMesh(FMEGeometry):
+
+	def __init__(self, vertices, faces):
+
+		self.vertices = [tuple(v) for v in vertices]
+		self.faces = [list(f) for f in faces]
+
+	# ----------------------------------------
+
+	def numParts(self):
+
+		return len(self.faces)
+
+	# ----------------------------------------
+
+	def getVertices(self):
+
+		return list(self.vertices)
+
+	# ----------------------------------------
+
+	def __iter__(self):
+
+		return iter([FMEFace(f) for f in self.faces])
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return self.vertices
+
+# --------------------------------------------------------------------------
+
+class FMEMultiSurface(FMEGeometry):
+
+	def __init__(self, meshes=()):
+
+		self.meshes = list(meshes)
+
+	# ----------------------------------------
+
+	def appendPart(self, mesh):
+
+		self.meshes.append(mesh)
+
+	# ----------------------------------------
+
+	def numParts(self):
+
+		return len(self.meshes)
+
+	# ----------------------------------------
+
+	def __iter__(self):
+
+		return iter(self.meshes)
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return [v for mesh in self.meshes for v in mesh.vertices]
+
+# --------------------------------------------------------------------------
+# Feature Class
+# --------------------------------------------------------------------------
+
+class FMEFeature(object):
+
+	def __init__(self):
+
+		self.attributes = {}
+		self.types = {}
+		self.geometry = None
+		self.cs = ""
+
+	# ----------------------------------------
+
+	def setAttribute(self, name, val):
+
+		if isinstance(val, bool):
+
+			atype = FME_ATTR_BOOLEAN
+
+		elif isinstance(val, int):
+
+			atype = FME_ATTR_INT32 if -0x80000000 <= val < 0x80000000 else FME_ATTR_INT64
+
+		elif isinstance(val, float):
+
+			atype = FME_ATTR_REAL64
+
+		else:
+
+			atype = FME_ATTR_STRING
+
+		self.attributes[name] = val
+		self.types[name] = atype
+
+	# ----------------------------------------
+
+	def getAttribute(self, name):
+
+		return self.attributes.get(name)
+
+	# ----------------------------------------
+
+	def getAttributeType(self, name):
+
+		return self.types.get(name, FME_ATTR_UNDEFINED)
+
+	# ----------------------------------------
+
+	def getAllAttributeNames(self):
+
+		return list(self.attributes)
+
+	# ----------------------------------------
+
+	def getAllCoordinates(self):
+
+		return list(self.geometry.getCoords()) if self.geometry is not None else []
+
+	# ----------------------------------------
+
+	def setGeometry(self, geometry):
+
+		self.geometry = geometry
+
+	# ----------------------------------------
+
+	def getGeometry(self):
+
+		return self.geometry
+
+	# ----------------------------------------
+
+	def hasGeometry(self):
+
+		return self.geometry is not None
+
+	# ----------------------------------------
+
+	def setCoordSys(self, cs):
+
+		self.cs = cs
+
+	# ----------------------------------------
+
+	def getCoordSys(self):
+
+		return self.cs
@@ -2,36 +2,733 @@
 # Imports
 # --------------------------------------------------------------------------
 
-import collections
+import array, collections, json, struct
+
+'''
+NumPy is optional. When it is available arrays can be handed to a HouColumn without
+a copy and the values are rounded and range checked with its vectorised routines.
+'''
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+'''
+Maps the Houdini attribute storage onto the typecode of the array its values are held in
+and packed with in the binary encoding
+'''
+
+STORAGE_TYPECODES = {
+	"int8": "b",
+	"int16": "h",
+	"int32": "i",
+	"int64": "q",
+	"fpreal32": "f",
+	"fpreal64": "d",
+}
+
+'''
+The integer storages from the narrowest to the widest with the range of values they hold
+'''
+
+INT_STORAGES = [
+	("int8", -0x80, 0x7f),
+	("int16", -0x8000, 0x7fff),
+	("int32", -0x80000000, 0x7fffffff),
+	("int64", -0x8000000000000000, 0x7fffffffffffffff),
+]
+
+FLOAT32 = struct.Struct("f")
+
+# Largest finite float32 value
+FLOAT32_MAX = 3.4028234663852886e+38
+
+# Largest integer range float32 values hold exactly
+FLOAT32_INT_MAX = 0x1000000
+
+INF = float("inf")
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns a copy of a document structure (see HouGeo.getDocument) in which the attribute
+value columns, and any NumPy array, are replaced by plain lists of their values, so that
+it can be passed to json.dumps
+'''
+
+def getPlainJSON(obj):
+
+	if hasattr(obj, "getEncodedValues"):
+
+		return obj.getEncodedValues()
+
+	elif isinstance(obj, dict):
+
+		return collections.OrderedDict([(key, getPlainJSON(value)) for key, value in obj.items()])
+
+	elif isinstance(obj, (list, tuple)):
+
+		return [value if type(value) in (int, float, str, bool) else getPlainJSON(value) for value in obj]
+
+	elif hasattr(obj, "tolist"):
+
+		return obj.tolist()
+
+	return obj
+
+# --------------------------------------------------------------------------
+
+'''
+Returns float32 values as a list of Python floats that are each the shortest decimal (of up
+to 8 significant digits, the float64 expansion otherwise) reading back as the same float32
+value, so fpreal32 data is written without the noise digits of its float64 expansion.
+NumPy is only used for large arrays as it is slower than the builtins on a few values.
+'''
+
+def getFloat32Values(values):
+
+	if np is None or len(values) <= 1024:
+
+		return [getFloat32Value(FLOAT32.unpack(FLOAT32.pack(val))[0]) for val in values]
+
+	values = np.asarray(values, dtype=np.float32)
+	exact = values.astype(np.float64)
+	short = exact.copy()
+
+	with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+
+		todo = np.flatnonzero(np.isfinite(exact) & (exact != 0.0))
+		exponent = np.floor(np.log10(np.abs(exact[todo])))
+
+		# Powers of ten are only exact floats up to 10^22, the few values of a larger or
+		# smaller magnitude are formatted one by one
+		outside = (exponent < -15) | (exponent > 14)
+
+		for i in todo[outside]:
+
+			short[i] = getFloat32Value(exact[i])
+
+		todo = todo[~outside]
+		exponent = exponent[~outside]
+
+		# Round to 6, 7 and then 8 significant digits, as m / 10^n (or m * 10^n) so that the
+		# result is the float64 closest to the decimal, until the float32 value reads back
+		for digits in (6, 7, 8):
+
+			if len(todo) == 0:
+				break
+
+			decimals = digits - 1 - exponent
+			scale = 10.0 ** np.abs(decimals)
+			whole = decimals >= 0
+			vals = exact[todo]
+
+			rounded = np.where(whole, np.round(vals * scale) / scale, np.round(vals / scale) * scale)
+			found = rounded.astype(np.float32) == values[todo]
+
+			short[todo[found]] = rounded[found]
+			todo = todo[~found]
+			exponent = exponent[~found]
+
+	return short.tolist()
+
+# --------------------------------------------------------------------------
+
+def getFloat32Value(val):
+
+	for fmt in ("%.6g", "%.7g", "%.8g"):
+
+		short = float(fmt % val)
+
+		if FLOAT32.unpack(FLOAT32.pack(short))[0] == val:
+
+			return short
+
+	return val
 
 # --------------------------------------------------------------------------
 # Classes
 # --------------------------------------------------------------------------
 
+'''
+This class is a columnar buffer holding the values of a numeric attribute as a flat typed
+array (array.array or a NumPy array) rather than a list of boxed Python objects. Vector
+values are stored interleaved with a stride of vsize. The buffer can be preallocated when
+the number of values is known, appends are amortised otherwise, and the serializers read
+the underlying array directly through getData().
+
+The values are held in the typed array of the storage of the column (e.g. 4 bytes per
+value for int32 and fpreal32) and handed to the binary encoder as they are. A value that
+does not fit widens the storage when it is appended: integers move to the narrowest integer
+storage holding them and floats beyond the range of float32 to fpreal64 (see fitValues).
+Values of another type are coerced when they are appended (see coerce), e.g. a fraction
+turns an integer column into a float column. The json encoding writes fpreal32 values as
+the shortest decimal of their float32 value (see getFloat32Values).
+
+Float columns can be given a precision (a number of decimals) that the values are rounded
+to when they are encoded, the stored values are not changed.
+'''
+
+class HouColumn(object):
+
+	def __init__(self, storage, vsize, size=None, precision=None):
+
+		self.storage = storage
+		self.vsize = vsize
+		self.typecode = STORAGE_TYPECODES[storage]
+		self.count = 0
+		self.precision = precision
+
+		# Preallocate the buffer (filled with zeros) when the number of values is known
+		if size:
+
+			self.data = array.array(self.typecode, bytes(size * vsize * array.array(self.typecode).itemsize))
+
+		else:
+
+			self.data = array.array(self.typecode)
+
+	# ----------------------------------------
+
+	def __len__(self):
+
+		return self.count
+
+	# ----------------------------------------
+
+	def reset(self):
+
+		# Keep any preallocated capacity but forget the written values
+		if not isinstance(self.data, array.array):
+
+			self.data = array.array(self.typecode)
+
+		self.count = 0
+
+	# ----------------------------------------
+
+	def append(self, val):
+
+		try:
+
+			if self.vsize == 1:
+
+				# Write into the preallocated space or grow the buffer
+				if self.count < len(self.data):
+
+					self.data[self.count] = val
+
+				else:
+
+					self.data.append(val)
+
+				# Floats beyond the range of float32 are stored as infinity
+				if self.typecode == "f" and self.data[self.count] in (INF, -INF) and val not in (INF, -INF):
+
+					raise OverflowError(val)
+
+			else:
+
+				i = self.count * self.vsize
+				packed = array.array(self.typecode, val)
+
+				if len(packed) != self.vsize or self.typecode == "f" and (INF in packed or -INF in packed):
+
+					raise OverflowError(val)
+
+				if i < len(self.data):
+
+					self.data[i:i + self.vsize] = packed
+
+				else:
+
+					self.data.extend(packed)
+
+		except (TypeError, OverflowError):
+
+			# Store the coerced value instead in a storage that holds it, the column may have
+			# become a float column
+			val = self.coerce(val)
+			self.fitValues([val] if self.vsize == 1 else val)
+			self.append(val)
+
+			return
+
+		except AttributeError:
+
+			# An adopted NumPy array (which has no spare space) is copied to a growable array
+			self.data = array.array(self.typecode, self.getData().tobytes())
+			self.append(val)
+
+			return
+
+		self.count += 1
+
+	# ----------------------------------------
+
+	def extend(self, vals):
+
+		# NumPy arrays of numbers on an empty column are adopted (converted only if the
+		# dtype differs), fractional values turn an integer column into a float column and
+		# the storage is widened to hold the values first
+		if np is not None and isinstance(vals, np.ndarray) and vals.dtype.kind in "biuf" and self.count == 0:
+
+			if self.typecode not in "fd" and vals.dtype.kind == "f" and not np.array_equal(vals, np.round(vals)):
+
+				self.setFloat(vals)
+
+			self.fitValues(vals)
+			self.data = np.ascontiguousarray(vals, dtype=np.dtype(self.typecode)).reshape(-1)
+			self.count = len(self.data) // self.vsize
+
+			return
+
+		for val in vals:
+
+			self.append(val)
+
+	# ----------------------------------------
+
+	def coerce(self, val):
+
+		'''
+		Returns a value the column cannot store as is converted for it: numbers given as
+		strings are parsed, integral floats are stored in integer columns and any other float
+		turns an integer column into a float column. Raises a ValueError for values that are
+		not numbers (or vectors of vsize numbers) and integers beyond 64 bits.
+		'''
+
+		if self.vsize == 1:
+
+			return self.coerceNumber(val)
+
+		if isinstance(val, (str, bytes)) or not hasattr(val, "__len__") or len(val) != self.vsize:
+
+			raise ValueError("{!r} is not a vector of {} numbers".format(val, self.vsize))
+
+		return [self.coerceNumber(v) for v in val]
+
+	# ----------------------------------------
+
+	def coerceNumber(self, val):
+
+		if isinstance(val, (str, bytes)):
+
+			try:
+
+				val = int(val)
+
+			except ValueError:
+
+				try:
+
+					val = float(val)
+
+				except ValueError:
+
+					raise ValueError("{!r} is not a number".format(val))
+
+		try:
+
+			number = float(val)
+
+		except (TypeError, ValueError):
+
+			raise ValueError("{!r} is not a number".format(val))
+
+		except OverflowError:
+
+			raise ValueError("{} does not fit in 64 bit storage".format(val))
+
+		if self.typecode not in "fd":
+
+			# Integers (Python or NumPy) are stored as they are when they fit
+			if hasattr(val, "__index__"):
+
+				if -0x8000000000000000 <= int(val) <= 0x7fffffffffffffff:
+
+					return int(val)
+
+				raise ValueError("{} does not fit in 64 bit storage".format(val))
+
+			if number.is_integer() and -0x8000000000000000 <= number < 0x8000000000000000:
+
+				return int(number)
+
+			self.setFloat()
+
+		return number
+
+	# ----------------------------------------
+
+	def setFloat(self, vals=()):
+
+		'''
+		Turns an integer column into a float column: fpreal32 when float32 holds its values
+		(and the integral ones of vals) exactly, fpreal64 otherwise
+		'''
+
+		lo, hi = self.getRange() if self.count else (0, 0)
+
+		if np is not None and isinstance(vals, np.ndarray) and len(vals):
+
+			lo, hi = min(lo, np.nanmin(vals)), max(hi, np.nanmax(vals))
+
+		exact = self.storage != "int64" and -FLOAT32_INT_MAX <= lo and hi <= FLOAT32_INT_MAX
+
+		self.setTypecode("fpreal32" if exact else "fpreal64")
+
+	# ----------------------------------------
+
+	def setTypecode(self, storage):
+
+		# Convert the values to the typed array of another storage, float32 values widen
+		# to the decimals they are written as
+		typecode = STORAGE_TYPECODES[storage]
+		data = self.getData()
+
+		if self.typecode == "f" and typecode == "d":
+
+			self.data = array.array(typecode, getFloat32Values(data))
+
+		elif typecode != self.typecode:
+
+			if np is not None and isinstance(data, np.ndarray):
+
+				self.data = data.astype(np.dtype(typecode))
+
+			else:
+
+				self.data = array.array(typecode, data)
+
+		self.storage = storage
+		self.typecode = typecode
+
+	# ----------------------------------------
+
+	def fitValues(self, vals):
+
+		'''
+		Widens the storage to hold values about to be stored: integer columns move to the
+		narrowest integer storage holding them and fpreal32 columns to fpreal64 for floats
+		beyond the range of float32. Raises a ValueError for integers beyond 64 bits.
+		'''
+
+		if np is not None and isinstance(vals, np.ndarray):
+
+			vals = vals[~np.isnan(vals)] if vals.dtype.kind == "f" else vals
+
+			if len(vals) == 0:
+
+				return
+
+			lo, hi = vals.min().item(), vals.max().item()
+
+		else:
+
+			vals = [val for val in vals if val == val]
+
+			if not vals:
+
+				return
+
+			lo, hi = min(vals), max(vals)
+
+		if self.typecode == "f":
+
+			if -INF < lo < -FLOAT32_MAX or FLOAT32_MAX < hi < INF:
+
+				self.setTypecode("fpreal64")
+
+		elif self.typecode != "d":
+
+			names = [name for name, smin, smax in INT_STORAGES]
+
+			for name, smin, smax in INT_STORAGES[names.index(self.storage):]:
+
+				if smin <= lo and hi <= smax:
+
+					self.setTypecode(name)
+
+					return
+
+			raise ValueError("Values between {} and {} do not fit in 64 bit storage".format(lo, hi))
+
+	# ----------------------------------------
+
+	def getData(self):
+
+		'''
+		Returns the flat typed array holding exactly the written values, trimming any unused
+		preallocated space in place
+		'''
+
+		n = self.count * self.vsize
+
+		if len(self.data) > n:
+
+			del self.data[n:]
+
+		return self.data
+
+	# ----------------------------------------
+
+	def quantize(self, values):
+
+		'''
+		Returns a slice of the values rounded to the precision of the column. Integer columns
+		and columns without a precision are returned as is.
+		'''
+
+		if self.precision is None or self.typecode not in "fd":
+
+			return values
+
+		if np is not None:
+
+			return np.round(np.asarray(values, dtype=np.float64), self.precision)
+
+		return array.array("d", [round(v, self.precision) for v in values])
+
+	# ----------------------------------------
+
+	def getRange(self):
+
+		'''
+		Returns the (lowest, highest) value of the column, NaN values are skipped. NumPy is
+		only used for large columns as it is slower than the builtins on a few values.
+		'''
+
+		data = self.getData()
+
+		if np is not None and (len(data) > 1024 or not isinstance(data, array.array)):
+
+			values = np.asarray(data)
+
+			if self.typecode in "fd":
+
+				values = values[~np.isnan(values)]
+
+				if len(values) == 0:
+
+					return 0.0, 0.0
+
+				return float(values.min()), float(values.max())
+
+			return int(values.min()), int(values.max())
+
+		if self.typecode in "fd":
+
+			data = [val for val in data if val == val] or [0.0]
+
+		return min(data), max(data)
+
+	# ----------------------------------------
+
+	def getLosslessStorage(self):
+
+		'''
+		Returns the narrowest storage holding every value of the column without loss: the
+		smallest integer storage covering the range of integer values, and fpreal32 for
+		float values that survive the round trip through float32 (to within half of the
+		last decimal when the column has a precision), fpreal64 otherwise
+		'''
+
+		data = self.getData()
+
+		if self.typecode == "f":
+
+			return "fpreal32"
+
+		elif self.typecode != "d":
+
+			if len(data) == 0:
+
+				return INT_STORAGES[0][0]
+
+			lo, hi = self.getRange()
+
+			for storage, smin, smax in INT_STORAGES:
+
+				if smin <= lo and hi <= smax:
+
+					return storage
+
+			return INT_STORAGES[-1][0]
+
+		tolerance = 0.0 if self.precision is None else 0.5 * 10.0 ** -self.precision
+
+		if np is not None:
+
+			values = np.asarray(data, dtype=np.float64)
+
+			if self.precision is not None:
+				values = np.round(values, self.precision)
+
+			with np.errstate(over="ignore", invalid="ignore"):
+
+				rounded = values.astype(np.float32).astype(np.float64)
+				lossless = (rounded == values) | np.isnan(values) | (np.abs(rounded - values) <= tolerance)
+
+			return "fpreal32" if lossless.all() else "fpreal64"
+
+		for val in data:
+
+			if self.precision is not None:
+				val = round(val, self.precision)
+
+			try:
+				rounded = FLOAT32.unpack(FLOAT32.pack(val))[0]
+			except OverflowError:
+				return "fpreal64"
+
+			if rounded != val and val == val and abs(rounded - val) > tolerance:
+
+				return "fpreal64"
+
+		return "fpreal32"
+
+	# ----------------------------------------
+
+	def setStorage(self, storage):
+
+		'''
+		Sets the storage the values are held and encoded in. Raises a ValueError when integer
+		values do not fit in the range of an integer storage or float values would be truncated.
+		'''
+
+		if STORAGE_TYPECODES[storage] not in "fd":
+
+			if self.typecode in "fd":
+
+				raise ValueError("Float values cannot be stored as {}".format(storage))
+
+			smin, smax = [(smin, smax) for name, smin, smax in INT_STORAGES if name == storage][0]
+
+			if len(self.getData()) > 0:
+
+				lo, hi = self.getRange()
+
+				if lo < smin or hi > smax:
+
+					raise ValueError("Values between {} and {} do not fit in {} storage".format(lo, hi, storage))
+
+		self.setTypecode(storage)
+
+	# ----------------------------------------
+
+	def tolist(self):
+
+		values = self.getData().tolist() if self.typecode != "f" else getFloat32Values(self.getData())
+
+		if self.vsize == 1:
+
+			return values
+
+		return [values[i:i + self.vsize] for i in range(0, len(values), self.vsize)]
+
+	# ----------------------------------------
+
+	def getFlatValues(self, start=0, stop=None):
+
+		'''
+		Returns the values between start and stop as they are encoded (rounded to the
+		precision of the column) in a flat list
+		'''
+
+		if stop is None or stop > self.count:
+
+			stop = self.count
+
+		values = self.quantize(self.getData()[start * self.vsize:stop * self.vsize])
+
+		if self.typecode == "f":
+
+			return getFloat32Values(values)
+
+		return values.tolist()
+
+	# ----------------------------------------
+
+	def getEncodedValues(self, start=0, stop=None):
+
+		'''
+		Returns the values between start and stop as they are encoded in a list, of lists of
+		vsize values for vector columns
+		'''
+
+		values = self.getFlatValues(start, stop)
+
+		if self.vsize == 1:
+
+			return values
+
+		return [values[i:i + self.vsize] for i in range(0, len(values), self.vsize)]
+
+	# ----------------------------------------
+
+	def toJSON(self, start=0, stop=None):
+
+		'''
+		Returns the json text for the values between start and stop, without the enclosing
+		brackets so that a large column can be written in chunks. Vector values are grouped
+		from the text of the flat values, which avoids building a list per vector.
+		'''
+
+		text = json.dumps(self.getFlatValues(start, stop), separators=(',',':'))[1:-1]
+
+		if self.vsize == 1 or not text:
+
+			return text
+
+		parts = text.split(",")
+
+		return "[" + "],[".join(map(",".join, zip(*[iter(parts)] * self.vsize))) + "]"
+
+# --------------------------------------------------------------------------
+
 '''
 This class creates attributes for all houdini geometry levels (scope) and for 
 numeric and string data types. At this stage list (array) attribute types are 
-not supported by the writer	
+not supported by the writer. Float attributes can be rounded to a number of decimals
+(precision) when they are encoded.
+
+Numeric attributes are held as int32 or fpreal32, widened when the values do not fit
+(e.g. int64 ids), unless a storage is requested: "auto" collects the values at full width
+and narrows them to their narrowest lossless storage (see HouColumn.getLosslessStorage)
+and a storage name (e.g. "int8" or "fpreal64") holds and encodes the values with it.
+Values that are not numbers raise a ValueError naming the attribute.
+
+getDocument() returns the attribute with its values as a HouColumn for the encoders,
+getJSON() the same structure with plain lists that json.dumps can encode.
 '''
 
 class HouAttribute(object):
 
-	def __init__(self, name, scope, atype, vals, special="not"):
+	def __init__(self, name, scope, atype, vals, special="not", size=None, precision=None, storage=None):
 
 		# Attribute variables
 		self.name = name
 		self.scope = scope
 		self.atype = atype
 		self.values = vals
+		self.precision = precision
+		self.requested = None
 
 		self.defaults = None
 		self.options = collections.OrderedDict()
 
-		# Ensure values are provided as a nested list
-		if not isinstance(self.values, list):
+		# Ensure values are provided as a nested list (NumPy arrays are kept as is)
+		if not isinstance(self.values, list) and not hasattr(self.values, "tolist"):
 
 			self.values = [self.values]
 
+		# Allow for a preallocated values buffer when the number of values is known
+		self.size = size
+
 		# Set attribute details
 		if self.atype == "int":
 
@@ -95,8 +792,41 @@ class HouAttribute(object):
 			self.vsize = 1
 			self.storage = "int32"
 
+		# Check the requested storage, it is applied once all the values are collected
+		if self.vtype == "numeric" and storage is not None:
+
+			if storage != "auto" and storage not in STORAGE_TYPECODES:
+
+				raise ValueError("Unknown storage '{}' for attribute {}".format(storage, self.name))
+
+			if self.storage == "fpreal32" and storage.startswith("int"):
+
+				raise ValueError("Float attribute {} cannot be stored as {}".format(self.name, storage))
+
+			self.requested = storage
+
+		# Numeric values are held in a columnar typed buffer
+		if self.vtype == "numeric":
+
+			vals = self.values
+			self.values = HouColumn(self.getColumnStorage(), self.vsize, size, precision)
+			self.extendValues(vals)
+
+		# String values are dictionary encoded as they arrive: a table of the unique strings
+		# (in order of first appearance) and a column of indices into that table
+		elif self.vtype == "string":
+
+			vals = self.values
+			self.strings = []
+			self.lookup = {}
+			self.values = HouColumn("int32", 1, size)
+
+			for val in vals:
+
+				self.appendValue(val)
+
 		# Set the attibute options and keywords
-		if self.atype in ["vec2int", "vec2float", "vec3int", "vec3float","vec3int", "vec3float"]:
+		if self.atype in ["vec2int", "vec2float", "vec3int", "vec3float", "vec4int", "vec4float"]:
 
 			if special == "ppos":
 
@@ -132,28 +862,156 @@ class HouAttribute(object):
 
 	def getValues(self):
 
+		if self.vtype == "numeric":
+
+			return self.values.tolist()
+
+		elif self.vtype == "string":
+
+			return [self.strings[i] for i in self.values.tolist()]
+
 		return self.values
 
 	# ----------------------------------------
 
+	def getStrings(self):
+
+		return self.strings
+
+	# ----------------------------------------
+
+	def setPrecision(self, precision):
+
+		# Number of decimals the float values are rounded to when encoded (None for all)
+		self.precision = precision
+
+		if self.vtype == "numeric":
+
+			self.values.precision = precision
+
+	# ----------------------------------------
+
+	def getColumnStorage(self):
+
+		# The storage the values are collected in: the requested one, full width when the
+		# narrowest one is picked afterwards, the default one otherwise
+		if self.requested == "auto":
+
+			return "fpreal64" if self.storage == "fpreal32" else "int64"
+
+		return self.requested or self.storage
+
+	# ----------------------------------------
+
+	def resolveStorage(self):
+
+		# Set the storage the values are encoded with to the requested (or narrowest) one,
+		# without a request the values are kept in the storage they were widened to
+		if self.vtype != "numeric":
+
+			return
+
+		if self.requested == "auto":
+
+			self.values.setStorage(self.values.getLosslessStorage())
+
+		elif self.requested is not None:
+
+			try:
+				self.values.setStorage(self.requested)
+			except ValueError as e:
+				raise ValueError("Attribute {}: {}".format(self.name, e))
+
+		self.requested = None
+		self.storage = self.values.storage
+
+	# ----------------------------------------
+
+	def getDefault(self):
+
+		if self.vtype == "string":
+
+			return ""
+
+		if self.vsize == 1:
+
+			return self.defaults[0]
+
+		return self.defaults
+
+	# ----------------------------------------
+
 	def setFirstValue(self, val):
 
-		self.values = [val]
+		if self.vtype == "numeric":
+
+			self.values.reset()
+			self.appendValue(val)
+
+		elif self.vtype == "string":
+
+			self.strings = []
+			self.lookup = {}
+			self.values.reset()
+			self.appendValue(val)
+
+		else:
+
+			self.values = [val]
 
 	# ----------------------------------------
 
 	def appendValue(self, val):
 
-		self.values.append(val)
+		if self.vtype == "string":
+
+			# Look up (or add) the string in the table and store its index
+			index = self.lookup.get(val)
+
+			if index is None:
 
+				index = len(self.strings)
+				self.lookup[val] = index
+				self.strings.append(val)
+
+			val = index
+
+		try:
+			self.values.append(val)
+		except ValueError as e:
+			raise ValueError("Attribute {}: {}".format(self.name, e))
+
+	# ----------------------------------------
+
+	def extendValues(self, vals):
+
+		try:
+			self.values.extend(vals)
+		except ValueError as e:
+			raise ValueError("Attribute {}: {}".format(self.name, e))
 
 	# ----------------------------------------
 
 	def overwriteValues(self, vals):
 
-		if not isinstance(vals, list):
+		if not isinstance(vals, list) and not hasattr(vals, "tolist"):
+
+			vals = [vals]
+
+		if self.vtype == "numeric":
 
-			self.values = [vals]
+			self.values = HouColumn(self.getColumnStorage(), self.vsize, precision=self.precision)
+			self.extendValues(vals)
+
+		elif self.vtype == "string":
+
+			self.strings = []
+			self.lookup = {}
+			self.values = HouColumn("int32", 1)
+
+			for val in vals:
+
+				self.appendValue(val)
 
 		else:
 
@@ -161,9 +1019,12 @@ class HouAttribute(object):
 
 	# ----------------------------------------
 
-	def getJSON(self):
+	def getDocument(self):
 
-		# Create the JSON schema for the attributes data
+		# Create the JSON schema for the attributes data (numeric values are handed
+		# over as the HouColumn itself, the encoders read its typed array directly)
+
+		self.resolveStorage()
 
 		header = [
 			"scope", "public",
@@ -212,11 +1073,11 @@ class HouAttribute(object):
 		elif self.vtype == "string":
 
 			value += [
-				"strings", self.values,
+				"strings", self.strings,
 				"indices", [
 					"size", self.vsize,
 					"storage", "int32",
-					self.kword, [[i for i in range(len(self.values))]] # Indices
+					self.kword, [self.values] # Indices into the strings table
 				]
 			]
 
@@ -224,4 +1085,11 @@ class HouAttribute(object):
 
 			value == self.values
 
-		return [ header, value ]
\ No newline at end of file
+		return [ header, value ]
+
+	# ----------------------------------------
+
+	def getJSON(self):
+
+		# Same as getDocument with the values as plain lists that json.dumps can encode
+		return getPlainJSON(self.getDocument())
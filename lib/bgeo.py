@@ -0,0 +1,502 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import array, struct, sys
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+'''
+This module encodes the nested list structure produced by HouGeo.getDocument() into the
+Houdini binary JSON encoding used by .bgeo files. The document structure is identical
+to the ASCII .geo output, only the encoding differs: every value is written as a typed
+token and homogeneous numeric lists (P, topology indices, numeric attribute values) are
+written as packed uniform arrays.
+'''
+
+# --------------------------------------------------------------------------
+# Binary JSON Tokens
+# --------------------------------------------------------------------------
+
+JID_NULL = 0x00
+JID_MAP_BEGIN = 0x7b
+JID_MAP_END = 0x7d
+JID_ARRAY_BEGIN = 0x5b
+JID_ARRAY_END = 0x5d
+JID_BOOL = 0x10
+JID_INT8 = 0x11
+JID_INT16 = 0x12
+JID_INT32 = 0x13
+JID_INT64 = 0x14
+JID_REAL16 = 0x18
+JID_REAL32 = 0x19
+JID_REAL64 = 0x1a
+JID_UINT8 = 0x21
+JID_UINT16 = 0x22
+JID_STRING = 0x27
+JID_FALSE = 0x30
+JID_TRUE = 0x31
+JID_UNIFORM_ARRAY = 0x40
+JID_MAGIC = 0x7f
+
+BINARY_MAGIC = 0x624a534e
+
+'''
+Maps the Houdini attribute storage names onto the binary token written in front of
+each value and the array typecode used to pack uniform arrays of that storage
+'''
+
+STORAGE_TYPES = {
+	"int8": (JID_INT8, "b"),
+	"int16": (JID_INT16, "h"),
+	"int32": (JID_INT32, "i"),
+	"int64": (JID_INT64, "q"),
+	"fpreal32": (JID_REAL32, "f"),
+	"fpreal64": (JID_REAL64, "d"),
+}
+
+# Data is always written little endian (the magic number tells Houdini the byte order)
+SWAP_BYTES = sys.byteorder != "little"
+
+# Types of the values that count as a single item when sizing the document
+SCALAR_TYPES = frozenset([int, float, str, bool, type(None)])
+
+# --------------------------------------------------------------------------
+# Encoding Functions
+# --------------------------------------------------------------------------
+
+def encodeLength(n):
+
+	if n < 0xf1:
+
+		return struct.pack("<B", n)
+
+	elif n <= 0xffff:
+
+		return struct.pack("<BH", 0xf2, n)
+
+	elif n <= 0xffffffff:
+
+		return struct.pack("<BI", 0xf4, n)
+
+	return struct.pack("<Bq", 0xf8, n)
+
+# --------------------------------------------------------------------------
+
+def encodeString(s):
+
+	data = s.encode("utf-8")
+
+	return struct.pack("<B", JID_STRING) + encodeLength(len(data)) + data
+
+# --------------------------------------------------------------------------
+
+def encodeInt(i):
+
+	if -0x80 <= i < 0x80:
+
+		return struct.pack("<Bb", JID_INT8, i)
+
+	elif -0x8000 <= i < 0x8000:
+
+		return struct.pack("<Bh", JID_INT16, i)
+
+	elif -0x80000000 <= i < 0x80000000:
+
+		return struct.pack("<Bi", JID_INT32, i)
+
+	return struct.pack("<Bq", JID_INT64, i)
+
+# --------------------------------------------------------------------------
+
+def encodeUniformArray(values, storage):
+
+	'''
+	Packs a flat list of numbers as a single uniform array: one token for the
+	element type, the length, then the raw little endian values
+	'''
+
+	jid, typecode = STORAGE_TYPES[storage]
+
+	packed = array.array(typecode, values)
+
+	if SWAP_BYTES:
+		packed.byteswap()
+
+	return struct.pack("<BB", JID_UNIFORM_ARRAY, jid) + encodeLength(len(packed)) + packed.tobytes()
+
+# --------------------------------------------------------------------------
+
+def getUniformStorage(values, storage):
+
+	'''
+	Returns the storage to pack a list with when it can be written as a uniform array
+	(a non empty list of only numbers) or None. Lists that sit within a HouAttribute
+	values block use the storage declared by that block, integer lists without a
+	declared storage (topology indices, primitive runs) are written as int32 and
+	float lists as fpreal64.
+	'''
+
+	if len(values) == 0:
+
+		return None
+
+	if all(type(v) is int for v in values):
+
+		if storage in STORAGE_TYPES:
+
+			return storage
+
+		if -0x80000000 <= min(values) and max(values) < 0x80000000:
+
+			return "int32"
+
+		return "int64"
+
+	if all(type(v) in (int, float) for v in values):
+
+		if storage in ["fpreal32", "fpreal64"]:
+
+			return storage
+
+		return "fpreal64"
+
+	return None
+
+# --------------------------------------------------------------------------
+
+def getDeclaredStorage(values, storage):
+
+	'''
+	Houdini data blocks are key/value lists such as ["size", 3, "storage", "fpreal32",
+	"tuples", [...]]. When a list declares a storage it applies to all nested data.
+	'''
+
+	if len(values) > 0 and isinstance(values[0], str):
+
+		for i in range(0, len(values) - 1, 2):
+
+			if values[i] == "storage" and isinstance(values[i + 1], str):
+
+				return values[i + 1]
+
+	return storage
+
+# --------------------------------------------------------------------------
+
+def encode(obj, out, storage=None):
+
+	if obj is None:
+
+		out.append(struct.pack("<B", JID_NULL))
+
+	elif obj is True:
+
+		out.append(struct.pack("<B", JID_TRUE))
+
+	elif obj is False:
+
+		out.append(struct.pack("<B", JID_FALSE))
+
+	elif isinstance(obj, int):
+
+		out.append(encodeInt(obj))
+
+	elif isinstance(obj, float):
+
+		if storage == "fpreal32":
+
+			out.append(struct.pack("<Bf", JID_REAL32, obj))
+
+		else:
+
+			out.append(struct.pack("<Bd", JID_REAL64, obj))
+
+	elif isinstance(obj, str):
+
+		out.append(encodeString(obj))
+
+	elif isinstance(obj, dict):
+
+		out.append(struct.pack("<B", JID_MAP_BEGIN))
+
+		for key, value in obj.items():
+
+			out.append(encodeString(key))
+			encode(value, out, storage)
+
+		out.append(struct.pack("<B", JID_MAP_END))
+
+	elif isinstance(obj, (list, tuple)):
+
+		uniform = getUniformStorage(obj, storage)
+
+		if uniform:
+
+			out.append(encodeUniformArray(obj, uniform))
+
+		else:
+
+			storage = getDeclaredStorage(obj, storage)
+
+			out.append(struct.pack("<B", JID_ARRAY_BEGIN))
+
+			for i, value in enumerate(obj):
+
+				encode(getKeyword(obj, i), out, storage)
+
+			out.append(struct.pack("<B", JID_ARRAY_END))
+
+	elif isColumn(obj):
+
+		out.append(b"".join(iterEncodeColumn(obj, max(len(obj.getData()), 1))))
+
+	elif hasattr(obj, "tolist"):
+
+		encode(obj.tolist(), out, storage)
+
+	else:
+
+		raise TypeError("Object of type {} cannot be encoded as binary JSON".format(type(obj).__name__))
+
+# --------------------------------------------------------------------------
+
+'''
+Columns are the typed value buffers of numeric attributes (attrib.HouColumn). They are
+recognised by their interface so that this module does not depend on attrib.py.
+'''
+
+def isColumn(obj):
+
+	return hasattr(obj, "getData") and hasattr(obj, "storage")
+
+# --------------------------------------------------------------------------
+
+'''
+Vector columns are written component-wise, which is the Houdini "arrays" data layout, so
+the "tuples" keyword in front of them is relabelled. Returns the item at index i of a
+list as it is written.
+'''
+
+def getKeyword(obj, i):
+
+	value = obj[i]
+
+	if type(value) is str and value == "tuples" and i + 1 < len(obj) and isColumn(obj[i + 1]) and obj[i + 1].vsize > 1:
+
+		return "arrays"
+
+	return value
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the number of values held by a list anywhere in its structure, counting no
+further than limit + 1, so that the encoders can write small parts of the document in
+one piece and stream the large ones. The sizes of the nested lists are memoized in the
+sizes dict (by id, the document must be kept alive while it is used) so that every part
+of the document is only sized once.
+'''
+
+def getSize(obj, limit, sizes):
+
+	if not isinstance(obj, (list, tuple)):
+
+		if isColumn(obj):
+
+			return len(obj.getData())
+
+		return obj.size if hasattr(obj, "tolist") and hasattr(obj, "size") else 1
+
+	key = id(obj)
+	size = sizes.get(key)
+
+	if size is not None:
+
+		return size
+
+	if len(obj) > limit:
+
+		size = limit + 1
+
+	elif SCALAR_TYPES.issuperset(map(type, obj)):
+
+		size = len(obj)
+
+	else:
+
+		size = 0
+
+		for value in obj:
+
+			size += 1 if type(value) in SCALAR_TYPES else getSize(value, limit, sizes)
+
+			if size > limit:
+
+				break
+
+	sizes[key] = size
+
+	return size
+
+# --------------------------------------------------------------------------
+
+def iterPackedValues(values, typecode, chunk_size, quantize=None):
+
+	'''
+	Yields the raw little endian bytes of a flat typed array (or list) chunk_size values
+	at a time. Arrays that already have the right type are written without a copy, other
+	typed arrays are converted with NumPy when it is available. The optional quantize
+	function is applied to every chunk before it is packed.
+	'''
+
+	for i in range(0, len(values), chunk_size):
+
+		chunk = values[i:i + chunk_size]
+
+		if quantize is not None:
+			chunk = quantize(chunk)
+
+		if np is not None and isinstance(chunk, array.array) and chunk.typecode != typecode:
+			chunk = np.frombuffer(chunk, dtype=np.dtype(chunk.typecode))
+
+		if np is not None and isinstance(chunk, np.ndarray):
+
+			packed = chunk.astype(np.dtype(typecode).newbyteorder("<"), copy=False)
+
+		elif isinstance(chunk, array.array) and chunk.typecode == typecode and not SWAP_BYTES:
+
+			packed = chunk
+
+		else:
+
+			packed = array.array(typecode, chunk)
+
+			if SWAP_BYTES:
+				packed.byteswap()
+
+		yield memoryview(packed).cast("B") if isinstance(packed, array.array) else packed.tobytes()
+
+# --------------------------------------------------------------------------
+
+'''
+Writes a column as packed uniform arrays. A single component column is one uniform array.
+Vector columns are written as one uniform array per component, which is the Houdini
+"arrays" data layout (the caller writes the "arrays" keyword in place of "tuples").
+'''
+
+def iterEncodeColumn(column, chunk_size):
+
+	jid, typecode = STORAGE_TYPES[column.storage]
+	data = column.getData()
+
+	if column.vsize == 1:
+
+		yield struct.pack("<BB", JID_UNIFORM_ARRAY, jid) + encodeLength(len(data))
+		yield from iterPackedValues(data, typecode, chunk_size, column.quantize)
+
+		return
+
+	yield struct.pack("<B", JID_ARRAY_BEGIN)
+
+	for c in range(column.vsize):
+
+		component = data[c::column.vsize]
+
+		yield struct.pack("<BB", JID_UNIFORM_ARRAY, jid) + encodeLength(len(component))
+		yield from iterPackedValues(component, typecode, chunk_size, column.quantize)
+
+	yield struct.pack("<B", JID_ARRAY_END)
+
+# --------------------------------------------------------------------------
+
+'''
+Generator that encodes the structure as a sequence of byte chunks. Large uniform arrays
+are packed chunk_size values at a time and large lists of small values (such as the
+primitive runs) are flushed every chunk_size items, so the whole document is never held
+in memory at once. Parts holding no more than chunk_size values are encoded in one piece.
+'''
+
+def iterEncode(obj, chunk_size, storage=None, sizes=None):
+
+	if sizes is None:
+		sizes = {}
+
+	if isColumn(obj):
+
+		yield from iterEncodeColumn(obj, chunk_size)
+
+		return
+
+	if not isinstance(obj, (list, tuple)) or getSize(obj, chunk_size, sizes) <= chunk_size:
+
+		out = []
+		encode(obj, out, storage)
+
+		yield b"".join(out)
+
+		return
+
+	uniform = getUniformStorage(obj, storage)
+
+	if uniform:
+
+		jid, typecode = STORAGE_TYPES[uniform]
+
+		yield struct.pack("<BB", JID_UNIFORM_ARRAY, jid) + encodeLength(len(obj))
+		yield from iterPackedValues(obj, typecode, chunk_size)
+
+		return
+
+	storage = getDeclaredStorage(obj, storage)
+
+	out = [struct.pack("<B", JID_ARRAY_BEGIN)]
+
+	for i in range(len(obj)):
+
+		value = getKeyword(obj, i)
+
+		if type(value) not in SCALAR_TYPES and getSize(value, chunk_size, sizes) > chunk_size:
+
+			yield b"".join(out)
+			out = []
+
+			yield from iterEncode(value, chunk_size, storage, sizes)
+
+		else:
+
+			encode(value, out, storage)
+
+			if len(out) >= chunk_size:
+
+				yield b"".join(out)
+				out = []
+
+	out.append(struct.pack("<B", JID_ARRAY_END))
+
+	yield b"".join(out)
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the HouGeo.getDocument() structure encoded as .bgeo bytes
+'''
+
+def dumps(obj, chunk_size=65536):
+
+	return b"".join(iterDumps(obj, chunk_size))
+
+# --------------------------------------------------------------------------
+
+'''
+Streaming equivalent of dumps, yields the .bgeo document as byte chunks
+'''
+
+def iterDumps(obj, chunk_size):
+
+	yield struct.pack("<BI", JID_MAGIC, BINARY_MAGIC)
+
+	yield from iterEncode(obj, chunk_size)
@@ -0,0 +1,207 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import array, collections, hashlib, os, tempfile
+
+'''
+This module is an on-disk, content-addressed cache of encoded .geo/.bgeo documents. A
+document is stored under the hash of everything it is produced from (the vertex and index
+buffers, the coordinate system and the attribute values) so an unchanged feature can reuse
+the previous output without being converted again. The total size of the cache is capped
+and the least recently used documents (by file modification time, refreshed on every hit)
+are evicted first. The documents are indexed in memory, in order of use, when the cache is
+opened so that storing a document does not scan the cache folder.
+'''
+
+# Bump when the conversion output changes so stale documents are no longer matched
+CACHE_VERSION = "1"
+
+# Default size cap of the cache in bytes
+CACHE_SIZE = 1024 * 1024 * 1024
+
+# Fraction of the size cap the cache is reduced to once it is exceeded, so that the
+# documents are evicted in batches rather than on every store
+EVICT_RATIO = 0.9
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns the hex digest identifying the document produced from a surface geometry source
+(see source.py) in a given output format, precision, storage and weld tolerance. Coordinates
+are hashed as float64 and indices as int64 so the key does not depend on how the values
+were held.
+'''
+
+def getSourceKey(src, fmt="geo", precision=None, storage=None, weld=None):
+
+	h = hashlib.sha256()
+
+	h.update("{}|{}|{}|".format(CACHE_VERSION, fmt, src.getCoordSys()).encode("utf-8"))
+
+	if precision:
+		h.update(repr(sorted(precision.items())).encode("utf-8"))
+
+	if storage:
+		h.update(repr(sorted(storage.items())).encode("utf-8"))
+
+	if weld is not None:
+		h.update("weld|{!r}|".format(float(weld)).encode("utf-8"))
+
+	points = array.array("d")
+
+	for point in src.getCoords():
+		points.extend(point)
+
+	nverts, indices = src.getFaces()
+
+	h.update(points.tobytes())
+	h.update(array.array("q", indices).tobytes())
+	h.update(array.array("q", nverts).tobytes())
+
+	for aname, atype, val in src.getHouAttribs():
+
+		h.update(repr((aname, atype, val)).encode("utf-8"))
+
+	return h.hexdigest()
+
+# --------------------------------------------------------------------------
+# Classes
+# --------------------------------------------------------------------------
+
+class HouGeoCache(object):
+
+	def __init__(self, cache_dir, max_size=CACHE_SIZE):
+
+		self.cache_dir = cache_dir
+		self.max_size = max_size
+
+		if not os.path.isdir(self.cache_dir):
+
+			os.makedirs(self.cache_dir)
+
+		# Index of the stored documents (path onto size) from the least to the most recently
+		# used, with the running total of their size
+		self.entries = collections.OrderedDict([(path, size) for path, mtime, size in sorted(self.getEntries(), key=lambda e: e[1])])
+		self.size = sum(self.entries.values())
+
+	# ----------------------------------------
+
+	def getPath(self, key, fmt):
+
+		# Spread the documents over sub folders named after the first two hex digits
+		return os.path.join(self.cache_dir, key[:2], "{}.{}".format(key, fmt))
+
+	# ----------------------------------------
+
+	def getEntries(self):
+
+		'''
+		Returns (path, modification time, size) for every stored document
+		'''
+
+		entries = []
+
+		for folder in os.scandir(self.cache_dir):
+
+			if not folder.is_dir():
+
+				continue
+
+			for entry in os.scandir(folder.path):
+
+				if entry.is_file() and not entry.name.startswith("."):
+
+					stat = entry.stat()
+					entries.append((entry.path, stat.st_mtime, stat.st_size))
+
+		return entries
+
+	# ----------------------------------------
+
+	def get(self, key, fmt="geo"):
+
+		'''
+		Returns the stored document (a json string for "geo", bytes for "bgeo") or None
+		'''
+
+		path = self.getPath(key, fmt)
+
+		try:
+
+			with open(path, "rb") as f:
+
+				data = f.read()
+
+		except OSError:
+
+			return None
+
+		# Mark the document as recently used
+		os.utime(path, None)
+
+		self.size -= self.entries.pop(path, 0)
+		self.entries[path] = len(data)
+		self.size += len(data)
+
+		if fmt == "bgeo":
+
+			return data
+
+		return data.decode("utf-8")
+
+	# ----------------------------------------
+
+	def put(self, key, data, fmt="geo"):
+
+		path = self.getPath(key, fmt)
+
+		if isinstance(data, str):
+
+			data = data.encode("utf-8")
+
+		if not os.path.isdir(os.path.dirname(path)):
+
+			os.makedirs(os.path.dirname(path))
+
+		# Write to a temporary file first so readers never see a partial document
+		fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(path))
+
+		with os.fdopen(fd, "wb") as f:
+
+			f.write(data)
+
+		os.replace(tmp_path, path)
+
+		self.size -= self.entries.pop(path, 0)
+		self.entries[path] = len(data)
+		self.size += len(data)
+
+		if self.size > self.max_size:
+
+			self.evict()
+
+	# ----------------------------------------
+
+	def evict(self):
+
+		'''
+		Removes the least recently used documents until the cache is reduced to EVICT_RATIO
+		of its size cap
+		'''
+
+		while self.entries and self.size > self.max_size * EVICT_RATIO:
+
+			path, size = self.entries.popitem(last=False)
+
+			try:
+
+				os.remove(path)
+
+			except OSError:
+
+				pass
+
+			self.size -= size
@@ -0,0 +1,1194 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import array, collections, itertools, math, os, sys
+
+'''
+This module holds the conversion of geometry sources (see source.py) into HouGeo objects.
+It does not import the fme and fmeobjects modules, so the converter can be run, profiled
+and parallelised without FME. It is imported by name from the library folder (utils.py puts
+the folder on sys.path) so that its functions and the source.PlainSource buffers can be
+pickled for the worker processes of a process pool.
+'''
+
+'''
+NumPy is optional. When it is available the coordinate pipeline (offset and Y/Z swizzle)
+is applied as single array operations, otherwise the pure python path is used.
+'''
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+'''
+The following routine will import the required libraries from the python files in the
+fmehougeo library folder. The standard 'import from xx' function does not seem to work
+in the FME python context therefore the importlib library is used.
+'''
+
+import importlib.util
+
+# Get the directory path of this python file
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+# Import the fmehougeo attrib.py modules
+attrib_spec = importlib.util.spec_from_file_location("attrib", os.path.join(script_dir, "attrib.py"))
+attrib = importlib.util.module_from_spec(attrib_spec)
+attrib_spec.loader.exec_module(attrib)
+
+# Import the fmehougeo geo.py modules
+geo_spec = importlib.util.spec_from_file_location("geo", os.path.join(script_dir, "geo.py"))
+geo = importlib.util.module_from_spec(geo_spec)
+geo_spec.loader.exec_module(geo)
+
+# The source.py module is imported by name as well, its PlainSource objects are pickled
+if script_dir not in sys.path:
+	sys.path.append(script_dir)
+
+source = importlib.import_module("source")
+
+# Ways of converting the holes of areas (see convertPolygons)
+HOLE_MODES = ["separate", "bridge", "ignore"]
+
+# The axes along which the cells searched for the points near a coordinate are offset, in
+# search order (see weldCoords): its own cell, the neighbours across its x, y and z faces,
+# its edges and its corner, on the sides it is nearest to
+WELD_OFFSETS = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (1, 0, 1), (0, 1, 1), (1, 1, 1)]
+
+# A cell and the directions of half of its neighbours, the other half see it the other way
+WELD_DIRECTIONS = [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1) if (x, y, z) >= (0, 0, 0)]
+
+# Average number of coordinates of the searched cells above which the coordinates are
+# welded one by one rather than all at once (see getWeldTargets)
+WELD_PAIRS = 64
+
+# --------------------------------------------------------------------------
+# Vector Functions
+# --------------------------------------------------------------------------
+
+'''
+Offsets a sequence of raw (x, y, z) coordinates (or a flat array of doubles, see
+extendCoords) and swizzles them into the Houdini (x, z, -y) axis convention. With NumPy
+available the coordinates are collected into an (N,3) float array and returned as such,
+otherwise a list of tuples is returned. The offset may be supplied as an FMEPoint or as an
+(x, y, z) tuple.
+'''
+
+def offsetSwizzleYZ(coords, offset):
+
+	if hasattr(offset, "getXYZ"):
+		offset = offset.getXYZ()
+
+	if np is None and isinstance(coords, array.array):
+		coords = zip(coords[0::3], coords[1::3], coords[2::3])
+
+	ox, oy, oz = offset[0], offset[1], offset[2]
+
+	if np is not None:
+
+		points = np.array(coords, dtype=np.float64).reshape(-1, 3)
+		points += (ox, oy, oz)
+
+		# Swap the Y and Z axes and negate the new Z axis in place
+		points[:, [1, 2]] = points[:, [2, 1]]
+		points[:, 2] *= -1.0
+
+		return points
+
+	return [(x + ox, z + oz, -(y + oy)) for x, y, z in coords]
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the raw coordinates of a geometry source: the flat slice of its buffer for the
+sources of a source.SourceBuffer (a view of the memory mapped file once it is spilled) and
+getCoords() for any other source
+'''
+
+def getFlatCoords(src):
+
+	if hasattr(src, "getFlatCoords"):
+
+		return src.getFlatCoords()
+
+	return src.getCoords()
+
+# --------------------------------------------------------------------------
+
+'''
+Appends raw coordinates to a flat array of doubles (x, y, z, x, ...) and returns their
+number. They are given as a sequence of (x, y, z) coordinates, an (N,3) NumPy array or a
+flat buffer of doubles (see getFlatCoords), which is copied in one go.
+'''
+
+def extendCoords(coords, part):
+
+	start = len(coords)
+
+	if isinstance(part, (array.array, memoryview)):
+
+		coords.frombytes(memoryview(part).cast("B"))
+
+	elif np is not None and isinstance(part, np.ndarray):
+
+		coords.frombytes(np.ascontiguousarray(part, dtype=np.float64).tobytes())
+
+	else:
+
+		coords.extend(itertools.chain.from_iterable(part))
+
+	return (len(coords) - start) // 3
+
+# --------------------------------------------------------------------------
+
+'''
+Returns a flat array of doubles as (x, y, z) rows: an (N,3) NumPy view of it or a list of
+tuples without NumPy
+'''
+
+def getCoordRows(coords):
+
+	if np is not None:
+
+		return np.frombuffer(coords, dtype=np.float64).reshape(-1, 3)
+
+	return list(zip(coords[0::3], coords[1::3], coords[2::3]))
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the offset bounds of ((xmin, ymin, zmin), (xmax, ymax, zmax)) as the swizzled
+minimum and maximum corners, the bounds format of HouGeo
+'''
+
+def getOffsetBounds(offset, bbx):
+
+	points = offsetSwizzleYZ([bbx[0], bbx[1]], offset)
+
+	return [float(v) for point in points for v in point]
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the ((xmin, ymin, zmin), (xmax, ymax, zmax)) extent of a list of geometry sources
+'''
+
+def getSourceExtent(srcs):
+
+	bbxmin = [float("inf")] * 3
+	bbxmax = [float("-inf")] * 3
+
+	for src in srcs:
+
+		cube = src.getBounds()
+
+		for i in range(3):
+
+			bbxmin[i] = min(bbxmin[i], cube[0][i])
+			bbxmax[i] = max(bbxmax[i], cube[1][i])
+
+	return tuple(bbxmin), tuple(bbxmax)
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the offset bounds of a list of geometry sources as the extent of all of their
+coordinates, see getOffsetBounds
+'''
+
+def getSourceBounds(offset, srcs):
+
+	return getOffsetBounds(offset, getSourceExtent(srcs))
+
+# --------------------------------------------------------------------------
+# Tiling Functions
+# --------------------------------------------------------------------------
+
+'''
+Splits geometry sources into square tiles of tile_size ground units. The tile grid starts
+at the (x, y) origin, normally the minimum corner of the bbx geometry (the extent of the
+whole dataset), and each source is placed in the single tile that contains the centre of
+its bounding box. Returns an ordered dictionary of (column, row) tile index onto the
+sources in that tile, as a source.SourceSelection holding only their indices into srcs.
+'''
+
+def getTileIndex(src, origin, tile_size):
+
+	bbx = src.getBounds()
+	centre = ((bbx[0][0] * 0.5) + (bbx[1][0] * 0.5), (bbx[0][1] * 0.5) + (bbx[1][1] * 0.5))
+
+	return (
+		int(math.floor((centre[0] - origin[0]) / tile_size)),
+		int(math.floor((centre[1] - origin[1]) / tile_size))
+		)
+
+def tileSources(srcs, origin, tile_size):
+
+	tiles = collections.OrderedDict()
+
+	for i, src in enumerate(srcs):
+
+		index = getTileIndex(src, origin, tile_size)
+
+		if index not in tiles:
+
+			tiles[index] = array.array("q")
+
+		tiles[index].append(i)
+
+	# Order the tiles by row then column
+	return collections.OrderedDict([(index, source.SourceSelection(srcs, indices)) for index, indices in sorted(tiles.items(), key=lambda t: (t[0][1], t[0][0]))])
+
+# --------------------------------------------------------------------------
+# Weld Functions
+# --------------------------------------------------------------------------
+
+'''
+Welds the exact duplicates of (x, y, z) coordinates, see weldCoords
+'''
+
+def weldDuplicates(coords):
+
+	if np is not None:
+
+		# Adding 0 turns -0.0 into 0.0, so equal coordinates also have equal bytes
+		points = np.asarray(coords, dtype=np.float64).reshape(-1, 3) + 0.0
+
+		if len(points) == 0:
+
+			return points, []
+
+		first, inverse = getDistinctRows(points)
+
+		return points[first], inverse.tolist()
+
+	lookup = {}
+	points = []
+	indices = []
+
+	for coord in coords:
+
+		key = (coord[0], coord[1], coord[2])
+		index = lookup.get(key)
+
+		if index is None:
+
+			index = len(points)
+			lookup[key] = index
+			points.append(coord)
+
+		indices.append(index)
+
+	return points, indices
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the first of every set of equal rows of an (n, k) NumPy array of 8 byte values (in
+order of appearance) and the number of the set of every row. The rows are compared by their
+bytes, sorted on a 64 bit hash of them which is much faster than sorting the rows. Sets of
+rows sharing a hash are told apart by sorting the rows themselves.
+'''
+
+def getDistinctRows(rows):
+
+	words = np.ascontiguousarray(rows).view(np.uint64)
+	hashes = words[:, 0].copy()
+
+	for column in range(1, words.shape[1]):
+
+		hashes *= np.uint64(0x9e3779b97f4a7c15)
+		hashes ^= words[:, column] ^ (words[:, column] >> np.uint64(29))
+
+	order = np.argsort(hashes, kind="stable")
+	words = words[order]
+	hashes = hashes[order]
+
+	# A row starts a set when it differs from the previous one, a hash is shared when it
+	# does so without starting a new hash
+	heads = np.ones(len(words), dtype=bool)
+	heads[1:] = (words[1:] != words[:-1]).any(axis=1)
+
+	if np.any(heads[1:] & (hashes[1:] == hashes[:-1])):
+
+		keys = np.ascontiguousarray(rows).view(np.dtype((np.void, 8 * words.shape[1]))).reshape(-1)
+		order = np.argsort(keys, kind="stable")
+		keys = keys[order]
+		heads[1:] = keys[1:] != keys[:-1]
+
+	inverse = np.empty(len(words), dtype=np.int64)
+	inverse[order] = np.cumsum(heads) - 1
+	first = order[heads]
+
+	# Number the distinct rows in order of first appearance
+	order = np.argsort(first, kind="stable")
+	rank = np.empty(len(order), dtype=np.int64)
+	rank[order] = np.arange(len(order))
+
+	return first[order], rank[inverse]
+
+# --------------------------------------------------------------------------
+
+'''
+Welds coincident (x, y, z) coordinates into shared points. Exact duplicates share the point
+of their first appearance, every other coordinate joins the first point found that lies
+within the tolerance of it along every axis or becomes a new point. The points are kept in
+a hash of grid cells twice the tolerance in size, so only the cell of a coordinate and the
+neighbouring cells on the sides it is nearest to (at most eight cells, see WELD_OFFSETS)
+are searched rather than every point. A tolerance of 0 welds exact duplicates only. Returns
+the points (in order of first appearance) and the index of the point of every coordinate.
+With NumPy the cells of all the coordinates are searched at once (see getWeldTargets), the
+loop below is the fallback without it.
+'''
+
+def weldCoords(coords, tolerance=0.0):
+
+	coords, remap = weldDuplicates(coords)
+
+	if tolerance <= 0 or len(coords) == 0:
+
+		return coords, remap
+
+	if np is not None:
+
+		targets = getWeldTargets(coords, tolerance)
+
+		if targets is not None:
+
+			# Number the points in order and look up the point of every coordinate
+			keep = targets == np.arange(len(targets))
+			number = np.cumsum(keep) - 1
+
+			return coords[keep], number[targets][remap].tolist()
+
+		coords = coords.tolist()
+
+	cells = {}
+	points = []
+	indices = []
+
+	size = tolerance * 2.0
+
+	for coord in coords:
+
+		x, y, z = coord[0] / size, coord[1] / size, coord[2] / size
+		kx, ky, kz = math.floor(x), math.floor(y), math.floor(z)
+		key = (kx, ky, kz)
+
+		index = None
+
+		# The own cell holds the coincident points, its neighbours are only searched
+		# when it has none within the tolerance
+		for i in cells.get(key, ()):
+
+			point = points[i]
+
+			if abs(point[0] - coord[0]) <= tolerance and abs(point[1] - coord[1]) <= tolerance and abs(point[2] - coord[2]) <= tolerance:
+
+				index = i
+				break
+
+		if index is None:
+
+			nx = kx + 1 if x - kx >= 0.5 else kx - 1
+			ny = ky + 1 if y - ky >= 0.5 else ky - 1
+			nz = kz + 1 if z - kz >= 0.5 else kz - 1
+
+			for cell in ((nx, ky, kz), (kx, ny, kz), (kx, ky, nz), (nx, ny, kz), (nx, ky, nz), (kx, ny, nz), (nx, ny, nz)):
+
+				for i in cells.get(cell, ()):
+
+					point = points[i]
+
+					if abs(point[0] - coord[0]) <= tolerance and abs(point[1] - coord[1]) <= tolerance and abs(point[2] - coord[2]) <= tolerance:
+
+						index = i
+						break
+
+				if index is not None:
+					break
+
+		if index is None:
+
+			index = len(points)
+			cells.setdefault(key, []).append(index)
+			points.append(coord)
+
+		indices.append(index)
+
+	return points, [indices[i] for i in remap]
+
+# --------------------------------------------------------------------------
+
+'''
+Returns for every row of an (n, 3) NumPy array of distinct coordinates the row it is welded
+to (see weldCoords), or the row itself when it becomes a point. The coordinates of every
+cell are paired with those of the cell itself and of its neighbours, and every coordinate
+keeps the earlier ones within the tolerance in the cells it searches. A coordinate is
+settled once it is known which of them are points: it joins the first point in search
+order (by cell offset, then by index) or becomes a point when there is none. This is done
+for all of the coordinates at once a few times over, then one by one for those still
+waiting on a chain of others. Returns None when the cells are too crowded to pair up their
+coordinates (a tolerance far above their spacing), the loop of weldCoords stops at the
+first point it finds instead.
+'''
+
+def getWeldTargets(coords, tolerance):
+
+	n = len(coords)
+	scaled = coords / (tolerance * 2.0)
+	cells = np.floor(scaled) + 0.0
+	sides = np.where(scaled - cells >= 0.5, 1.0, -1.0)
+
+	# Number the cells along every axis, a cell is then keyed on its three numbers. They are
+	# counted from the lowest cell (leaving an empty one on either side), or when the cells
+	# span more than there are coordinates numbered in order of the occupied ones only.
+	axes = []
+	numbers = []
+	lengths = []
+
+	for axis in range(3):
+
+		low, high = cells[:, axis].min(), cells[:, axis].max()
+
+		if high - low < n:
+
+			axes.append(None)
+			numbers.append((cells[:, axis] - low).astype(np.int64) + 1)
+			lengths.append(int(high - low) + 3)
+
+		else:
+
+			values, number = np.unique(cells[:, axis], return_inverse=True)
+			axes.append(values)
+			numbers.append(number.reshape(-1))
+			lengths.append(len(values))
+
+	if lengths[0] * lengths[1] * lengths[2] >= 1 << 62:
+
+		return None
+
+	# List the coordinates of every cell in order of their keys
+	keys = (numbers[0] * lengths[1] + numbers[1]) * lengths[2] + numbers[2]
+	members = np.argsort(keys, kind="stable")
+	keys = keys[members]
+	starts = np.flatnonzero(np.diff(keys, prepend=-1))
+	counts = np.diff(starts, append=n)
+	keys = keys[starts]
+
+	# The neighbouring cell along an axis numbered in order of the occupied cells has the
+	# next (or previous) number when it holds the next (or previous) value
+	neighbours = {}
+
+	for axis in range(3):
+
+		if axes[axis] is None:
+			continue
+
+		number = numbers[axis][members[starts]]
+
+		for step in (-1, 1):
+
+			neighbours[axis, step] = axes[axis][np.clip(number + step, 0, lengths[axis] - 1)] == axes[axis][number] + step
+
+	pairs = []
+	npairs = 0
+
+	for direction in WELD_DIRECTIONS:
+
+		if not any(direction):
+
+			# Only cells of more than one coordinate pair up with themselves
+			a = b = np.flatnonzero(counts > 1)
+
+		else:
+
+			found = np.ones(len(keys), dtype=bool)
+
+			for axis, step in enumerate(direction):
+
+				if (axis, step) in neighbours:
+					found &= neighbours[axis, step]
+
+			# The key of the neighbour is then a fixed step away, so the keys stay in order
+			a = np.flatnonzero(found)
+			key = keys[a] + (direction[0] * lengths[1] + direction[1]) * lengths[2] + direction[2]
+			b = np.minimum(np.searchsorted(keys, key), len(keys) - 1)
+			found = keys[b] == key
+			a, b = a[found], b[found]
+
+		# Pair every coordinate of the one cell with every coordinate of the other
+		size = counts[a] * counts[b]
+		npairs += int(size.sum())
+
+		if npairs > WELD_PAIRS * n:
+
+			return None
+
+		pair = np.repeat(np.arange(len(a)), size)
+		local = np.arange(len(pair)) - np.repeat(np.cumsum(size) - size, size)
+		u = members[starts[a][pair] + local // counts[b][pair]]
+		v = members[starts[b][pair] + local % counts[b][pair]]
+
+		# Within a cell every pair of coordinates is listed twice, and with itself
+		if not any(direction):
+
+			later = u > v
+			u, v = u[later], v[later]
+
+		near = (np.abs(coords[u] - coords[v]) <= tolerance).all(axis=1)
+		u, v = u[near], v[near]
+
+		pairs.append((np.maximum(u, v), np.minimum(u, v)))
+
+	i, j = [np.concatenate(column) for column in zip(*pairs)]
+
+	# Keep the earlier coordinates in the cells searched from the later one, on the sides
+	# it is nearest to, and rank them by the search order of their cell
+	offsets = cells[j] - cells[i]
+	keep = ((offsets == 0.0) | (offsets == sides[i])).all(axis=1)
+	i, j = i[keep], j[keep]
+
+	ranks = np.zeros(8, dtype=np.int64)
+
+	for rank, offset in enumerate(WELD_OFFSETS):
+		ranks[offset[0] + 2 * offset[1] + 4 * offset[2]] = rank
+
+	rank = ranks[(offsets[keep] != 0.0).dot([1, 2, 4])]
+	order = np.lexsort((j, rank, i))
+	i, j = i[order], j[order]
+
+	# Coordinates without an earlier one within the tolerance are points
+	targets = np.full(n, -1, dtype=np.int64)
+	waiting = np.zeros(n, dtype=bool)
+	waiting[i] = True
+	targets[~waiting] = np.flatnonzero(~waiting)
+
+	for attempt in range(16):
+
+		if len(i) == 0:
+			break
+
+		# Drop the pairs with coordinates that joined a point, they are not points themselves
+		target = targets[j]
+		keep = (target < 0) | (target == j)
+		i, j, target = i[keep], j[keep], target[keep]
+
+		# The first pair left of a coordinate settles it when its other coordinate is a point
+		heads = np.flatnonzero(np.diff(i, prepend=-1))
+		settled = heads[target[heads] >= 0]
+		targets[i[settled]] = j[settled]
+
+		# A coordinate without any pair left is a point
+		waiting[:] = False
+		waiting[i] = True
+		alone = np.flatnonzero((targets < 0) & ~waiting)
+		targets[alone] = alone
+
+		keep = targets[i] < 0
+		i, j = i[keep], j[keep]
+
+	if len(i) == 0:
+
+		return targets
+
+	# Settle the coordinates left in order, so that every earlier one is settled already
+	heads = np.flatnonzero(np.diff(i, prepend=-1)).tolist()
+	i, j, targets = i.tolist(), j.tolist(), targets.tolist()
+
+	for head, stop in zip(heads, heads[1:] + [len(i)]):
+
+		index = i[head]
+		targets[index] = index
+
+		for k in range(head, stop):
+
+			if targets[j[k]] == j[k]:
+
+				targets[index] = j[k]
+				break
+
+	return np.asarray(targets, dtype=np.int64)
+
+# --------------------------------------------------------------------------
+# Ring Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns twice the signed area of a ring of (x, y, z) coordinates in plan, positive when
+the ring winds counter-clockwise
+'''
+
+def getSignedArea(ring):
+
+	area = 0.0
+
+	for i in range(len(ring)):
+
+		area += ring[i - 1][0] * ring[i][1] - ring[i][0] * ring[i - 1][1]
+
+	return area
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the cross product of the vectors o->a and o->b in plan, positive when a, b turn
+counter-clockwise around o
+'''
+
+def getCross(o, a, b):
+
+	return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the index of a vertex of a ring that can be joined to the point m by a bridge that
+crosses none of the edges of the ring, or None when m is not inside the ring. This is the
+search of ear clipping triangulators: a ray is cast from m along +x to the nearest edge it
+hits, and the end of that edge, or the ring vertex inside the triangle of m, the hit and
+that end which lies closest to the direction of the ray, is visible from m. A vertex the
+ring visits more than once (the end of an earlier bridge) is joined at the visit whose
+corner opens towards m.
+'''
+
+def findBridgeVertex(ring, m, ccw):
+
+	x, y = m[0], m[1]
+
+	# Find the nearest edge hit by the ray from m along +x
+	hit = None
+	k = None
+
+	for i in range(len(ring)):
+
+		a, b = ring[i - 1], ring[i]
+
+		if a[1] == b[1] or min(a[1], b[1]) > y or max(a[1], b[1]) < y:
+
+			continue
+
+		hx = a[0] + (y - a[1]) * (b[0] - a[0]) / (b[1] - a[1])
+
+		if hx >= x and (hit is None or hx < hit):
+
+			hit = hx
+			k = i - 1 if a[0] > b[0] else i
+
+	if hit is None:
+
+		return None
+
+	k %= len(ring)
+	p = ring[k]
+
+	# Find the vertex inside the triangle (m, hit, p) closest to the direction of the ray
+	def getKey(v):
+
+		dx, dy = v[0] - x, abs(v[1] - y)
+
+		return (dy / dx if dx > 0 else float("inf"), dx * dx + dy * dy)
+
+	key = getKey(p)
+	h = (hit, y)
+
+	if p[1] != y:
+
+		for i in range(len(ring)):
+
+			v = ring[i]
+
+			if v == p:
+
+				continue
+
+			c1, c2, c3 = getCross(m, h, v), getCross(h, p, v), getCross(p, m, v)
+
+			if (c1 >= 0 and c2 >= 0 and c3 >= 0) or (c1 <= 0 and c2 <= 0 and c3 <= 0):
+
+				v_key = getKey(v)
+
+				if v_key < key:
+
+					k, key = i, v_key
+
+	# Join a vertex visited more than once at the visit whose corner contains m
+	v = ring[k]
+	sign = 1 if ccw else -1
+
+	for i in range(len(ring)):
+
+		if ring[i] != v:
+
+			continue
+
+		a, b = ring[i - 1], ring[(i + 1) % len(ring)]
+		left_in, right_in = sign * getCross(a, v, m) >= 0, sign * getCross(v, b, m) >= 0
+
+		if (left_in and right_in) if sign * getCross(a, v, b) >= 0 else (left_in or right_in):
+
+			return i
+
+	return k
+
+# --------------------------------------------------------------------------
+
+'''
+Joins the boundary and holes of an area into a single ring of coordinates. Every hole is
+reversed when needed so it winds against the boundary and is bridged from its vertex of
+largest x to a vertex of the ring built so far that it can see (see findBridgeVertex): the
+ring walks along the bridge, around the hole and back. The holes are bridged from right to
+left, like ear clipping triangulators do, so the holes not bridged yet lie left of the ray
+and the bridges cross no edges. Returns None when a hole lies outside the boundary and
+cannot be bridged.
+'''
+
+def bridgeRings(rings):
+
+	ring = [tuple(coord) for coord in rings[0]]
+	ccw = getSignedArea(ring) > 0
+
+	holes = [[tuple(coord) for coord in hole] for hole in rings[1:] if len(hole) > 2]
+	holes.sort(key=lambda hole: max(coord[0] for coord in hole), reverse=True)
+
+	for hole in holes:
+
+		if (getSignedArea(hole) > 0) == ccw:
+
+			hole.reverse()
+
+		j = max(range(len(hole)), key=lambda k: hole[k][0])
+
+		k = findBridgeVertex(ring, hole[j], ccw)
+
+		if k is None:
+
+			return None
+
+		ring[k + 1:k + 1] = hole[j:] + hole[:j] + [hole[j], ring[k]]
+
+	return ring
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the polygons an area source is converted into as (coordinates, hole) pairs. Areas
+with holes (see source.getRings) give one polygon per ring when holes is "separate", a
+single bridged polygon when it is "bridge" (see bridgeRings, areas whose holes cannot be
+bridged give separate polygons) and their boundary alone when it is "ignore". Other
+sources give their coordinates as a single polygon.
+'''
+
+def getPolygonRings(src, coords, holes):
+
+	rings = src.getRings()
+
+	if not rings or len(rings) < 2:
+
+		return [(coords, 0)]
+
+	parts = []
+	start = 0
+
+	for size in rings:
+
+		parts.append(coords[start:start + size])
+		start += size
+
+	ring = bridgeRings(parts) if holes == "bridge" else None
+
+	if ring is not None:
+
+		return [(ring, 0)]
+
+	elif holes == "ignore":
+
+		return [(parts[0], 0)]
+
+	return [(part, 1 if i else 0) for i, part in enumerate(parts)]
+
+# --------------------------------------------------------------------------
+# Precision and Storage Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns per attribute settings given as text, e.g. "3" or "P=3,height=2", as a dictionary
+of attribute name ("P" for the point positions) onto the value. A value on its own is
+stored under the name given as bare and the 'attrib_' prefix of the names is optional.
+'''
+
+def parseSettings(text, bare):
+
+	settings = {}
+
+	for item in (text or "").split(","):
+
+		item = item.strip()
+
+		if not item:
+
+			continue
+
+		name, sep, val = item.rpartition("=")
+		name = name.strip() or bare
+
+		if name.startswith("attrib_"):
+			name = name[7:]
+
+		settings[name] = val.strip()
+
+	return settings
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the precision setting as attribute names onto the number of decimals the float
+values are rounded to when encoded. A number on its own applies to P.
+'''
+
+def parsePrecision(text):
+
+	return dict([(name, int(val)) for name, val in parseSettings(text, "P").items()])
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the storage setting, e.g. "auto" or "auto,class=int8,height=fpreal64", as attribute
+names onto "auto" (the narrowest lossless storage) or a Houdini storage name. A value on its
+own is stored under "*" and applies to every attribute except P, which is only changed when
+it is named.
+'''
+
+def parseStorage(text):
+
+	storage = parseSettings(text, "*")
+
+	for name, val in storage.items():
+
+		if val != "auto" and val not in attrib.STORAGE_TYPECODES:
+
+			raise ValueError("Unknown storage '{}' for attribute {}".format(val, name))
+
+	return storage
+
+# --------------------------------------------------------------------------
+# Attribute Functions
+# --------------------------------------------------------------------------
+
+'''
+The following functions will only handle attributes that are prefixed with 'attrib_'.
+This has been done to enfore good attribute management and ensure that all
+non-exposed/inbuilt attributes from FME are ignored.
+'''
+
+def createHouAttribs(src, scope, size=None, storage=None):
+
+	'''
+	Returns an index of the 'attrib_' prefixed attribute names of a geometry source onto
+	their HouAttribute so that writing the values per source is a direct lookup. When the
+	number of sources is known (size) the numeric value buffers are preallocated. The
+	storage setting (see parseStorage) selects the storage of the numeric attributes.
+	'''
+
+	attribs = collections.OrderedDict()
+	storage = storage or {}
+
+	for aname, atype, val in src.getHouAttribs():
+
+		if atype == "int":
+
+			attribs["attrib_" + aname] = attrib.HouAttribute(aname, scope, "int", 0, size=size, storage=storage.get(aname, storage.get("*")))
+
+		elif atype == "float":
+
+			attribs["attrib_" + aname] = attrib.HouAttribute(aname, scope, "float", 0.0, size=size, storage=storage.get(aname, storage.get("*")))
+
+		elif atype == "string":
+
+			attribs["attrib_" + aname] = attrib.HouAttribute(aname, scope, "string", "", size=size)
+
+	return attribs
+
+# --------------------------------------------------------------------------
+
+def writeHouAttribs(index, src, attribs):
+
+	for attrib_name, attrib in attribs.items():
+
+		val = src.getAttribute(attrib_name)
+
+		# Sources missing the attribute get the default so the values stay aligned
+		if val is None:
+
+			val = attrib.getDefault()
+
+		if index == 1:
+
+			attrib.setFirstValue(val)
+
+		else:
+
+			attrib.appendValue(val)
+
+	return attribs
+
+# --------------------------------------------------------------------------
+# Geometry Source Conversion Functions
+# --------------------------------------------------------------------------
+
+'''
+Converts a surface source (vertex pool and faces) into a HouGeo object. The geometry is
+offset to its own planar centroid and its attributes are written as detail attributes.
+The optional precision and storage settings are passed on to the HouGeo object and its
+attributes (see parsePrecision and parseStorage). When a weld tolerance is given the
+coincident vertices of the vertex pool (e.g. the shared walls of the parts of a
+multisurface) are merged into single points and the face indices remapped onto them.
+'''
+
+def convertSurface(src, precision=None, storage=None, weld=None):
+
+	nverts, indices = src.getFaces()
+
+	# Set the offset from the planar centroid of the bounds
+	bbx = src.getBounds()
+	centroid = ((bbx[0][0] * 0.5) + (bbx[1][0] * 0.5), (bbx[0][1] * 0.5) + (bbx[1][1] * 0.5))
+	offset = (-centroid[0], -centroid[1], 0.0)
+
+	'''
+	The next two blocks create a number of vertices per primitive relational list of 
+	pairs (rle) whereby the first value is the number of vertices per primitve and 
+	the second value is the number of primitives that have this topology
+	'''
+
+	# Group the nverts list by number
+	nvert_grps = []
+
+	for n in nverts:
+	
+		if nvert_grps and nvert_grps[-1][0] == n:
+
+			nvert_grps[-1].append(n)
+
+		else:
+
+			nvert_grps.append([n])
+
+	# Create the vertex/primitives relational list
+	rle = []
+
+	for grp in nvert_grps:
+
+		rle.extend([grp[0], len(grp)])
+
+	coords = src.getCoords()
+
+	if weld is not None:
+
+		# Merge the coincident vertices of the pool and remap the faces onto them
+		coords, remap = weldCoords(coords, weld)
+
+		if np is not None:
+
+			indices = np.asarray(remap, dtype=np.int64)[np.asarray(indices, dtype=np.int64)].tolist()
+
+		else:
+
+			indices = [remap[i] for i in indices]
+
+	# Offset and swizzle the vertices in a single pass
+	points = offsetSwizzleYZ(coords, offset)
+
+	# Create Houdini .geo string
+	hougeo = geo.HouGeo(getOffsetBounds(offset, bbx), precision, storage)
+	hougeo.setPoints(points)
+	hougeo.setIndices(indices)
+	hougeo.setPrimitives("face", len(nverts), sum(nverts), rle)
+	hougeo.setSpatialRef(centroid, cs=src.getCoordSys())
+
+	# Write attributes to .geo
+	detail_attribs = createHouAttribs(src, "global", storage=storage)
+	detail_attribs = writeHouAttribs(1, src, detail_attribs)
+	hougeo.setAttribs(detail_attribs)
+
+	return hougeo
+
+# --------------------------------------------------------------------------
+
+'''
+Converts point sources into a HouGeo object with one point per source. Point groups can be
+generated from attribute values by supplying geo.HouGroupBuilder objects.
+'''
+
+def convertPoints(srcs, centroid, offset, bounds, groups=None, precision=None, storage=None):
+
+	npoints = 0
+	coords = array.array("d")
+
+	# Attribute driven groups (HouGroupBuilder objects) filled while converting
+	groups = groups or []
+
+	# Create .geo attribute template from first source
+	point_attribs = createHouAttribs(srcs[0], "point", len(srcs), storage)
+
+	for src in srcs:
+
+		# Get the raw coordinates of the point
+		extendCoords(coords, getFlatCoords(src))
+
+		# Increment point number
+		npoints += 1
+
+		# Write attributes for this point only
+		point_attribs = writeHouAttribs(npoints, src, point_attribs)
+
+		# Add the point to its attribute driven groups
+		for grp in groups:
+			grp.addFeature(src)
+
+	# Offset and swizzle all of the points at once
+	points = offsetSwizzleYZ(coords, offset)
+
+	# Create Houdini .geo string
+	hougeo = geo.HouGeo(bounds, precision, storage)
+	hougeo.setPoints(points)
+	hougeo.setSpatialRef(centroid, cs=src.getCoordSys())
+
+	# Write attributes and groups to .geo
+	hougeo.setAttribs(point_attribs)
+	hougeo.setGroups(groups)
+
+	return hougeo
+
+# --------------------------------------------------------------------------
+
+'''
+Converts line or area sources into a HouGeo object with one open (ptype "open") or closed
+(ptype "closed") polygon per source. Primitive (or point) groups can be generated from
+attribute values by supplying geo.HouGroupBuilder objects. When a weld tolerance is given
+the coincident vertices of all polygons are welded into shared points (see weldCoords),
+which cannot be combined with point groups. The coordinates of all polygons are collected
+in a flat array of doubles (see extendCoords), copied straight from the buffer of buffered
+sources, and the vertex indices in a typed array, so there is no Python object per vertex.
+
+The holes of areas are converted as set by holes (one of HOLE_MODES, see getPolygonRings).
+With "separate" every ring becomes a closed polygon carrying the attributes of its area and
+a "hole" primitive attribute (1 for the holes, 0 otherwise) is added when there are holes,
+e.g. for the Houdini Hole SOP to cut them out. When the sources carry a hole attribute of
+their own it is named "hole_1" (or the next free "hole_<n>") instead.
+'''
+
+def convertPolygons(srcs, centroid, offset, bounds, ptype, groups=None, precision=None, storage=None, weld=None, holes="separate"):
+
+	if holes not in HOLE_MODES:
+
+		raise ValueError("Unknown holes mode '{}', expected one of {}".format(holes, ", ".join(HOLE_MODES)))
+
+	nprims = 0
+	coords = array.array("d")
+	prim_run = []
+	prim_holes = []
+
+	# Attribute driven groups (HouGroupBuilder objects) filled while converting
+	groups = groups or []
+
+	# Create .geo attribute template from first source
+	prim_attribs = createHouAttribs(srcs[0], "primitive", len(srcs), storage)
+
+	for src in srcs:
+
+		rings = src.getRings() if ptype == "closed" else None
+
+		# Split areas with holes into their polygons, the run lengths follow from them
+		parts = getPolygonRings(src, src.getCoords(), holes) if rings and len(rings) > 1 else [(getFlatCoords(src), 0)]
+		npoints = 0
+
+		for part, hole in parts:
+
+			# Append the raw coordinates (offset and swizzle happens once for all points)
+			size = extendCoords(coords, part)
+
+			# Keep track of the amount of points per primitive
+			prim_run.append(size)
+			prim_holes.append(hole)
+			npoints += size
+
+			# Keep track of the number of primitives
+			nprims += 1
+
+			# Write the attributes
+			prim_attribs = writeHouAttribs(nprims, src, prim_attribs)
+
+		# Add the primitives (or their points) to their attribute driven groups
+		for grp in groups:
+			grp.addFeature(src, nprims=len(parts), npoints=npoints)
+
+	nverts = len(coords) // 3
+
+	if weld is not None:
+
+		if any(grp.scope == "point" for grp in groups):
+
+			raise ValueError("Point groups cannot be combined with welded vertices")
+
+		# Share the points of coincident vertices between the polygons
+		coords, indices = weldCoords(getCoordRows(coords), weld)
+
+	else:
+
+		indices = np.arange(nverts) if np is not None else array.array("q", range(nverts))
+
+	# Offset and swizzle all of the points at once
+	points = offsetSwizzleYZ(coords, offset)
+
+	# Create Houdini .geo string
+	hougeo = geo.HouGeo(bounds, precision, storage)
+	hougeo.setPoints(points)
+	hougeo.setIndices(indices)
+	hougeo.setPrimitives(ptype, nprims, nverts, prim_run)
+	hougeo.setSpatialRef(centroid, cs=src.getCoordSys())
+
+	# Write attributes and groups to .geo
+	hougeo.setAttribs(prim_attribs)
+	hougeo.setGroups(groups)
+
+	if any(prim_holes):
+
+		# Houdini rejects two attributes of the same name, do not clash with the sources
+		name = "hole"
+		i = 1
+
+		while "attrib_" + name in prim_attribs:
+
+			name = "hole_{}".format(i)
+			i += 1
+
+		storage = storage or {}
+		hougeo.setAttribs(attrib.HouAttribute(name, "primitive", "int", prim_holes, storage=storage.get("hole", storage.get("*"))))
+
+	return hougeo
+
+# --------------------------------------------------------------------------
+
+def convertLines(srcs, centroid, offset, bounds, groups=None, precision=None, storage=None, weld=None):
+
+	return convertPolygons(srcs, centroid, offset, bounds, "open", groups, precision, storage, weld)
+
+# --------------------------------------------------------------------------
+
+def convertAreas(srcs, centroid, offset, bounds, groups=None, precision=None, storage=None, weld=None, holes="separate"):
+
+	return convertPolygons(srcs, centroid, offset, bounds, "closed", groups, precision, storage, weld, holes)
+
+# --------------------------------------------------------------------------
+
+'''
+Converts and encodes a surface source in one step, returning the .geo string (or .bgeo
+bytes). This is the function run by the worker processes: both its arguments (a
+source.PlainSource) and its result are plain picklable values.
+'''
+
+def encodeSurface(src, fmt="geo", deterministic=False, precision=None, storage=None, weld=None):
+
+	return convertSurface(src, precision, storage, weld).encode(fmt, deterministic=deterministic)
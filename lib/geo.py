@@ -2,7 +2,7 @@
 # Imports
 # --------------------------------------------------------------------------
 
-import json, collections, datetime, socket, os
+import json, collections, datetime, socket, os, re
 
 '''
 The following routine will import the required libraries from the python files in the
@@ -20,6 +20,160 @@ attrib_spec = importlib.util.spec_from_file_location("attrib", os.path.join(scri
 attrib = importlib.util.module_from_spec(attrib_spec)
 attrib_spec.loader.exec_module(attrib)
 
+# Import the fmehougeo bgeo.py modules
+bgeo_spec = importlib.util.spec_from_file_location("bgeo", os.path.join(script_dir, "bgeo.py"))
+bgeo = importlib.util.module_from_spec(bgeo_spec)
+bgeo_spec.loader.exec_module(bgeo)
+
+# Number of list items (points, indices, values) encoded per streamed chunk
+CHUNK_SIZE = 65536
+
+# --------------------------------------------------------------------------
+# Streaming Functions
+# --------------------------------------------------------------------------
+
+'''
+Default hook of json.dumps for the document values it cannot encode itself: attribute
+value columns and NumPy arrays are encoded as lists
+'''
+
+def getJSONValue(obj):
+
+	if bgeo.isColumn(obj):
+
+		return obj.getEncodedValues()
+
+	if hasattr(obj, "tolist"):
+
+		return obj.tolist()
+
+	raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+# --------------------------------------------------------------------------
+
+'''
+Generator that encodes a HouGeo.getDocument() structure as compact json text. The output
+is identical to json.dumps(attrib.getPlainJSON(obj), separators=(',',':')) but is produced
+section by section: parts of the document holding no more than chunk_size values (see
+bgeo.getSize) are encoded in one piece and larger lists chunk_size values at a time, so
+the complete document string is never built.
+'''
+
+def iterEncodeJSON(obj, chunk_size=CHUNK_SIZE, sizes=None):
+
+	if sizes is None:
+		sizes = {}
+
+	# Attribute value columns format their own typed values
+	if bgeo.isColumn(obj):
+
+		yield "["
+
+		for i in range(0, len(obj), chunk_size):
+
+			if i > 0:
+				yield ","
+
+			yield obj.toJSON(i, i + chunk_size)
+
+		yield "]"
+
+		return
+
+	if not isinstance(obj, (list, tuple)) or bgeo.getSize(obj, chunk_size, sizes) <= chunk_size:
+
+		yield json.dumps(obj, separators=(',',':'), default=getJSONValue)
+
+		return
+
+	# Large list of values (checked at C speed), encode as slices
+	if all(map(bgeo.SCALAR_TYPES.__contains__, map(type, obj))):
+
+		yield "["
+
+		for i in range(0, len(obj), chunk_size):
+
+			if i > 0:
+				yield ","
+
+			yield json.dumps(obj[i:i + chunk_size], separators=(',',':'))[1:-1]
+
+		yield "]"
+
+		return
+
+	# Large list of lists, small items are encoded together in slices of about chunk_size
+	# values and large items on their own
+	yield "["
+
+	first = True
+	start = 0
+	size = 0
+
+	for i, value in enumerate(obj):
+
+		n = 1 if type(value) in bgeo.SCALAR_TYPES else bgeo.getSize(value, chunk_size, sizes)
+
+		if n <= chunk_size and size + n <= chunk_size:
+
+			size += n
+
+			continue
+
+		if start < i:
+
+			if not first:
+				yield ","
+
+			yield json.dumps(obj[start:i], separators=(',',':'), default=getJSONValue)[1:-1]
+			first = False
+
+		start = i
+		size = n
+
+		if n > chunk_size:
+
+			if not first:
+				yield ","
+
+			yield from iterEncodeJSON(value, chunk_size, sizes)
+			first = False
+
+			start = i + 1
+			size = 0
+
+	if start < len(obj):
+
+		if not first:
+			yield ","
+
+		yield json.dumps(obj[start:], separators=(',',':'), default=getJSONValue)[1:-1]
+
+	yield "]"
+
+# --------------------------------------------------------------------------
+
+'''
+Writes encoded chunks (json text for the "geo" format, bytes for the "bgeo" format) to
+dest, which is either a file path or an open file-like object. Returns dest.
+'''
+
+def writeChunks(chunks, dest, fmt="geo"):
+
+	if hasattr(dest, "write"):
+
+		for chunk in chunks:
+			dest.write(chunk)
+
+	else:
+
+		with open(dest, "wb" if fmt == "bgeo" else "w", encoding=None if fmt == "bgeo" else "utf-8") as f:
+
+			for chunk in chunks:
+				f.write(chunk)
+
+	return dest
+
 # --------------------------------------------------------------------------
 # Classes
 # --------------------------------------------------------------------------
@@ -28,12 +182,19 @@ attrib_spec.loader.exec_module(attrib)
 This class creates a structured json string that matches the Houdini .geo specification.
 It has been designed specifically for the import of Geospatial Datasets into Houdini and
 is expected to be used with the associated utilities will convert FME Objects into the
-inputs for this class.
+inputs for this class. The optional precision maps attribute names ("P" for the point
+positions) onto the number of decimals their float values are rounded to when encoded,
+and the optional storage maps them onto a requested storage (see attrib.HouAttribute)
+with "*" for every attribute but P. The storage of the attributes set with setAttribs is
+chosen when they are created.
 '''
 
 class HouGeo(object):
 
-	def __init__(self, bounds):
+	def __init__(self, bounds, precision=None, storage=None):
+
+		self.precision = precision or {}
+		self.storage = storage or {}
 
 		self.pt_count = 0
 		self.vtx_count = 0
@@ -57,17 +218,43 @@ class HouGeo(object):
 
 	# ----------------------------------------
 
+	def getStorage(self, name):
+
+		# The requested storage of an attribute, the "*" entry applies to all but P
+		if name == "P":
+
+			return self.storage.get("P")
+
+		return self.storage.get(name, self.storage.get("*"))
+
+	# ----------------------------------------
+
 	def setPoints(self, points):
 
-		p_attrib = attrib.HouAttribute("P", "point", "vec3float", points, special="ppos")
-		self.pt_attribs.append(p_attrib.getJSON())
+		p_attrib = attrib.HouAttribute("P", "point", "vec3float", points, special="ppos", precision=self.precision.get("P"), storage=self.getStorage("P"))
+		self.pt_attribs.append(p_attrib.getDocument())
 		self.pt_count = len(points)
 
 	# ----------------------------------------
 
 	def setIndices(self, indices):
 
-		self.indices = indices
+		'''
+		Sets the point of every vertex. The indices are held in an int32 column (int64 when
+		they do not fit), which the encoders write a slice at a time like the attributes.
+		'''
+
+		if len(indices) == 0:
+
+			self.indices = []
+
+			return
+
+		if attrib.np is not None:
+			indices = attrib.np.asarray(indices, dtype=attrib.np.int64)
+
+		self.indices = attrib.HouColumn("int32", 1)
+		self.indices.extend(indices)
 
 	# ----------------------------------------
 
@@ -112,6 +299,48 @@ class HouGeo(object):
 
 	# ----------------------------------------
 
+	def setPackedDiskPrimitives(self, filenames, bounds):
+
+		'''
+		Sets one PackedDisk primitive per file, each referencing the geometry on disk rather
+		than embedding it. The bounds are given per file as [xmin,xmax,ymin,ymax,zmin,zmax]
+		and are stored as the cached bounds so Houdini can draw and cull the primitives
+		without loading the files. Primitive i uses vertex (and point) i, which should be
+		placed at the centre of its bounds: the pivot is set to the same position so the
+		geometry of the file is not moved.
+		'''
+
+		primitives = []
+
+		for i, (filename, bbx) in enumerate(zip(filenames, bounds)):
+
+			pivot = [(bbx[0] + bbx[1]) * 0.5, (bbx[2] + bbx[3]) * 0.5, (bbx[4] + bbx[5]) * 0.5]
+
+			parameters = collections.OrderedDict()
+			parameters["cachedbounds"] = list(bbx)
+			parameters["filename"] = filename
+			parameters["unexpandedfilename"] = filename
+
+			primitives.append([
+				[
+					"type","PackedDisk"
+				],
+				[
+					"parameters",parameters,
+					"vertex",i,
+					"pivot",pivot,
+					"transform",[1.0,0.0,0.0,0.0,1.0,0.0,0.0,0.0,1.0],
+					"viewportlod","box"
+				]
+			])
+
+		self.indices = list(range(len(primitives)))
+		self.vtx_count = len(primitives)
+		self.prim_count = len(primitives)
+		self.primitives = primitives
+
+	# ----------------------------------------
+
 	def setPrimGroups(self, pgrps_rle, grp_id):
 
 		'''
@@ -119,68 +348,119 @@ class HouGeo(object):
 		describing how all primitives relate to that specific group: So if the first 10 of 100
 		primitives are within GROUP_1 that is supplied as [10, true, 90, false]. If the primitives
 		20 to 40 are in GROUP_2 that is supplied as [20, false, 20, true, 60, false].
+
+		The groups are given as the number of (consecutive) primitives in each group, the
+		number of primitives before and after each group are tracked with a running prefix
+		sum so that building all of the groups is linear in the number of groups.
 		'''
 
-		pgrps = []
+		total = sum(pgrps_rle)
+		start = 0
 
 		# Structure the primitive groups relational (rle) list of pairs
 		for i, prims in enumerate(pgrps_rle):
 
-			if i == 0:
+			pgrp = []
 
-				pgrps.append([prims, True, sum(pgrps_rle[1:]), False])
+			if start > 0:
+				pgrp += [start, False]
 
-			elif i == len(pgrps_rle) - 1:
+			pgrp += [prims, True]
 
-				pgrps.append([sum(pgrps_rle[:-1]), False, prims, True])
+			if total - start - prims > 0:
+				pgrp += [total - start - prims, False]
 
-			else:
+			start += prims
+
+			# Write into the HouJSON groups structure
+			self.addGroup("primitive", "{}_{}".format(grp_id, i), pgrp)
 
-				pgrps.append([sum(pgrps_rle[:i]), False, prims, True, sum(pgrps_rle[i + 1:]), False])
+	# ----------------------------------------
 
-		# Write into the HouJSON groups structure
-		for i, pgrp in enumerate(pgrps):
+	def addGroup(self, scope, name, rle):
 
-			grp_json = [
-				[
-					"name", "{}_{}".format(grp_id, i)
-				],
-				[
-					"selection", [
-						"unordered", [
-							"boolRLE", pgrp
-						]
+		'''
+		Adds a group from its boolRLE list of pairs (number and boolean) to the point,
+		vertex or primitive groups
+		'''
+
+		grp_json = [
+			[
+				"name", name
+			],
+			[
+				"selection", [
+					"unordered", [
+						"boolRLE", rle
 					]
 				]
 			]
+		]
+
+		if scope == "point":
+
+			self.pt_groups.append(grp_json)
+
+		elif scope == "vertex":
+
+			self.vtx_groups.append(grp_json)
+
+		elif scope == "primitive":
+
+			self.prim_groups.append(grp_json)
 
-			self.prim_attribs.append(grp_json)
+	# ----------------------------------------
+
+	def setGroups(self, builders):
+
+		'''
+		Adds every group collected by one or more HouGroupBuilder objects
+		'''
+
+		if not isinstance(builders, list):
+
+			builders = [builders]
+
+		for builder in builders:
+
+			for name, rle in builder.getGroups():
+
+				self.addGroup(builder.scope, name, rle)
 
 	# ----------------------------------------
 
 	def setAttribs(self, attribs):
 
-		if not isinstance(attribs, list):
+		# Accept the name indexed attributes from utils.createHouAttribs
+		if isinstance(attribs, dict):
+
+			attribs = list(attribs.values())
+
+		elif not isinstance(attribs, list):
 
 			attribs = [attribs]
 
 		for attrib in attribs:
 
+			if attrib.getName() in self.precision:
+
+				attrib.setPrecision(self.precision[attrib.getName()])
+
 			if attrib.getScope() == "point":
 
-				self.pt_attribs.append(attrib.getJSON())
+				self.pt_attribs.append(attrib.getDocument())
 
 			elif attrib.getScope() == "vertex":
 
-				self.vtx_attribs.append(attrib.getJSON())
+				self.vtx_attribs.append(attrib.getDocument())
 
 			elif attrib.getScope() == "primitive":
 
-				self.prim_attribs.append(attrib.getJSON())
+				self.prim_attribs.append(attrib.getDocument())
 
 			elif attrib.getScope() == "global":
 
-				self.global_attribs.append(attrib.getJSON())
+				self.global_attribs.append(attrib.getDocument())
 
 	# ----------------------------------------
 
@@ -192,27 +472,38 @@ class HouGeo(object):
 			centroid.append(0.0)
 
 		cs_attrib = attrib.HouAttribute("sr_cs", "global", "string", cs)
-		self.global_attribs.append(cs_attrib.getJSON())
+		self.global_attribs.append(cs_attrib.getDocument())
 
-		x_attrib = attrib.HouAttribute("sr_cent_x", "global", "float", centroid[0])
-		self.global_attribs.append(x_attrib.getJSON())
+		x_attrib = attrib.HouAttribute("sr_cent_x", "global", "float", centroid[0], storage=self.getStorage("sr_cent_x"))
+		self.global_attribs.append(x_attrib.getDocument())
 
-		y_attrib = attrib.HouAttribute("sr_cent_y", "global", "float", centroid[2])
-		self.global_attribs.append(y_attrib.getJSON())
+		y_attrib = attrib.HouAttribute("sr_cent_y", "global", "float", centroid[2], storage=self.getStorage("sr_cent_y"))
+		self.global_attribs.append(y_attrib.getDocument())
 
-		z_attrib = attrib.HouAttribute("sr_cent_z", "global", "float", centroid[1])
-		self.global_attribs.append(z_attrib.getJSON())
+		z_attrib = attrib.HouAttribute("sr_cent_z", "global", "float", centroid[1], storage=self.getStorage("sr_cent_z"))
+		self.global_attribs.append(z_attrib.getDocument())
 
 	# ----------------------------------------
 
-	def getJSON(self):
+	def getDocument(self, deterministic=False):
+
+		'''
+		Returns the .geo document structure, with the values of the numeric attributes as
+		their HouColumn (see attrib.HouAttribute.getDocument) for the encoders. When
+		deterministic is set the date and hostname are left out of the info block so the
+		same geometry always encodes to the same bytes.
+		'''
 
 		info = collections.OrderedDict()
 
 		info["artist"] = "HAL9000"
 		info["software"] = "FME"
-		info["date"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-		info["hostname"] = socket.gethostname()
+
+		if not deterministic:
+
+			info["date"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+			info["hostname"] = socket.gethostname()
+
 		info["bounds"] = self.bounds
 		info["attribute_summary"] = "     {} point attributes:\tP\n".format(len(self.pt_attribs))
 
@@ -241,4 +532,269 @@ class HouGeo(object):
 			"edgegroups",self.edge_groups
 		]
 
-		return geo
\ No newline at end of file
+		return geo
+
+	# ----------------------------------------
+
+	def getJSON(self, deterministic=False):
+
+		'''
+		Returns the .geo document structure as plain lists and dicts that json.dumps can encode
+		'''
+
+		return attrib.getPlainJSON(self.getDocument(deterministic))
+
+	# ----------------------------------------
+
+	def iterEncode(self, fmt="geo", chunk_size=CHUNK_SIZE, deterministic=False):
+
+		'''
+		Returns a generator over the encoded document: json text chunks for the "geo"
+		format and bytes chunks for the "bgeo" format
+		'''
+
+		if fmt == "bgeo":
+
+			return bgeo.iterDumps(self.getDocument(deterministic), chunk_size)
+
+		elif fmt == "geo":
+
+			return iterEncodeJSON(self.getDocument(deterministic), chunk_size)
+
+		raise ValueError("Unknown output format '{}', expected 'geo' or 'bgeo'".format(fmt))
+
+	# ----------------------------------------
+
+	def encode(self, fmt="geo", deterministic=False):
+
+		'''
+		Returns the whole encoded document: a json string for the "geo" format and
+		bytes for the "bgeo" format
+		'''
+
+		if fmt == "bgeo":
+
+			return b"".join(self.iterEncode(fmt, deterministic=deterministic))
+
+		return "".join(self.iterEncode(fmt, deterministic=deterministic))
+
+	# ----------------------------------------
+
+	def write(self, dest, fmt="geo", chunk_size=CHUNK_SIZE, deterministic=False):
+
+		'''
+		Streams the encoded document to dest, which is either a file path or an open
+		file-like object (text mode for "geo", binary mode for "bgeo")
+		'''
+
+		return writeChunks(self.iterEncode(fmt, chunk_size, deterministic), dest, fmt)
+
+# --------------------------------------------------------------------------
+
+'''
+This class builds one group per distinct value of an attribute (or of a callable applied
+to the geometry source of each feature, see source.py) while the features are being
+converted, e.g. a group of all polygons where attrib_zone == 'R1'. The boolRLE list of
+pairs for every group is extended as the elements stream in, so no per group boolean masks
+are ever materialised. The scope sets whether the groups are primitive or point groups.
+'''
+
+class HouGroupBuilder(object):
+
+	def __init__(self, key, scope="primitive", prefix=None):
+
+		self.key = key
+		self.scope = scope
+		self.count = 0
+
+		# Name the groups after the attribute unless a prefix is provided
+		if prefix is None:
+
+			if callable(key):
+
+				prefix = "group"
+
+			elif key.startswith("attrib_"):
+
+				prefix = key[7:]
+
+			else:
+
+				prefix = key
+
+		self.prefix = prefix
+
+		# Value -> [boolRLE list of pairs, element index at the end of its last run]
+		self.groups = collections.OrderedDict()
+
+	# ----------------------------------------
+
+	def getValue(self, feature):
+
+		if callable(self.key):
+
+			return self.key(feature)
+
+		return feature.getAttribute(self.key)
+
+	# ----------------------------------------
+
+	def add(self, value, n=1):
+
+		'''
+		Adds the next n elements (points or primitives in output order) to the group of value
+		'''
+
+		if n <= 0:
+
+			return
+
+		grp = self.groups.get(value)
+
+		if grp is None:
+
+			grp = [[], 0]
+			self.groups[value] = grp
+
+		rle = grp[0]
+
+		# Extend the last run when the elements directly follow it
+		if rle and grp[1] == self.count:
+
+			rle[-2] += n
+
+		else:
+
+			if self.count > grp[1]:
+				rle += [self.count - grp[1], False]
+
+			rle += [n, True]
+
+		self.count += n
+		grp[1] = self.count
+
+	# ----------------------------------------
+
+	def addFeature(self, feature, nprims=1, npoints=1):
+
+		'''
+		Adds the elements a converted feature produced, counted in points or primitives
+		depending on the scope of the groups
+		'''
+
+		self.add(self.getValue(feature), npoints if self.scope == "point" else nprims)
+
+	# ----------------------------------------
+
+	def getName(self, value, used):
+
+		# Houdini group names may only contain letters, numbers and underscores
+		name = re.sub(r"[^A-Za-z0-9_]", "_", "{}_{}".format(self.prefix, value))
+
+		unique = name
+		i = 1
+
+		while unique in used:
+
+			unique = "{}_{}".format(name, i)
+			i += 1
+
+		used.add(unique)
+
+		return unique
+
+	# ----------------------------------------
+
+	def getGroups(self):
+
+		'''
+		Returns (name, boolRLE) for every group, closing each list of pairs with the
+		elements that follow its last run
+		'''
+
+		groups = []
+		used = set()
+
+		for value, (rle, end) in self.groups.items():
+
+			if self.count > end:
+				rle = rle + [self.count - end, False]
+
+			groups.append((self.getName(value, used), rle))
+
+		return groups
+
+# --------------------------------------------------------------------------
+# Packed Primitive Functions
+# --------------------------------------------------------------------------
+
+'''
+Converts HouGeo bounds (the offset and swizzled minimum and maximum corners, whose axes
+are not necessarily ordered after the swizzle) into [xmin,xmax,ymin,ymax,zmin,zmax]
+'''
+
+def getAxisBounds(bounds):
+
+	axis_bounds = []
+
+	for i in range(3):
+
+		axis_bounds += [min(bounds[i], bounds[i + 3]), max(bounds[i], bounds[i + 3])]
+
+	return axis_bounds
+
+# --------------------------------------------------------------------------
+
+'''
+Creates a lightweight index HouGeo that references a set of tile files with one PackedDisk
+primitive each, so Houdini can cull and load the tiles on demand instead of reading them
+all. The tiles are given as (filename, HouGeo) pairs or as (filename, bounds, npoints,
+nprims) when the HouGeo objects have already been released, with the bounds in the HouGeo
+format. The point and primitive counts and the bounds of every tile are stored as
+primitive attributes on the index.
+'''
+
+def createPackedDiskIndex(tiles, centroid=None, cs="unknown"):
+
+	filenames = []
+	tile_bounds = []
+	npoints = []
+	nprims = []
+
+	for tile in tiles:
+
+		if len(tile) == 2:
+
+			tile = (tile[0], tile[1].bounds, tile[1].pt_count, tile[1].prim_count)
+
+		filenames.append(tile[0])
+		tile_bounds.append(getAxisBounds(tile[1]))
+		npoints.append(tile[2])
+		nprims.append(tile[3])
+
+	# The extent of all tiles in the HouGeo bounds format
+	bounds = [
+		min([b[0] for b in tile_bounds]), min([b[2] for b in tile_bounds]), min([b[4] for b in tile_bounds]),
+		max([b[1] for b in tile_bounds]), max([b[3] for b in tile_bounds]), max([b[5] for b in tile_bounds])
+	]
+
+	# One point at the centre of each tile carries its packed primitive
+	points = [((b[0] + b[1]) * 0.5, (b[2] + b[3]) * 0.5, (b[4] + b[5]) * 0.5) for b in tile_bounds]
+
+	hougeo = HouGeo(bounds)
+	hougeo.setPoints(points)
+	hougeo.setPackedDiskPrimitives(filenames, tile_bounds)
+
+	if centroid is not None:
+
+		hougeo.setSpatialRef(centroid, cs=cs)
+
+	hougeo.setAttribs([
+		attrib.HouAttribute("tile_path", "primitive", "string", filenames),
+		attrib.HouAttribute("tile_pointcount", "primitive", "int", npoints),
+		attrib.HouAttribute("tile_primcount", "primitive", "int", nprims),
+		attrib.HouAttribute("tile_boundsmin", "primitive", "vec3float", [b[0::2] for b in tile_bounds]),
+		attrib.HouAttribute("tile_boundsmax", "primitive", "vec3float", [b[1::2] for b in tile_bounds])
+	])
+
+	return hougeo
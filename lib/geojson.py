@@ -0,0 +1,424 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import json, collections, os, re, sys
+
+'''
+This module reads GeoJSON (a FeatureCollection document) and newline-delimited GeoJSON
+(one Feature per line, also accepting the RFC 8142 record separators) into geometry
+sources (see source.py), so that .geo files can be produced without FME. Newline-delimited
+input is read one line at a time and every feature is reduced to its coordinates and
+attribute values in a source.SourceBuffer as it is read, so neither the parsed json nor a
+Python object per feature is held. The buffers do hold every feature read until they are
+reset, unless they are spilled to temporary files past a budget. The command line converter
+resets them after converting the features of every value of a sorted property.
+
+The properties of the features become the 'attrib_' prefixed attributes the converter
+writes, with their names made valid for Houdini. Properties holding lists or objects are
+written as json strings.
+'''
+
+import importlib
+
+# The library folder is on sys.path, the sources are shared with convert.py (see utils.py)
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+if script_dir not in sys.path:
+	sys.path.append(script_dir)
+
+source = importlib.import_module("source")
+
+# File extensions read as newline-delimited GeoJSON
+NDJSON_EXTENSIONS = [".ndjson", ".jsonl", ".geojsonl", ".geojsons"]
+
+# --------------------------------------------------------------------------
+# Reading Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns True when a file should be read as newline-delimited GeoJSON
+'''
+
+def isNDJSON(path):
+
+	return os.path.splitext(path)[1].lower() in NDJSON_EXTENSIONS
+
+# --------------------------------------------------------------------------
+
+'''
+Generator over the features of a newline-delimited GeoJSON stream, skipping blank lines
+'''
+
+def iterNDJSONFeatures(stream):
+
+	for line in stream:
+
+		line = line.strip().lstrip("\x1e")
+
+		if line:
+
+			yield json.loads(line)
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the name of the coordinate system of a GeoJSON document from its (legacy) crs
+member, or None when it has none
+'''
+
+def getCoordSys(doc):
+
+	crs = doc.get("crs")
+
+	if isinstance(crs, dict) and isinstance(crs.get("properties"), dict):
+
+		return crs["properties"].get("name")
+
+	return None
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the GeoJSON positions as (x, y, z) tuples, 2D positions get a zero elevation
+'''
+
+def getPositions(positions):
+
+	return [(p[0], p[1], p[2] if len(p) > 2 else 0.0) for p in positions]
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the rings of a GeoJSON polygon as (coordinates, rings): the positions of every ring
+without its closing duplicate and the number of vertices of every ring, or None when the
+polygon has no holes
+'''
+
+def getPolygonRings(rings):
+
+	coords = []
+	sizes = []
+
+	for positions in rings:
+
+		ring = getPositions(positions)
+
+		if len(ring) > 1 and ring[0] == ring[-1]:
+
+			ring = ring[:-1]
+
+		# Holes too small to enclose anything are dropped
+		if sizes and len(ring) < 3:
+
+			continue
+
+		coords.extend(ring)
+		sizes.append(len(ring))
+
+	return coords, sizes if len(sizes) > 1 else None
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the parts of a GeoJSON geometry as (kind, coordinates, rings) with kind "point",
+"line" or "area". Multi geometries and geometry collections give one part per member. The
+coordinates of a polygon are those of its exterior ring followed by its holes, rings is the
+number of vertices of every ring when it has holes and None otherwise.
+'''
+
+def getGeometryParts(geometry):
+
+	if not geometry:
+
+		return []
+
+	gtype = geometry.get("type")
+	coords = geometry.get("coordinates")
+
+	if gtype == "Point":
+
+		return [("point", getPositions([coords]), None)]
+
+	elif gtype == "MultiPoint":
+
+		return [("point", getPositions([p]), None) for p in coords]
+
+	elif gtype == "LineString":
+
+		return [("line", getPositions(coords), None)]
+
+	elif gtype == "MultiLineString":
+
+		return [("line", getPositions(line), None) for line in coords]
+
+	elif gtype == "Polygon":
+
+		return [("area",) + getPolygonRings(coords)]
+
+	elif gtype == "MultiPolygon":
+
+		return [("area",) + getPolygonRings(rings) for rings in coords]
+
+	elif gtype == "GeometryCollection":
+
+		parts = []
+
+		for member in geometry.get("geometries", []):
+			parts += getGeometryParts(member)
+
+		return parts
+
+	return []
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the properties of a GeoJSON feature as 'attrib_' prefixed attributes
+'''
+
+def getAttributes(properties):
+
+	attributes = collections.OrderedDict()
+
+	for name, val in (properties or {}).items():
+
+		if isinstance(val, (list, dict)):
+
+			val = json.dumps(val)
+
+		attributes["attrib_" + re.sub(r"[^A-Za-z0-9_]", "_", name)] = val
+
+	return attributes
+
+# --------------------------------------------------------------------------
+
+'''
+Returns a value converted to an attribute type: values of a string attribute are written
+as json and values of a float attribute as floats
+'''
+
+def convertValue(val, atype):
+
+	if val is None:
+
+		return None
+
+	elif atype == "string" and not isinstance(val, str):
+
+		return json.dumps(val)
+
+	elif atype == "float" and not isinstance(val, float):
+
+		return float(val)
+
+	return val
+
+# --------------------------------------------------------------------------
+# Classes
+# --------------------------------------------------------------------------
+
+'''
+This class collects the geometry sources of GeoJSON features by kind ("point", "line" or
+"area") while keeping a single attribute schema per kind: the union of the attribute
+names in order of first appearance, each with one type. An attribute seen with integer and
+float values is a float attribute and one seen with a string is a string attribute, the
+values are converted accordingly when the sources are returned.
+'''
+
+class GeoJSONReader(object):
+
+	def __init__(self, cs=None, budget=0, spill_dir=None):
+
+		self.cs = cs
+		self.budget = budget
+		self.spill_dir = spill_dir
+		self.sources = collections.OrderedDict()
+		self.reset()
+
+	# ----------------------------------------
+
+	def reset(self):
+
+		'''
+		Starts a new batch of features (e.g. the next value of a sorted property), releasing
+		the source buffers of the features read so far and their temporary files. When a
+		budget (in bytes, shared between the three kinds) is given the buffers are spilled to
+		temporary files in spill_dir whenever they grow past it, see source.SourceBuffer.
+		'''
+
+		self.close()
+
+		budget = int(self.budget / 3)
+
+		self.sources = collections.OrderedDict([(kind, source.SourceBuffer(None, budget, self.spill_dir)) for kind in ("point", "line", "area")])
+		self.schemas = collections.OrderedDict([("point", collections.OrderedDict()), ("line", collections.OrderedDict()), ("area", collections.OrderedDict())])
+		self.bbxmin = [float("inf")] * 3
+		self.bbxmax = [float("-inf")] * 3
+
+	# ----------------------------------------
+
+	def close(self):
+
+		'''
+		Releases the source buffers and removes their temporary files
+		'''
+
+		for srcs in self.sources.values():
+			srcs.close()
+
+	# ----------------------------------------
+
+	def iterFeatures(self, path):
+
+		'''
+		Generator over the features of a GeoJSON or newline-delimited GeoJSON file ("-"
+		reads stdin), without adding them
+		'''
+
+		stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+
+		try:
+
+			if path == "-" or isNDJSON(path):
+
+				for feature in iterNDJSONFeatures(stream):
+					yield feature
+
+			else:
+
+				doc = json.load(stream)
+
+				if self.cs is None:
+					self.cs = getCoordSys(doc)
+
+				features = doc.get("features", []) if doc.get("type") == "FeatureCollection" else [doc]
+
+				for feature in features:
+					yield feature
+
+		finally:
+
+			if stream is not sys.stdin:
+				stream.close()
+
+	# ----------------------------------------
+
+	def read(self, path):
+
+		'''
+		Reads a GeoJSON or newline-delimited GeoJSON file ("-" reads stdin)
+		'''
+
+		for feature in self.iterFeatures(path):
+			self.addFeature(feature)
+
+	# ----------------------------------------
+
+	def addFeature(self, feature):
+
+		attributes = getAttributes(feature.get("properties"))
+		parts = collections.OrderedDict([("point", []), ("line", []), ("area", [])])
+
+		for kind, coords, rings in getGeometryParts(feature.get("geometry")):
+
+			if not coords:
+
+				continue
+
+			schema = self.schemas[kind]
+
+			for name, val in attributes.items():
+
+				atype = source.getValueType(val)
+
+				if atype is None:
+
+					continue
+
+				current = schema.get(name)
+
+				if current is None or current == atype:
+
+					schema[name] = atype
+
+				elif "string" in (current, atype):
+
+					schema[name] = "string"
+
+				else:
+
+					schema[name] = "float"
+
+			parts[kind].append(source.PlainSource(coords, attributes=attributes, cs=self.cs or "unknown", atypes=schema, rings=rings))
+
+			for coord in coords:
+
+				for i in range(3):
+
+					if coord[i] < self.bbxmin[i]:
+						self.bbxmin[i] = coord[i]
+
+					if coord[i] > self.bbxmax[i]:
+						self.bbxmax[i] = coord[i]
+
+		# The parts of a multi geometry share a single row of attribute values
+		for kind, srcs in parts.items():
+
+			self.sources[kind].appendParts(srcs)
+
+	# ----------------------------------------
+
+	def getBounds(self):
+
+		'''
+		Returns ((xmin, ymin, zmin), (xmax, ymax, zmax)) of every feature read
+		'''
+
+		return tuple(self.bbxmin), tuple(self.bbxmax)
+
+	# ----------------------------------------
+
+	def getSources(self, kind):
+
+		'''
+		Returns the source buffer of a kind with its values converted to the schema types.
+		Values of another type are kept in the value tables of the columns (see
+		source.SourceColumn) and converted there, the columns of the attributes whose type
+		changed after their first value (e.g. an int attribute with a float value later on)
+		are rewritten with the schema type.
+		'''
+
+		srcs = self.sources[kind]
+		schema = self.schemas[kind]
+
+		# The values of a spilled buffer are read back from its files
+		srcs.load()
+
+		for name, column in list(srcs.columns.items()):
+
+			atype = schema.get(name)
+
+			if atype is None:
+
+				continue
+
+			if atype == column.atype:
+
+				column.table = [convertValue(val, atype) for val in column.table]
+				column.lookup = {}
+
+				for i, val in enumerate(column.table):
+					column.lookup.setdefault((type(val), val), i)
+
+				continue
+
+			converted = source.SourceColumn(atype, column.first)
+
+			for row in range(column.first, srcs.nrows):
+
+				converted.append(convertValue(column.get(row), atype))
+
+			srcs.columns[name] = converted
+
+		return srcs
@@ -0,0 +1,704 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import array, collections, mmap, os, shutil, tempfile, weakref
+
+'''
+This module defines the geometry source protocol the conversion functions in convert.py
+are written against, so the converter does not depend on FME. A geometry source is any
+object providing the following methods:
+
+getCoords()          the raw (x, y, z) coordinates: the single point of a point, the vertices
+                     of a line, the rings of an area (each without its closing duplicate) or
+                     the vertex pool of a surface. A list of tuples or an (N,3) NumPy array.
+getRings()           for areas with holes the number of vertices of every ring in getCoords(),
+                     the boundary first and then the holes, None for a single ring or other
+                     geometry
+getFaces()           for surfaces (nverts, indices): the number of vertices of every face and
+                     the flat face vertex indices into getCoords(), None for other geometry
+getBounds()          ((xmin, ymin, zmin), (xmax, ymax, zmax)) of the coordinates
+getCoordSys()        the name of the coordinate system
+getAttribute(name)   the value of an attribute (by its full name, e.g. attrib_zone) or None
+getHouAttribs()      the 'attrib_' prefixed attributes as (name, type, value) entries with the
+                     prefix removed and the type one of "int", "float" or "string", the value
+                     may be None for an attribute the source does not have
+
+utils.FMESource adapts an FMEFeature to the protocol and PlainSource below holds plain
+Python (or NumPy) buffers, which makes it picklable and usable without an FME licence.
+SourceBuffer stores many point, line or area sources in flat columnar buffers, so large
+inputs can be collected without keeping a Python (or FME) object per source, and
+SourceSelection is a view of some of them (e.g. the sources of a tile).
+'''
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns the HouAttribute type of a plain Python value, or None when it is not supported
+'''
+
+def getValueType(val):
+
+	val = getPlainValue(val)
+
+	if isinstance(val, bool) or isinstance(val, int):
+
+		return "int"
+
+	elif isinstance(val, float):
+
+		return "float"
+
+	elif isinstance(val, str):
+
+		return "string"
+
+	return None
+
+# --------------------------------------------------------------------------
+
+'''
+Returns a NumPy scalar as the equivalent Python value and a NumPy array as a (nested) list,
+every other value is returned as it is
+'''
+
+def getPlainValue(val):
+
+	if np is not None and isinstance(val, (np.generic, np.ndarray)):
+
+		return val.tolist()
+
+	return val
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the ((xmin, ymin, zmin), (xmax, ymax, zmax)) extent of a sequence of coordinates
+'''
+
+def getCoordBounds(coords):
+
+	if np is not None and isinstance(coords, np.ndarray):
+
+		coords = coords.reshape(-1, 3)
+
+		return tuple(coords.min(axis=0).tolist()), tuple(coords.max(axis=0).tolist())
+
+	bbxmin = [float("inf")] * 3
+	bbxmax = [float("-inf")] * 3
+
+	for coord in coords:
+
+		for i in range(3):
+
+			if coord[i] < bbxmin[i]:
+				bbxmin[i] = coord[i]
+
+			if coord[i] > bbxmax[i]:
+				bbxmax[i] = coord[i]
+
+	return tuple(bbxmin), tuple(bbxmax)
+
+# --------------------------------------------------------------------------
+# Classes
+# --------------------------------------------------------------------------
+
+'''
+This class is a geometry source holding plain buffers. The attributes are given by their
+full name (only the 'attrib_' prefixed ones are converted) and their types are taken from
+the Python values unless they are supplied in atypes (name onto "int", "float" or "string").
+The coordinates may be an (N,3) NumPy array, the faces, rings and attribute values may be
+NumPy arrays and scalars as well and are handed out as plain Python values.
+'''
+
+class PlainSource(object):
+
+	def __init__(self, coords, faces=None, attributes=None, cs="unknown", atypes=None, rings=None):
+
+		self.coords = coords
+		self.faces = faces
+		self.rings = rings
+		self.attributes = attributes if attributes is not None else collections.OrderedDict()
+		self.cs = cs
+		self.atypes = atypes or {}
+		self.bounds = None
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		return self.coords
+
+	# ----------------------------------------
+
+	def getFaces(self):
+
+		if self.faces is None:
+
+			return None
+
+		nverts, indices = self.faces
+
+		return getPlainValue(nverts), getPlainValue(indices)
+
+	# ----------------------------------------
+
+	def getRings(self):
+
+		return getPlainValue(self.rings)
+
+	# ----------------------------------------
+
+	def getBounds(self):
+
+		if self.bounds is None:
+
+			self.bounds = getCoordBounds(self.coords)
+
+		return self.bounds
+
+	# ----------------------------------------
+
+	def getCoordSys(self):
+
+		return self.cs
+
+	# ----------------------------------------
+
+	def getAttribute(self, name):
+
+		return getPlainValue(self.attributes.get(name))
+
+	# ----------------------------------------
+
+	def getHouAttribs(self):
+
+		attribs = []
+
+		for name, val in self.attributes.items():
+
+			if name.startswith("attrib_"):
+
+				val = getPlainValue(val)
+				atype = self.atypes.get(name) or getValueType(val)
+
+				if atype is not None:
+
+					attribs.append((name[7:], atype, val))
+
+		return attribs
+
+# --------------------------------------------------------------------------
+
+'''
+This class stores the values of one attribute of a SourceBuffer as typed arrays: a kind per
+row (0 missing, 1 stored inline, 2 stored in the value table) and a value per row.
+"int" columns store int64 values and "float" columns doubles inline, every other value
+(strings, booleans, values of another type) is stored once in the table and referenced by
+its index. Rows before the first one with the attribute are not stored at all.
+'''
+
+class SourceColumn(object):
+
+	def __init__(self, atype, first):
+
+		self.atype = atype
+		self.first = first
+		self.kinds = array.array("b")
+		self.values = array.array("d" if atype == "float" else "q")
+		self.table = []
+		self.lookup = {}
+
+	# ----------------------------------------
+
+	def append(self, val):
+
+		if val is None:
+
+			self.kinds.append(0)
+			self.values.append(0)
+
+		elif self.atype == "int" and type(val) is int and -0x8000000000000000 <= val < 0x8000000000000000:
+
+			self.kinds.append(1)
+			self.values.append(val)
+
+		elif self.atype == "float" and type(val) is float:
+
+			self.kinds.append(1)
+			self.values.append(val)
+
+		else:
+
+			# Keyed on the type as well so that 1, 1.0 and True stay distinct
+			key = (type(val), val)
+
+			if key not in self.lookup:
+
+				self.lookup[key] = len(self.table)
+				self.table.append(val)
+
+			self.kinds.append(2)
+			self.values.append(self.lookup[key])
+
+	# ----------------------------------------
+
+	def get(self, index):
+
+		index -= self.first
+
+		if index < 0:
+
+			return None
+
+		kind = self.kinds[index]
+
+		if kind == 1:
+
+			return self.values[index]
+
+		elif kind == 2:
+
+			return self.table[int(self.values[index])]
+
+		return None
+
+# --------------------------------------------------------------------------
+
+'''
+This class stores point, line or area sources in flat columnar buffers: the coordinates of
+all sources in a single array of doubles with the offset of every source into it, the ring
+sizes of the areas with holes with the offset of every source into them, and one
+SourceColumn per attribute. The attribute values are stored in rows and every source has
+the index of its row, so the parts of a multi geometry share a single row. Besides the 'attrib_' prefixed attributes the attributes listed
+in names are kept (e.g. the attribute driving the groups). The buffer is a sequence of
+BufferedSource views, so it (or a list of its views) can be passed straight to the
+conversion functions in convert.py.
+
+When a budget (in bytes) is given, the arrays are appended to temporary files in spill_dir
+(the system temporary folder by default) every time they grow past it and are memory mapped
+once the buffer is read. The budget only bounds the buffer while the sources are collected:
+the value tables of the columns (one entry per distinct string or other non numeric value)
+stay in memory. The converter copies the coordinates straight from the files (see
+BufferedSource.getFlatCoords) but still holds the whole output (e.g. of a tile) in typed
+arrays: the coordinates, the points and the vertex indices. Call
+close() to remove the temporary files, they are also removed when the buffer is garbage
+collected or at exit (e.g. when the translation fails before the buffer is closed).
+'''
+
+class SourceBuffer(object):
+
+	def __init__(self, names=None, budget=0, spill_dir=None):
+
+		self.names = [name for name in (names or []) if name]
+		self.coords = array.array("d")
+		self.starts = array.array("q", [0])
+		self.rings = array.array("q")
+		self.ring_starts = array.array("q", [0])
+		self.rows = array.array("q")
+		self.columns = collections.OrderedDict()
+		self.cs = "unknown"
+		self.count = 0
+		self.nrows = 0
+		self.budget = budget
+		self.spill_dir = spill_dir or None
+		self.nbytes = 0
+		self.temp_dir = None
+		self.cleanup = None
+		self.maps = []
+
+	# ----------------------------------------
+
+	def __len__(self):
+
+		return self.count
+
+	# ----------------------------------------
+
+	def __getitem__(self, index):
+
+		if index < 0:
+			index += self.count
+
+		if index < 0 or index >= self.count:
+			raise IndexError("source index out of range")
+
+		self.load()
+
+		return BufferedSource(self, index)
+
+	# ----------------------------------------
+
+	def __iter__(self):
+
+		self.load()
+
+		for index in range(self.count):
+
+			yield BufferedSource(self, index)
+
+	# ----------------------------------------
+
+	def append(self, src):
+
+		'''
+		Copies the coordinates and attribute values of a geometry source into the buffers,
+		after which the source itself is no longer needed
+		'''
+
+		self.appendParts([src])
+
+	# ----------------------------------------
+
+	def appendParts(self, srcs):
+
+		'''
+		Copies the parts of a multi geometry, given as one geometry source per part, into
+		the buffers. Every part is stored as a source of its own but the attribute values are
+		copied once, from the first part, into a row all of the parts refer to.
+		'''
+
+		if not srcs:
+
+			return
+
+		ncoords = len(self.coords)
+		nrings = 0
+
+		for src in srcs:
+
+			start = len(self.coords)
+			coords = src.getCoords()
+
+			if np is not None and isinstance(coords, np.ndarray):
+
+				self.coords.extend(coords.astype(np.float64).ravel().tolist())
+
+			else:
+
+				for coord in coords:
+					self.coords.extend(coord)
+
+			self.starts.append(self.starts[-1] + (len(self.coords) - start) // 3)
+
+			# Only the areas with holes store their ring sizes
+			rings = src.getRings()
+			size = len(rings) if rings and len(rings) > 1 else 0
+
+			if size:
+				self.rings.extend(rings)
+
+			self.ring_starts.append(self.ring_starts[-1] + size)
+			self.rows.append(self.nrows)
+			nrings += size
+
+		if self.count == 0:
+			self.cs = srcs[0].getCoordSys()
+
+		# Collect the values of this row, the converted attributes first
+		row = collections.OrderedDict()
+
+		for aname, atype, val in srcs[0].getHouAttribs():
+
+			row["attrib_" + aname] = (atype, val)
+
+		for name in self.names:
+
+			if name not in row:
+
+				row[name] = (None, srcs[0].getAttribute(name))
+
+		for name, (atype, val) in row.items():
+
+			# New attributes start at this row
+			if val is not None and name not in self.columns:
+
+				self.columns[name] = SourceColumn(atype, self.nrows)
+
+		for name, column in self.columns.items():
+
+			column.append(row[name][1] if name in row else None)
+
+		self.count += len(srcs)
+		self.nrows += 1
+		self.nbytes += (len(self.coords) - ncoords) * 8 + nrings * 8 + len(srcs) * 24 + len(self.columns) * 9
+
+		if self.budget > 0 and self.nbytes > self.budget:
+
+			self.spill()
+
+	# ----------------------------------------
+
+	def getArrays(self):
+
+		'''
+		Returns the (file name, array) pairs of the buffers written to the spill files
+		'''
+
+		arrays = [("coords", self.coords), ("starts", self.starts), ("rings", self.rings), ("ring_starts", self.ring_starts), ("rows", self.rows)]
+
+		for i, column in enumerate(self.columns.values()):
+
+			arrays.append(("kinds_{}".format(i), column.kinds))
+			arrays.append(("values_{}".format(i), column.values))
+
+		return arrays
+
+	# ----------------------------------------
+
+	def spill(self):
+
+		'''
+		Appends the buffers to their temporary files and empties them. The last start
+		offsets stay in memory because the next source continues from them.
+		'''
+
+		if self.temp_dir is None:
+
+			self.temp_dir = tempfile.mkdtemp(prefix="fmehougeo_", dir=self.spill_dir)
+			self.cleanup = weakref.finalize(self, shutil.rmtree, self.temp_dir, True)
+
+		last = self.starts[-1]
+		last_ring = self.ring_starts[-1]
+
+		for name, values in self.getArrays():
+
+			if name == "starts" or name == "ring_starts":
+
+				values = values[:-1]
+
+			with open(os.path.join(self.temp_dir, name), "ab") as f:
+				values.tofile(f)
+
+		del self.coords[:]
+		del self.rings[:]
+		del self.rows[:]
+		self.starts = array.array("q", [last])
+		self.ring_starts = array.array("q", [last_ring])
+
+		for column in self.columns.values():
+
+			del column.kinds[:]
+			del column.values[:]
+
+		self.nbytes = 0
+
+	# ----------------------------------------
+
+	def load(self):
+
+		'''
+		Writes what is left of a spilled buffer to its files and replaces the arrays by
+		memory mapped views of the files. Nothing can be appended afterwards.
+		'''
+
+		if self.temp_dir is None or self.maps:
+
+			return
+
+		last = self.starts[-1]
+		last_ring = self.ring_starts[-1]
+
+		self.spill()
+
+		with open(os.path.join(self.temp_dir, "starts"), "ab") as f:
+			array.array("q", [last]).tofile(f)
+
+		with open(os.path.join(self.temp_dir, "ring_starts"), "ab") as f:
+			array.array("q", [last_ring]).tofile(f)
+
+		views = {}
+
+		for name, values in self.getArrays():
+
+			path = os.path.join(self.temp_dir, name)
+
+			if not os.path.exists(path) or os.path.getsize(path) == 0:
+
+				views[name] = array.array(values.typecode)
+
+				continue
+
+			with open(path, "rb") as f:
+				mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+			view = memoryview(mm).cast(values.typecode)
+			self.maps.append((mm, view))
+			views[name] = view
+
+		self.coords = views["coords"]
+		self.starts = views["starts"]
+		self.rings = views["rings"]
+		self.ring_starts = views["ring_starts"]
+		self.rows = views["rows"]
+
+		for i, column in enumerate(self.columns.values()):
+
+			column.kinds = views["kinds_{}".format(i)]
+			column.values = views["values_{}".format(i)]
+
+		self.budget = 0
+
+	# ----------------------------------------
+
+	def close(self):
+
+		'''
+		Releases the memory maps and removes the temporary files of a spilled buffer
+		'''
+
+		for mm, view in self.maps:
+
+			view.release()
+			mm.close()
+
+		self.maps = []
+
+		if self.temp_dir is not None:
+
+			self.cleanup()
+			self.temp_dir = None
+
+	# ----------------------------------------
+
+	def getBounds(self):
+
+		self.load()
+
+		return getCoordBounds(zip(self.coords[0::3], self.coords[1::3], self.coords[2::3]))
+
+# --------------------------------------------------------------------------
+
+'''
+This class is a sequence view of the sources of a sequence (a list of sources or a
+SourceBuffer) at the given indices, e.g. the sources of one tile. Only the indices are
+stored, the sources are looked up as they are read.
+'''
+
+class SourceSelection(object):
+
+	def __init__(self, srcs, indices):
+
+		self.srcs = srcs
+		self.indices = indices
+
+	# ----------------------------------------
+
+	def __len__(self):
+
+		return len(self.indices)
+
+	# ----------------------------------------
+
+	def __getitem__(self, index):
+
+		return self.srcs[self.indices[index]]
+
+	# ----------------------------------------
+
+	def __iter__(self):
+
+		for index in self.indices:
+
+			yield self.srcs[index]
+
+# --------------------------------------------------------------------------
+
+'''
+This class is the geometry source view of a single source in a SourceBuffer. Its
+attributes are those of the buffer, in the order they were first seen, with the values of
+its row (see SourceBuffer.appendParts) or None, so that the first source gives the
+converter every attribute of the buffer.
+'''
+
+class BufferedSource(object):
+
+	__slots__ = ("buffer", "index")
+
+	def __init__(self, buffer, index):
+
+		self.buffer = buffer
+		self.index = index
+
+	# ----------------------------------------
+
+	def getCoords(self):
+
+		start = self.buffer.starts[self.index] * 3
+		end = self.buffer.starts[self.index + 1] * 3
+		coords = self.buffer.coords
+
+		return list(zip(coords[start:end:3], coords[start + 1:end:3], coords[start + 2:end:3]))
+
+	# ----------------------------------------
+
+	def getFlatCoords(self):
+
+		'''
+		Returns the coordinates as the flat (x, y, z, x, ...) slice of the buffer, a view of
+		the memory mapped file when the buffer is spilled, so the converter can copy them
+		without a tuple per coordinate
+		'''
+
+		return self.buffer.coords[self.buffer.starts[self.index] * 3:self.buffer.starts[self.index + 1] * 3]
+
+	# ----------------------------------------
+
+	def getFaces(self):
+
+		return None
+
+	# ----------------------------------------
+
+	def getRings(self):
+
+		start = self.buffer.ring_starts[self.index]
+		end = self.buffer.ring_starts[self.index + 1]
+
+		return list(self.buffer.rings[start:end]) if end > start else None
+
+	# ----------------------------------------
+
+	def getBounds(self):
+
+		return getCoordBounds(self.getCoords())
+
+	# ----------------------------------------
+
+	def getCoordSys(self):
+
+		return self.buffer.cs
+
+	# ----------------------------------------
+
+	def getAttribute(self, name):
+
+		column = self.buffer.columns.get(name)
+
+		if column is None:
+
+			return None
+
+		return column.get(self.buffer.rows[self.index])
+
+	# ----------------------------------------
+
+	def getHouAttribs(self):
+
+		attribs = []
+		row = self.buffer.rows[self.index]
+
+		for name, column in self.buffer.columns.items():
+
+			if column.atype is not None and name.startswith("attrib_"):
+
+				attribs.append((name[7:], column.atype, column.get(row)))
+
+		return attribs
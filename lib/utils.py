@@ -2,7 +2,7 @@
 # Imports
 # --------------------------------------------------------------------------
 
-import fme, fmeobjects, json, os
+import fme, fmeobjects, collections, concurrent.futures, os, sys
 
 '''
 The following routine will import the required libraries from the python files in the
@@ -25,6 +25,22 @@ geo_spec = importlib.util.spec_from_file_location("geo", os.path.join(script_dir
 geo = importlib.util.module_from_spec(geo_spec)
 geo_spec.loader.exec_module(geo)
 
+'''
+The convert.py module is imported by name from the library folder (rather than from its
+file location) so that its functions can be pickled and run in the worker processes of a
+process pool, which find it on the same sys.path.
+'''
+
+if script_dir not in sys.path:
+	sys.path.append(script_dir)
+
+convert = importlib.import_module("convert")
+
+# Import the fmehougeo cache.py modules
+cache_spec = importlib.util.spec_from_file_location("cache", os.path.join(script_dir, "cache.py"))
+cache = importlib.util.module_from_spec(cache_spec)
+cache_spec.loader.exec_module(cache)
+
 
 # --------------------------------------------------------------------------
 # Vector Functions
@@ -85,403 +101,597 @@ def setBounds(offset, bbx):
 	# Return the bounds
 	return list(swizzleYZ(bbxmin.getXYZ()) + swizzleYZ(bbxmax.getXYZ()))
 
+# --------------------------------------------------------------------------
+
+'''
+The source extent and tiling functions do not depend on FME, they are defined in convert.py
+so that the command line converter shares them
+'''
+
+getSourceExtent = convert.getSourceExtent
+getSourceBounds = convert.getSourceBounds
+getTileIndex = convert.getTileIndex
+tileSources = convert.tileSources
+
 # --------------------------------------------------------------------------
 # Attribute Functions
 # --------------------------------------------------------------------------
 
 '''
-The following functions will only handle FME attributes that are prefixed with 
-'attrib_'. This has been done to enfore good attribute management and ensure 
-that all non-exposed/inbuilt attributes from FME are ignored.
+Only FME attributes that are prefixed with 'attrib_' are converted (see the attribute
+functions in convert.py), the FME attribute types are mapped onto the HouAttribute types
+'''
+
+def getHouAttribType(feature, attrib_name):
+
+	'''
+	Returns the HouAttribute type ("int", "float" or "string") for the FME attribute type of
+	an attribute, or None when the type is not supported
+	'''
+
+	atype = feature.getAttributeType(attrib_name)
+
+	if atype in [2,3,4,5,6,7,13,14]: # Value is an integer
+
+		return "int"
+
+	elif atype in [8,9,10]: # Value is a float
+
+		return "float"
+
+	elif atype in [11,12]: # Value is a string
+
+		return "string"
+
+	return None
+
+# --------------------------------------------------------------------------
+# Encoding Functions
+# --------------------------------------------------------------------------
+
+'''
+Encodes a HouGeo object into the requested output format. The "geo" format returns
+the ASCII json string and the "bgeo" format returns the Houdini binary json bytes.
+When a destination (file path or file-like object) is supplied the document is
+streamed to it in chunks instead and the destination is returned.
+'''
+
+def encodeHouGeo(hougeo, fmt="geo", dest=None):
+
+	if dest is not None:
+
+		return hougeo.write(dest, fmt)
+
+	return hougeo.encode(fmt)
+
+# --------------------------------------------------------------------------
+# FME Geometry Source Adapter
+# --------------------------------------------------------------------------
+
+'''
+This class adapts an FMEFeature to the geometry source protocol (see source.py) the
+conversion functions in convert.py are written against. The kind of geometry sets how the
+coordinates are read: "point" (FMEPoint), "line" (anything that can be read as an FMELine),
+"area" (the rings of an FMEArea) or "surface" (FMEMesh or FMEMultiSurface). The
+coordinates and faces are extracted once, on first use. A part of an aggregate geometry
+can be given as geom, the attributes are then still read from the feature.
 '''
 
-def createHouAttribs(feature, scope):
-	
-	attribs = []
+class FMESource(object):
+
+	def __init__(self, feature, kind, geom=None):
+
+		self.feature = feature
+		self.kind = kind
+		self.geom = geom
+		self.coords = None
+		self.faces = None
+		self.rings = None
+
+	# ----------------------------------------
+
+	def getGeometry(self):
+
+		return self.geom if self.geom is not None else self.feature.getGeometry()
+
+	# ----------------------------------------
+
+	def extract(self):
+
+		geom = self.getGeometry()
+
+		if self.kind == "point":
+
+			self.coords = [geom.getXYZ()]
+
+		elif self.kind == "area" and isinstance(geom, fmeobjects.FMEDonut):
+
+			self.coords, self.rings = getFMEDonutRings(geom)
 
-	for attrib_name in feature.getAllAttributeNames():
+		elif self.kind == "line" or self.kind == "area":
 
-		if attrib_name.startswith("attrib_"):
+			self.coords = getFMECoordinates(self.feature if self.geom is None else None, geom, self.kind)
 
-			aname = attrib_name[7:]
-			atype = feature.getAttributeType(attrib_name)
+		elif self.kind == "surface":
 
-			if atype in [2,3,4,5,6,7,13,14]: # Value is an integer
+			self.coords, self.faces = getFMESurfaceBuffers(geom)
 
-				attribs.append(attrib.HouAttribute(aname, scope, "int", 0))
+	# ----------------------------------------
 
-			elif atype in [8,9,10]: # Value is a float
+	def getCoords(self):
 
-				attribs.append(attrib.HouAttribute(aname, scope, "float", 0.0))
+		if self.coords is None:
+			self.extract()
 
-			elif atype in [11,12]: # Value is a string
+		return self.coords
 
-				attribs.append(attrib.HouAttribute(aname, scope, "string", ""))
+	# ----------------------------------------
 
-	return attribs
+	def getFaces(self):
+
+		if self.coords is None:
+			self.extract()
+
+		return self.faces
+
+	# ----------------------------------------
+
+	def getRings(self):
+
+		if self.coords is None:
+			self.extract()
+
+		return self.rings
+
+	# ----------------------------------------
+
+	def getBounds(self):
+
+		return self.getGeometry().boundingCube()
+
+	# ----------------------------------------
+
+	def getCoordSys(self):
+
+		return self.feature.getCoordSys()
+
+	# ----------------------------------------
+
+	def getAttribute(self, name):
+
+		return self.feature.getAttribute(name)
+
+	# ----------------------------------------
+
+	def getHouAttribs(self):
+
+		attribs = []
+
+		for attrib_name in self.feature.getAllAttributeNames():
+
+			if attrib_name.startswith("attrib_"):
+
+				atype = getHouAttribType(self.feature, attrib_name)
+
+				if atype is not None:
+
+					attribs.append((attrib_name[7:], atype, self.feature.getAttribute(attrib_name)))
+
+		return attribs
+
+	# ----------------------------------------
+
+	def toPlain(self):
+
+		'''
+		Returns the extracted buffers as a source.PlainSource, which holds no FME objects and
+		can therefore be pickled (to a worker process) and hashed (for the cache)
+		'''
+
+		attributes = collections.OrderedDict()
+		atypes = {}
+
+		for aname, atype, val in self.getHouAttribs():
+
+			attributes["attrib_" + aname] = val
+			atypes["attrib_" + aname] = atype
+
+		bbx = self.getBounds()
+
+		plain = convert.source.PlainSource(self.getCoords(), self.getFaces(), attributes, self.getCoordSys(), atypes, self.getRings())
+		plain.bounds = (tuple(bbx[0]), tuple(bbx[1]))
+
+		return plain
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the parts of an aggregate geometry (FMEMultiPoint, FMEMultiCurve, FMEMultiArea or
+any other FMEAggregate), flattening nested aggregates, or the geometry itself when it is
+not an aggregate
+'''
+
+def getFMEParts(geom):
+
+	if not isinstance(geom, fmeobjects.FMEAggregate):
+
+		return [geom]
+
+	parts = []
+
+	for part in geom:
+		parts += getFMEParts(part)
+
+	return parts
 
 # --------------------------------------------------------------------------
 
-def writeHouAttribs(feature_index, feature, attribs):
+'''
+Returns the geometry sources of point, line or area features. Every part of an aggregate
+becomes a source of its own reading its attributes from the same feature, so the parts
+share the attribute values of their feature instead of copies of it.
+'''
+
+def getFMESources(features, kind):
 
-	for attrib_name in feature.getAllAttributeNames():
+	srcs = []
 
-		for attrib in attribs:
+	for feature in features:
 
-			if "attrib_" + attrib.getName() == attrib_name:
-				
-				val = feature.getAttribute(attrib_name)
+		geom = feature.getGeometry()
 
-				if feature_index == 1:
+		if isinstance(geom, fmeobjects.FMEAggregate):
 
-					attrib.setFirstValue(val)
+			srcs.extend([FMESource(feature, kind, part) for part in getFMEParts(geom)])
 
-				else:
+		else:
 
-					attrib.appendValue(val)
+			srcs.append(FMESource(feature, kind))
 
-	return attribs
+	return srcs
 
 # --------------------------------------------------------------------------
 # FME Feature Conversion Functions
 # --------------------------------------------------------------------------
 
+'''
+Returns the raw (x, y, z) coordinates of a line or area feature (the boundary without its
+closing duplicate) as a list of tuples. Lines and polygons bounded by a line are read in
+one call with FMEFeature.getAllCoordinates, 2D coordinates get a z of 0. Other geometry
+(arcs, paths...) and the parts of aggregates (given without their feature) fall back to
+converting it to a line and reading its points one FMEPoint at a time.
+'''
+
+def getFMECoordinates(feature, geom, kind):
+
+	if feature is None:
+
+		bulk = False
+
+	elif kind == "line":
+
+		bulk = isinstance(geom, fmeobjects.FMELine)
+
+	else:
+
+		bulk = isinstance(geom, fmeobjects.FMEPolygon) and isinstance(geom.getBoundaryAsCurve(), fmeobjects.FMELine)
+
+	if bulk:
+
+		coords = feature.getAllCoordinates()
+
+		if coords and len(coords[0]) == 2:
+
+			coords = [(x, y, 0.0) for x, y in coords]
+
+		# Drop the last point of the boundary because it is a duplicate
+		return coords[:-1] if kind == "area" else coords
+
+	if kind == "line":
+
+		return [point.getXYZ() for point in geom.getAsLine().getPoints()]
+
+	# Drop the last point of the boundary because it is a duplicate
+	return [point.getXYZ() for point in geom.getBoundaryAsCurve().getAsLine().getPoints()[:-1]]
+
+# --------------------------------------------------------------------------
+
+'''
+Returns the rings of an FMEDonut as (coords, rings): the raw (x, y, z) coordinates of the
+outer boundary followed by those of every inner boundary (each without its closing
+duplicate) and the number of vertices of every ring.
+'''
+
+def getFMEDonutRings(geom):
+
+	curves = [geom.getOuterBoundaryAsCurve()]
+	curves += [geom.getInnerBoundaryAsCurve(i) for i in range(geom.numInnerBoundaries())]
+
+	coords = []
+	rings = []
+
+	for curve in curves:
+
+		# Drop the last point of the ring because it is a duplicate
+		ring = [point.getXYZ() for point in curve.getAsLine().getPoints()[:-1]]
+
+		coords.extend(ring)
+		rings.append(len(ring))
+
+	return coords, rings
+
+# --------------------------------------------------------------------------
+
 '''
 This function will ONLY operate on FMEMesh and FMEMultiSurface inputs. Please
 ensure that the geometry is supplied to the PythonCaller in either of these formats.
+It returns the vertex pool of the geometry and its faces as (nverts, indices): the
+number of vertices of every face and the flat face vertex indices into the pool.
 '''
 
-def processFMESurface(feature):
+def getFMESurfaceBuffers(geom):
 
-	nfaces = 0
 	nverts = []
 	vtxpool = []
 	indices = []
 
-	'''
-	Operate on singular FMEFeature
-	'''   
+	# Check it the geometry is and FMEMesh object
+	if isinstance(geom, fmeobjects.FMEMesh):
 
-	if feature.hasGeometry():
+		mesh = geom
 
-		# Get the feature's geometry
-		geom = feature.getGeometry()
+		'''
+		Operating on FMEMesh
+		'''
+
+		# track number of vertices per face
+		vtxpool.extend(mesh.getVertices())
+
+		# Keep track of the vertex indices mapping per mesh
+		meshindices = []
+		
+		for face in mesh:
+
+			'''
+			Operating on FMEFace
+			'''
 
-		# Set the offset
-		centroid = getCentroid(geom)
-		offset = fmeobjects.FMEPoint(-centroid[0], -centroid[1], 0.0)
+			# Get the vertex indices for the face and drop the last entry
+			vindices = face.getVertexIndices()[:-1]
 
-		# Set the offset bounds of the geometry
-		bounds = setBounds(offset, fmeobjects.FMEBox((
-			geom.boundingCube()[0][0],
-			geom.boundingCube()[0][1],
-			geom.boundingCube()[0][2],
-			geom.boundingCube()[1][0],
-			geom.boundingCube()[1][1],
-			geom.boundingCube()[1][2]
-		)))
+			# Extend the mesh indices per face
+			meshindices.extend(vindices)
 
-		# Check it the geometry is and FMEMesh object
-		if isinstance(geom, fmeobjects.FMEMesh):
+			# Insert the number of vertices per face into the list
+			nverts.append(len(vindices))
 
-			mesh = geom
+		# A single mesh needs no rebasing, its indices are the overall indices
+		indices.extend(meshindices)
+
+	# Check if the geometry is an FMEMultiSurface object (a colleciton of FMEMeshes)
+	elif isinstance(geom, fmeobjects.FMEMultiSurface):
+
+		'''
+		Operating on FMEMultiSurface
+		'''
+
+		for mesh in geom:
 
 			'''
 			Operating on FMEMesh
 			'''
-
-			# Get the number of faces that comprise this mesh and track
-			nfaces += mesh.numParts()
-
-			# track number of vertices per face
+			vtxbase = len(vtxpool)
 			vtxpool.extend(mesh.getVertices())
-
-			# Keep track of the vertex indices mapping per mesh
 			meshindices = []
-			
+
 			for face in mesh:
 
 				'''
 				Operating on FMEFace
 				'''
-
-				# Get the vertex indices for the face and drop the last entry
 				vindices = face.getVertexIndices()[:-1]
-
-				# Extend the mesh indices per face
 				meshindices.extend(vindices)
-
-				# Insert the number of vertices per face into the list
 				nverts.append(len(vindices))
 
-			# Compile and insert the vertex indices back into the overall indices
-			if len(indices) > 0:
+			# Rebase the mesh indices against the running vertex base offset
+			# rather than rescanning the accumulated indices (keeps this O(n))
+			if vtxbase > 0:
 
-				indices.extend([(max(indices) + 1) + i for i in meshindices])
+				indices.extend([vtxbase + i for i in meshindices])
 
 			else:
 
 				indices.extend(meshindices)
 
-		# Check if the geometry is an FMEMultiSurface object (a colleciton of FMEMeshes)
-		elif isinstance(geom, fmeobjects.FMEMultiSurface):
+	else:
 
-			'''
-			Operating on FMEMultiSurface
-			'''
+		print("ERROR: Please coerce the geometry into the FMEMesh or FMEMultiSurface format")
 
-			for mesh in geom:
+	return vtxpool, (nverts, indices)
 
-				'''
-				Operating on FMEMesh
-				'''
-				nfaces += mesh.numParts()
-				vtxpool.extend(mesh.getVertices())
-				meshindices = []
-
-				for face in mesh:
+# --------------------------------------------------------------------------
 
-					'''
-					Operating on FMEFace
-					'''
-					vindices = face.getVertexIndices()[:-1]
-					meshindices.extend(vindices)
-					nverts.append(len(vindices))
+'''
+Returns the surface of a feature as a source.PlainSource, or None when the feature has
+no geometry
+'''
 
-				if len(indices) > 0:
+def getFMESurfaceSource(feature):
 
-					indices.extend([(max(indices) + 1) + i for i in meshindices])
+	if feature.hasGeometry():
 
-				else:
+		return FMESource(feature, "surface").toPlain()
 
-					indices.extend(meshindices)
+	return None
 
-		else:
+# --------------------------------------------------------------------------
 
-			print("ERROR: Please coerce the geometry into the FMEMesh or FMEMultiSurface format")
+def convertFMESurface(feature, precision=None, storage=None, weld=None):
 
-		'''
-		The next two blocks create a number of vertices per primitive relational list of 
-		pairs (rle) whereby the first value is the number of vertices per primitve and 
-		the second value is the number of primitives that have this topology
-		'''
+	src = getFMESurfaceSource(feature)
 
-		# Group the nverts list by number
-		nvert_grps = []
+	if src is not None:
 
-		for n in nverts:
-		
-			if nvert_grps and nvert_grps[-1][0] == n:
+		return convert.convertSurface(src, precision, storage, weld)
 
-				nvert_grps[-1].append(n)
+# --------------------------------------------------------------------------
 
-			else:
+'''
+This function will ONLY operate on FMEPoint and FMEMultiPoint features, every point of a
+multi point becomes a point carrying the attributes of its feature. Point groups can be
+generated from attribute values by supplying geo.HouGroupBuilder objects.
+'''
 
-				nvert_grps.append([n])
+def convertFMEPoints(features, centroid, offset, bounds, groups=None, precision=None, storage=None):
 
-		# Create the vertex/primitives relational list
-		rle = []
+	return convert.convertPoints(getFMESources(features, "point"), centroid, offset, bounds, groups, precision, storage)
 
-		for grp in nvert_grps:
+# --------------------------------------------------------------------------
 
-			rle.extend([grp[0], len(grp)])
+'''
+This function will ONLY operate on FMECurve and FMEMultiCurve features, every curve of a
+multi curve becomes a primitive carrying the attributes of its feature. Primitive (or
+point) groups can be generated from attribute values by supplying geo.HouGroupBuilder
+objects.
+'''
 
-		# Convert the vertices back into FMEPoint objects and offset accordingly
-		points = []
+def convertFMELines(features, centroid, offset, bounds, groups=None, precision=None, storage=None, weld=None):
 
-		for point in [fmeobjects.FMEPoint(vtx[0], vtx[1], vtx[2]) for vtx in vtxpool]:
+	return convert.convertLines(getFMESources(features, "line"), centroid, offset, bounds, groups, precision, storage, weld)
 
-			point.offset(offset)
-			points.append(swizzleYZ(point.getXYZ()))
+# --------------------------------------------------------------------------
 
-		# Create Houdini .geo string
-		hougeo = geo.HouGeo(bounds)
-		hougeo.setPoints(points)
-		hougeo.setIndices(indices)
-		hougeo.setPrimitives("face", nfaces, sum(nverts), rle)
-		hougeo.setSpatialRef(centroid, cs=feature.getCoordSys())
+'''
+This function will ONLY operate on FMEArea and FMEMultiArea features, every area of a
+multi area becomes a primitive carrying the attributes of its feature. The holes of
+FMEDonut features are converted as set by holes (see convert.convertPolygons). Primitive
+(or point) groups can be generated from attribute values by supplying geo.HouGroupBuilder
+objects.
+'''
 
-		# Write attributes to .geo
-		detail_attribs = createHouAttribs(feature, "global")
-		detail_attribs = writeHouAttribs(1, feature, detail_attribs)
-		hougeo.setAttribs(detail_attribs)
+def convertFMEAreas(features, centroid, offset, bounds, groups=None, precision=None, storage=None, weld=None, holes="separate"):
 
-		# Return .geo string
-		return json.dumps(hougeo.getJSON(), separators=(',',':'), indent=None)
+	return convert.convertAreas(getFMESources(features, "area"), centroid, offset, bounds, groups, precision, storage, weld, holes)
 
 # --------------------------------------------------------------------------
+# FME Feature Processing Functions
+# --------------------------------------------------------------------------
 
 '''
-This function will ONLY operate on FMEPoint features. It will not ingest Muti Point
-features, these must be deagregated before feeding into this function.
+The process functions convert the features and encode the resulting HouGeo object in one
+step, returning the .geo string (or .bgeo bytes, or the destination it was streamed to).
+Use the convert functions directly when the HouGeo object itself is needed, e.g. to read
+its bounds and element counts after writing it.
 '''
 
-def processFMEPoints(features, centroid, offset, bounds):
-
-	npoints = 0
-	points = []
+def processFMESurface(feature, fmt="geo", dest=None, geo_cache=None, precision=None, storage=None, weld=None):
 
 	'''
-	Operate array of FMEFeatures
-	''' 
-	
-	# Create .geo attribute template from first feature
-	point_attribs = createHouAttribs(features[0], "point")
+	When a cache.HouGeoCache is supplied the document is looked up by the hash of the
+	extracted source buffers and only converted when it is not found. Cached documents are encoded
+	deterministically (without the date and hostname) so they can be reused as they are.
+	'''
 
-	# Loop through features
-	for feature in features:
+	if geo_cache is None:
 
-		'''
-		Operate singular on FMEFeature
-		''' 
+		hougeo = convertFMESurface(feature, precision, storage, weld)
 
-		# Get the FMEPoint
-		point = feature.getGeometry()
-		point.offset(offset)
-		points.append(swizzleYZ(point.getXYZ()))
+		if hougeo is not None:
 
-		# Increment point number
-		npoints += 1
+			return encodeHouGeo(hougeo, fmt, dest)
 
-		# Write attributes for this point only
-		point_attribs = writeHouAttribs(npoints, feature, point_attribs)
+		return None
 
-	# Create Houdini .geo string
-	hougeo = geo.HouGeo(bounds)
-	hougeo.setPoints(points)
-	hougeo.setSpatialRef(centroid, cs=feature.getCoordSys())
+	src = getFMESurfaceSource(feature)
 
-	# Write attributes to .geo
-	hougeo.setAttribs(point_attribs)
+	if src is None:
 
-	# Return .geo string
-	return json.dumps(hougeo.getJSON(), separators=(',',':'), indent=None)
+		return None
 
-# --------------------------------------------------------------------------
+	key = cache.getSourceKey(src, fmt, precision, storage, weld)
+	data = geo_cache.get(key, fmt)
 
-'''
-This function will ONLY operate on FMECurve features. It will not ingest Muti Curve
-features, these must be deagregated before feeding into this function.
-'''
+	if data is None:
 
-def processFMELines(features, centroid, offset, bounds):
+		data = convert.encodeSurface(src, fmt, True, precision, storage, weld)
+		geo_cache.put(key, data, fmt)
 
-	nprims = 0
-	points = []
-	prim_run = []
-	
-	'''
-	Operate array of FMEFeatures
-	''' 
-	
-	# Create .geo attribute template from first feature
-	prim_attribs = createHouAttribs(features[0], "primitive")
+	if dest is not None:
 
-	# Loop through features
-	for feature in features:
+		return geo.writeChunks([data], dest, fmt)
 
-		'''
-		Operate singular on FMEFeature
-		''' 
+	return data
 
-		# Get the feature geometry as an FMELine
-		this_line = feature.getGeometry().getAsLine()
+# --------------------------------------------------------------------------
 
-		# Get the list of FMEPoints
-		this_points = this_line.getPoints()
+'''
+Parallel counterpart of processFMESurface. The plain buffers (a source.PlainSource) are
+extracted from the feature on the calling (FME) thread and their conversion and encoding
+is submitted to an executor, normally a concurrent.futures.ProcessPoolExecutor. Returns
+the future and the cache key of the document (None when there is nothing to store), pass
+both on to finishFMESurface once the future is done. Cache hits and features without geometry return a completed future.
+'''
 
-		# Offset and append points
-		for point in this_points:
+def submitFMESurface(executor, feature, fmt="geo", geo_cache=None, precision=None, storage=None, weld=None):
 
-			# Get the FMEPoint
-			point.offset(offset)
-			points.append(swizzleYZ(point.getXYZ()))
+	src = getFMESurfaceSource(feature)
+	key = None
+	data = None
 
-		# Keep track of the amount of points per line
-		prim_run.append(len(this_points))
+	if src is not None and geo_cache is not None:
 
-		# Keep track of the number of lines
-		nprims += 1
+		key = cache.getSourceKey(src, fmt, precision, storage, weld)
+		data = geo_cache.get(key, fmt)
 
-		# Write the attributes
-		prim_attribs = writeHouAttribs(nprims, feature, prim_attribs)
+	if src is None or data is not None:
 
-	# Create Houdini .geo string
-	hougeo = geo.HouGeo(bounds)
-	hougeo.setPoints(points)
-	hougeo.setIndices([i for i in range(len(points))])
-	hougeo.setPrimitives("open", nprims, len(points), prim_run)
-	hougeo.setSpatialRef(centroid, cs=feature.getCoordSys())
+		future = concurrent.futures.Future()
+		future.set_result(data)
 
-	# Write attributes to .geo
-	hougeo.setAttribs(prim_attribs)
+		return future, None
 
-	# Return .geo string
-	return json.dumps(hougeo.getJSON(), separators=(',',':'), indent=None)
+	# Cached documents are encoded deterministically (see processFMESurface)
+	return executor.submit(convert.encodeSurface, src, fmt, key is not None, precision, storage, weld), key
 
 # --------------------------------------------------------------------------
 
 '''
-This function will ONLY operate on FMEArea features. It will not ingest Muti Area
-features, these must be deagregated before feeding into this function. Also this function
-also requires that polygon holes (donuts) are also pre-processed with an additional ptype
-(shell or hole) attribute to provide the best results.
+Stores the document of a submitted feature in the cache and writes it to dest when given.
+Returns the .geo string (or .bgeo bytes, or the destination it was written to).
 '''
 
-def processFMEAreas(features, centroid, offset, bounds):
+def finishFMESurface(future, key, fmt="geo", dest=None, geo_cache=None):
 
-	nprims = 0
-	points = []
-	prim_run = []
-	
-	'''
-	Operate array of FMEFeatures
-	''' 
-	
-	# Create .geo attribute template from first feature
-	prim_attribs = createHouAttribs(features[0], "primitive")
+	data = future.result()
 
-	# Loop through features
-	for feature in features:
+	if data is None:
 
-		'''
-		Operate singular on FMEFeature
-		''' 
+		return None
 
-		# Get the feature geometry of as an FMEArea
-		this_area = feature.getGeometry()
-		
-		# Get the boundary of the area as an FMELine
-		this_boundary = this_area.getBoundaryAsCurve().getAsLine()
+	if key is not None:
 
-		# Get the list of FMEPoints (dropping the last point because it is a duplicate)
-		this_points = this_boundary.getPoints()[:-1]
+		geo_cache.put(key, data, fmt)
 
-		# Offset and append points
-		for point in this_points:
+	if dest is not None:
 
-			# Get the FMEPoint
-			point.offset(offset)
-			points.append(swizzleYZ(point.getXYZ()))
+		return geo.writeChunks([data], dest, fmt)
 
-		# Keep track of the amount of points per line
-		prim_run.append(len(this_points))
+	return data
 
-		# Keep track of the number of areas
-		nprims += 1
+# --------------------------------------------------------------------------
 
-		# Write the attributes
-		prim_attribs = writeHouAttribs(nprims, feature, prim_attribs)
+def processFMEPoints(features, centroid, offset, bounds, fmt="geo", dest=None, groups=None, precision=None, storage=None):
 
-	# Create Houdini .geo string
-	hougeo = geo.HouGeo(bounds)
-	hougeo.setPoints(points)
-	hougeo.setIndices([i for i in range(len(points))])
-	hougeo.setPrimitives("closed", nprims, len(points), prim_run)
-	hougeo.setSpatialRef(centroid, cs=feature.getCoordSys())
+	return encodeHouGeo(convertFMEPoints(features, centroid, offset, bounds, groups, precision, storage), fmt, dest)
+
+# --------------------------------------------------------------------------
+
+def processFMELines(features, centroid, offset, bounds, fmt="geo", dest=None, groups=None, precision=None, storage=None, weld=None):
+
+	return encodeHouGeo(convertFMELines(features, centroid, offset, bounds, groups, precision, storage, weld), fmt, dest)
+
+# --------------------------------------------------------------------------
 
-	# Write attributes to .geo
-	hougeo.setAttribs(prim_attribs)
+def processFMEAreas(features, centroid, offset, bounds, fmt="geo", dest=None, groups=None, precision=None, storage=None, weld=None, holes="separate"):
 
-	# Return .geo string
-	return json.dumps(hougeo.getJSON(), separators=(',',':'), indent=None)
\ No newline at end of file
+	return encodeHouGeo(convertFMEAreas(features, centroid, offset, bounds, groups, precision, storage, weld, holes), fmt, dest)
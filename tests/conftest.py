@@ -0,0 +1,15 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import os, sys
+
+'''
+The tests import the fmehougeo modules by name from the lib folder, and the FME objects
+from the stand-in fmeobjects module of the benchmarks so that they run outside of FME
+'''
+
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+
+sys.path.insert(0, os.path.join(tests_dir, "..", "lib"))
+sys.path.insert(0, os.path.join(tests_dir, "..", "bench", "fmestub"))
@@ -0,0 +1,145 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import array, struct
+
+'''
+Helpers shared by the tests: a reader for the binary .bgeo encoding written by bgeo.py and
+a normalisation of the document structure so that a .geo and a .bgeo document of the same
+geometry compare equal.
+'''
+
+# Typecodes of the binary value tokens (see bgeo.py)
+TOKEN_TYPECODES = {0x11: "b", 0x12: "h", 0x13: "i", 0x14: "q", 0x19: "f", 0x1a: "d", 0x21: "B", 0x22: "H"}
+
+FLOAT32 = struct.Struct("<f")
+
+# --------------------------------------------------------------------------
+# Functions
+# --------------------------------------------------------------------------
+
+'''
+Returns the document structure of .bgeo bytes
+'''
+
+def loadBGEO(data):
+
+	assert data[0] == 0x7f and struct.unpack_from("<I", data, 1)[0] == 0x624a534e
+
+	pos = [5]
+
+	def read(fmt):
+
+		val = struct.unpack_from("<" + fmt, data, pos[0])[0]
+		pos[0] += struct.calcsize("<" + fmt)
+
+		return val
+
+	def readLength():
+
+		n = read("B")
+
+		if n < 0xf1:
+
+			return n
+
+		return read({0xf2: "H", 0xf4: "I", 0xf8: "q"}[n])
+
+	def readValue():
+
+		token = read("B")
+
+		if token == 0x00:
+
+			return None
+
+		elif token in (0x30, 0x31):
+
+			return token == 0x31
+
+		elif token in TOKEN_TYPECODES:
+
+			return read(TOKEN_TYPECODES[token])
+
+		elif token == 0x27:
+
+			n = readLength()
+			pos[0] += n
+
+			return data[pos[0] - n:pos[0]].decode("utf-8")
+
+		elif token == 0x5b:
+
+			values = []
+
+			while data[pos[0]] != 0x5d:
+				values.append(readValue())
+
+			pos[0] += 1
+
+			return values
+
+		elif token == 0x7b:
+
+			values = {}
+
+			while data[pos[0]] != 0x7d:
+				key = readValue()
+				values[key] = readValue()
+
+			pos[0] += 1
+
+			return values
+
+		elif token == 0x40:
+
+			values = array.array(TOKEN_TYPECODES[read("B")])
+			n = readLength() * values.itemsize
+			values.frombytes(data[pos[0]:pos[0] + n])
+			pos[0] += n
+
+			return values.tolist()
+
+		raise ValueError("Unknown token {:#x}".format(token))
+
+	document = readValue()
+
+	assert pos[0] == len(data)
+
+	return document
+
+# --------------------------------------------------------------------------
+
+'''
+Returns a copy of a document structure with the vector values written component-wise
+("arrays" of components, as in .bgeo) turned back into "tuples" and the floats rounded to
+float32, so that documents of both encodings can be compared
+'''
+
+def getComparable(obj):
+
+	if isinstance(obj, dict):
+
+		return dict([(key, getComparable(val)) for key, val in obj.items()])
+
+	elif isinstance(obj, float):
+
+		return FLOAT32.unpack(FLOAT32.pack(obj))[0]
+
+	elif not isinstance(obj, list):
+
+		return obj
+
+	values = [getComparable(val) for val in obj]
+
+	for i in range(len(values) - 1):
+
+		val = values[i + 1]
+
+		if values[i] == "arrays" and isinstance(val, list) and len(val) > 1 and all(isinstance(c, list) for c in val):
+
+			values[i] = "tuples"
+			values[i + 1] = [list(t) for t in zip(*val)]
+
+	return values
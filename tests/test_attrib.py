@@ -0,0 +1,164 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import json
+
+import pytest
+
+import attrib, geo
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def getValues(hou_attrib):
+
+	return hou_attrib.getJSON()[1][-1][-1]
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_int64_values_widen_the_storage():
+
+	hou_attrib = attrib.HouAttribute("osm_id", "point", "int", [1, 9876543210])
+
+	assert hou_attrib.getJSON()[1][3] == "int64"
+	assert getValues(hou_attrib) == [[1, 9876543210]]
+
+# --------------------------------------------------------------------------
+
+def test_values_are_held_in_the_declared_storage():
+
+	ids = attrib.HouAttribute("id", "point", "int", [1, 2])
+	heights = attrib.HouAttribute("height", "point", "float", [0.1, 2.5])
+
+	assert ids.values.getData().itemsize == 4
+	assert heights.values.getData().itemsize == 4
+
+	ids.appendValue(9876543210)
+
+	assert ids.values.getData().itemsize == 8
+	assert getValues(ids) == [[1, 2, 9876543210]]
+
+# --------------------------------------------------------------------------
+
+def test_float32_values_are_written_without_noise_digits():
+
+	hou_attrib = attrib.HouAttribute("height", "point", "float", [0.1, 1 / 3, 530000.1])
+
+	assert hou_attrib.getJSON()[1][3] == "fpreal32"
+	assert getValues(hou_attrib) == [[0.1, 0.33333334, 530000.1]]
+
+# --------------------------------------------------------------------------
+
+def test_floats_beyond_float32_widen_the_storage():
+
+	hou_attrib = attrib.HouAttribute("height", "point", "float", [0.1, 1e40])
+
+	assert hou_attrib.getJSON()[1][3] == "fpreal64"
+	assert getValues(hou_attrib) == [[0.1, 1e40]]
+
+# --------------------------------------------------------------------------
+
+def test_fraction_turns_an_int_attribute_into_a_float_attribute():
+
+	hou_attrib = attrib.HouAttribute("height", "point", "int", [1, 2])
+	hou_attrib.appendValue(2.5)
+	hou_attrib.appendValue(3.0)
+
+	assert hou_attrib.getJSON()[1][3] == "fpreal32"
+	assert getValues(hou_attrib) == [[1.0, 2.0, 2.5, 3.0]]
+
+# --------------------------------------------------------------------------
+
+def test_numeric_strings_are_parsed():
+
+	hou_attrib = attrib.HouAttribute("height", "point", "float", [1.5, "2", "2.25"])
+
+	assert getValues(hou_attrib) == [[1.5, 2.0, 2.25]]
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("val", ["x", None, 2 ** 70])
+def test_values_that_cannot_be_stored_raise_a_value_error(val):
+
+	hou_attrib = attrib.HouAttribute("height", "point", "int", [1])
+
+	with pytest.raises(ValueError, match="height"):
+		hou_attrib.appendValue(val)
+
+	assert getValues(hou_attrib) == [[1]]
+
+# --------------------------------------------------------------------------
+
+def test_vector_values_are_appended_whole_or_not_at_all():
+
+	hou_attrib = attrib.HouAttribute("N", "point", "vec3int", [[1, 2, 3]])
+
+	with pytest.raises(ValueError):
+		hou_attrib.appendValue([4, "x", 6])
+
+	hou_attrib.appendValue([4, 5.5, 6])
+
+	assert getValues(hou_attrib) == [[1.0, 2.0, 3.0], [4.0, 5.5, 6.0]]
+
+# --------------------------------------------------------------------------
+
+def test_requested_int_storage_rejects_float_values():
+
+	hou_attrib = attrib.HouAttribute("class", "point", "int", [1, 2.5], storage="int8")
+
+	with pytest.raises(ValueError, match="class"):
+		hou_attrib.getJSON()
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("vals, storage", [
+	([0, 127], "int8"), ([-128, 0], "int8"), ([0, 128], "int16"), ([-129, 0], "int16"),
+	([0, 32767], "int16"), ([0, 32768], "int32"), ([-32769, 0], "int32"),
+	([0, 2 ** 31 - 1], "int32"), ([-2 ** 31, 0], "int32"), ([0, 2 ** 31], "int64"), ([-2 ** 31 - 1, 0], "int64")])
+@pytest.mark.parametrize("arrays", [False, True])
+def test_auto_storage_narrows_int_values(vals, storage, arrays):
+
+	if arrays:
+
+		vals = pytest.importorskip("numpy").array(vals, dtype="int64")
+
+	hou_attrib = attrib.HouAttribute("class", "point", "int", vals, storage="auto")
+
+	assert hou_attrib.getJSON()[1][3] == storage
+	assert getValues(hou_attrib) == [list(vals)]
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("vals, precision, storage", [
+	([0.5, 2.25], None, "fpreal32"), ([0.1], None, "fpreal64"), ([0.1, 2.25], 2, "fpreal32"),
+	([1e39], None, "fpreal64"), ([1, 2.5, 16777216], None, "fpreal32")])
+@pytest.mark.parametrize("numpy", [False, True])
+def test_auto_storage_keeps_float_values(vals, precision, storage, numpy, monkeypatch):
+
+	if numpy:
+
+		pytest.importorskip("numpy")
+
+	else:
+
+		monkeypatch.setattr(attrib, "np", None)
+
+	hou_attrib = attrib.HouAttribute("height", "point", "float", vals, precision=precision, storage="auto")
+
+	assert hou_attrib.getJSON()[1][3] == storage
+	assert getValues(hou_attrib) == [vals]
+
+# --------------------------------------------------------------------------
+
+def test_hougeo_json_can_be_dumped():
+
+	hougeo = geo.HouGeo([0.0, 0.0, 0.0, 3.0, 4.0, 5.456], precision={"P": 2})
+	hougeo.setPoints([(0.123, 1.0, 2.0), (3.0, 4.0, 5.456)])
+
+	document = json.loads(json.dumps(hougeo.getJSON(deterministic=True)))
+
+	assert document == json.loads(hougeo.encode("geo", deterministic=True))
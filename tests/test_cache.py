@@ -0,0 +1,55 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import os, time
+
+import pytest
+
+import cache
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_least_recently_used_documents_are_evicted_to_the_low_water_mark(tmp_path, monkeypatch):
+
+	geo_cache = cache.HouGeoCache(str(tmp_path), max_size=1000)
+
+	# Storing documents must not scan the cache folder
+	monkeypatch.setattr(geo_cache, "getEntries", pytest.fail)
+
+	for i in range(10):
+
+		geo_cache.put("{:02x}".format(i) * 32, "x" * 100)
+
+	assert geo_cache.size == 1000
+
+	# Using the oldest document makes it the most recently used one
+	assert geo_cache.get("00" * 32) == "x" * 100
+
+	geo_cache.put("ff" * 32, "y" * 100)
+
+	assert geo_cache.size <= 900
+	assert geo_cache.get("00" * 32) == "x" * 100
+	assert geo_cache.get("01" * 32) is None
+	assert geo_cache.get("02" * 32) is None
+	assert geo_cache.get("ff" * 32) == "y" * 100
+
+# --------------------------------------------------------------------------
+
+def test_reopened_cache_indexes_its_documents_by_use(tmp_path):
+
+	geo_cache = cache.HouGeoCache(str(tmp_path), max_size=1000)
+
+	for i in range(3):
+
+		geo_cache.put("{:02x}".format(i) * 32, b"z" * 200, "bgeo")
+
+	# Make the first document the most recently used one
+	os.utime(geo_cache.getPath("00" * 32, "bgeo"), (time.time() + 10, time.time() + 10))
+
+	geo_cache = cache.HouGeoCache(str(tmp_path), max_size=1000)
+
+	assert geo_cache.size == 600
+	assert list(geo_cache.entries)[-1] == geo_cache.getPath("00" * 32, "bgeo")
@@ -0,0 +1,202 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import json
+
+import pytest
+
+import convert, source
+
+from helpers import getComparable, loadBGEO
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def createSurface(np=None):
+
+	coords = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.5), (1.0, 1.0, 1.0), (0.0, 1.0, 0.5), (2.0, 0.5, 0.0)]
+	faces = ([4, 3], [0, 1, 2, 3, 1, 4, 2])
+	attributes = {"attrib_id": 9876543210, "attrib_height": 2.5, "attrib_name": "roof", "fme_type": "fme_area"}
+
+	if np is not None:
+
+		coords = np.array(coords)
+		faces = (np.array(faces[0], dtype=np.int32), np.array(faces[1], dtype=np.int64))
+		attributes = {"attrib_id": np.int64(9876543210), "attrib_height": np.float32(2.5), "attrib_name": np.str_("roof"), "fme_type": "fme_area"}
+
+	return source.PlainSource(coords, faces, attributes, "EPSG:28992")
+
+# --------------------------------------------------------------------------
+
+def createDonut():
+
+	boundary = [(0.0, 0.0, 0.0), (10.0, 0.0, 0.0), (10.0, 10.0, 0.0), (0.0, 10.0, 0.0)]
+
+	# A C shaped hole opening to the right and a square hole left of its wall
+	wall = [(6.0, 1.0, 0.0), (9.0, 1.0, 0.0), (9.0, 2.0, 0.0), (7.0, 2.0, 0.0), (7.0, 8.0, 0.0), (9.0, 8.0, 0.0), (9.0, 9.0, 0.0), (6.0, 9.0, 0.0)]
+	square = [(4.0, 4.5, 0.0), (4.0, 5.5, 0.0), (5.0, 5.5, 0.0), (5.0, 4.5, 0.0)]
+
+	return [boundary, wall, square]
+
+# --------------------------------------------------------------------------
+
+def getCrossings(ring):
+
+	def getCross(o, a, b):
+
+		return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+	crossings = []
+	n = len(ring)
+
+	for i in range(n):
+
+		for j in range(i + 2, n - (i == 0)):
+
+			p1, p2, q1, q2 = ring[i], ring[(i + 1) % n], ring[j], ring[(j + 1) % n]
+
+			if getCross(q1, q2, p1) * getCross(q1, q2, p2) < 0 and getCross(p1, p2, q1) * getCross(p1, p2, q2) < 0:
+
+				crossings.append((i, j))
+
+	return crossings
+
+# --------------------------------------------------------------------------
+
+def encodeBoth(hougeo):
+
+	document = json.loads(hougeo.encode("geo", deterministic=True))
+
+	return getComparable(document), getComparable(loadBGEO(hougeo.encode("bgeo", deterministic=True)))
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_surface_geo_and_bgeo_hold_the_same_document():
+
+	geo_doc, bgeo_doc = encodeBoth(convert.convertSurface(createSurface()))
+
+	assert geo_doc == bgeo_doc
+	assert geo_doc[geo_doc.index("pointcount") + 1] == 5
+	assert geo_doc[geo_doc.index("primitivecount") + 1] == 2
+
+# --------------------------------------------------------------------------
+
+def test_numpy_surface_is_encoded_as_the_plain_one():
+
+	np = pytest.importorskip("numpy")
+
+	plain = convert.convertSurface(createSurface())
+	arrays = convert.convertSurface(createSurface(np))
+
+	assert encodeBoth(arrays) == encodeBoth(plain)
+	assert arrays.encode("geo", deterministic=True) == plain.encode("geo", deterministic=True)
+
+# --------------------------------------------------------------------------
+
+def test_numpy_scalar_attributes_are_kept():
+
+	np = pytest.importorskip("numpy")
+
+	attribs = createSurface(np).getHouAttribs()
+
+	assert attribs == [("id", "int", 9876543210), ("height", "float", 2.5), ("name", "string", "roof")]
+	assert [type(attrib[2]) for attrib in attribs] == [int, float, str]
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("x", [0.0004999, 0.0019999, -0.0000001])
+def test_weld_joins_coordinates_across_cell_boundaries(x):
+
+	points, indices = convert.weldCoords([(x, 0.0, 0.0), (x + 0.0000002, 0.0, 0.0), (x + 0.0011, 0.0, 0.0)], 0.001)
+
+	assert indices == [0, 0, 1]
+	assert [list(point) for point in points] == [[x, 0.0, 0.0], [x + 0.0011, 0.0, 0.0]]
+
+# --------------------------------------------------------------------------
+
+def test_welded_surface_faces_are_remapped():
+
+	src = source.PlainSource([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (1.0, 1e-5, 0.0), (2.0, 0.0, 0.0), (1.0, 1.0, 0.0)], ([3, 3], [0, 1, 2, 3, 4, 5]))
+
+	document = json.loads(convert.convertSurface(src, weld=0.001).encode("geo", deterministic=True))
+	topology = document[document.index("topology") + 1]
+
+	assert document[document.index("pointcount") + 1] == 4
+	assert topology[1][1] == [0, 1, 2, 1, 3, 2]
+
+# --------------------------------------------------------------------------
+
+def test_bridged_holes_do_not_cross_the_ring():
+
+	rings = createDonut()
+	ring = convert.bridgeRings(rings)
+
+	assert getCrossings(ring) == []
+	assert len(ring) == sum(len(r) for r in rings) + 2 * (len(rings) - 1)
+	assert abs(convert.getSignedArea(ring)) == pytest.approx(abs(convert.getSignedArea(rings[0])) - sum(abs(convert.getSignedArea(r)) for r in rings[1:]))
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("holes, prims", [("separate", [(4, 0), (8, 1), (4, 1)]), ("bridge", [(20, 0)]), ("ignore", [(4, 0)])])
+def test_area_holes_are_written_by_mode(holes, prims):
+
+	rings = createDonut()
+	src = source.PlainSource([coord for ring in rings for coord in ring], rings=[len(ring) for ring in rings], attributes={"attrib_id": 1})
+
+	document = json.loads(convert.convertAreas([src], (0, 0), (0, 0, 0), [0] * 6, holes=holes).encode("geo", deterministic=True))
+	attributes = document[document.index("attributes") + 1]
+
+	assert document[document.index("primitivecount") + 1] == len(prims)
+	assert document[document.index("vertexcount") + 1] == sum(size for size, hole in prims)
+
+	values = dict([(attrib[0][5], attrib[1][-1][-1][0]) for attrib in attributes[attributes.index("primitiveattributes") + 1]])
+
+	assert values["id"] == [1] * len(prims)
+	assert values.get("hole", [0]) == [hole for size, hole in prims]
+
+# --------------------------------------------------------------------------
+
+def test_holes_outside_the_boundary_are_written_separately():
+
+	rings = createDonut()[:1] + [[(20.0, 0.0, 0.0), (21.0, 0.0, 0.0), (21.0, 1.0, 0.0)]]
+	src = source.PlainSource([coord for ring in rings for coord in ring], rings=[4, 3])
+
+	assert convert.bridgeRings(rings) is None
+	assert [(len(part), hole) for part, hole in convert.getPolygonRings(src, src.getCoords(), "bridge")] == [(4, 0), (3, 1)]
+
+# --------------------------------------------------------------------------
+
+def test_hole_attribute_does_not_clash_with_a_source_attribute():
+
+	rings = createDonut()
+	src = source.PlainSource([coord for ring in rings for coord in ring], rings=[len(ring) for ring in rings], attributes={"attrib_hole": 7})
+
+	document = json.loads(convert.convertAreas([src], (0, 0), (0, 0, 0), [0] * 6).encode("geo", deterministic=True))
+	attributes = document[document.index("attributes") + 1]
+	names = [attrib[0][5] for attrib in attributes[attributes.index("primitiveattributes") + 1]]
+
+	assert names == ["hole", "hole_1"]
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("fmt", ["geo", "bgeo"])
+def test_precision_rounds_the_encoded_values(fmt):
+
+	coords = [(i * 1.2345678, -i * 0.7654321, i * 0.0123456789) for i in range(50)]
+	srcs = [source.PlainSource([coord], attributes={"attrib_height": coord[0] / 7.0}) for coord in coords]
+
+	hougeo = convert.convertPoints(srcs, (0, 0), (0, 0, 0), [0] * 6, precision=convert.parsePrecision("P=3,height=1"))
+	document = hougeo.encode(fmt, deterministic=True)
+	document = json.loads(document) if fmt == "geo" else getComparable(loadBGEO(document))
+	attributes = document[document.index("attributes") + 1]
+	values = dict([(attrib[0][5], attrib[1][-1][-1]) for attrib in attributes[attributes.index("pointattributes") + 1]])
+
+	# The .geo text holds the rounded decimals, the .bgeo floats the float32 nearest to them
+	expected = lambda val: val if fmt == "geo" else getComparable(val)
+
+	assert values["P"] == [[expected(round(c, 3)) for c in (x, z, -y)] for x, y, z in coords]
+	assert values["height"] == [[expected(round(x / 7.0, 1)) for x, y, z in coords]]
@@ -0,0 +1,132 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import json, random
+
+import geo
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def getValue(items, key):
+
+	return items[items.index(key) + 1]
+
+# --------------------------------------------------------------------------
+
+def expandRLE(rle):
+
+	members = []
+
+	for i in range(0, len(rle), 2):
+		members += [rle[i + 1]] * rle[i]
+
+	return members
+
+# --------------------------------------------------------------------------
+
+def getPerPrimitiveGroups(pgrps_rle):
+
+	# The former construction summing the primitives before and after every group
+	pgrps = []
+
+	for i, prims in enumerate(pgrps_rle):
+
+		if i == 0:
+
+			pgrps.append([prims, True, sum(pgrps_rle[1:]), False])
+
+		elif i == len(pgrps_rle) - 1:
+
+			pgrps.append([sum(pgrps_rle[:-1]), False, prims, True])
+
+		else:
+
+			pgrps.append([sum(pgrps_rle[:i]), False, prims, True, sum(pgrps_rle[i + 1:]), False])
+
+	return pgrps
+
+# --------------------------------------------------------------------------
+
+def getGroups(hougeo, key="primitivegroups"):
+
+	document = json.loads(hougeo.encode("geo", deterministic=True))
+
+	return [(getValue(grp[0], "name"), getValue(getValue(grp[1], "selection")[1], "boolRLE")) for grp in getValue(document, key)]
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_prim_groups_are_written_with_their_offsets():
+
+	hougeo = geo.HouGeo([0.0, 0.0, 0.0, 1.0, 1.0, 1.0])
+	hougeo.setPrimGroups([10, 20, 70], "bldg")
+
+	assert getGroups(hougeo) == [
+		("bldg_0", [10, True, 90, False]),
+		("bldg_1", [10, False, 20, True, 70, False]),
+		("bldg_2", [30, False, 70, True]),
+	]
+
+	document = json.loads(hougeo.encode("geo", deterministic=True))
+
+	assert getValue(getValue(document, "attributes"), "primitiveattributes") == []
+
+# --------------------------------------------------------------------------
+
+def test_prim_groups_match_the_per_primitive_construction():
+
+	rng = random.Random(3)
+	pgrps_rle = [rng.randint(1, 40) for i in range(500)]
+
+	hougeo = geo.HouGeo([0.0, 0.0, 0.0, 1.0, 1.0, 1.0])
+	hougeo.setPrimGroups(pgrps_rle, "bldg")
+
+	groups = getGroups(hougeo)
+	expected = getPerPrimitiveGroups(pgrps_rle)
+
+	assert [name for name, rle in groups] == ["bldg_{}".format(i) for i in range(len(pgrps_rle))]
+	assert [expandRLE(rle) for name, rle in groups] == [expandRLE(rle) for rle in expected]
+	assert all(sum(rle[0::2]) == sum(pgrps_rle) for name, rle in groups)
+
+# --------------------------------------------------------------------------
+
+def test_packed_disk_index_references_every_tile():
+
+	# HouGeo bounds are the swizzled corners, z runs from 5 down to -3 here
+	tiles = [("tile_0_0.geo", [0.0, 1.0, 5.0, 10.0, 11.0, -3.0], 5, 2), ("tile_1_0.geo", [10.0, 1.0, 5.0, 20.0, 11.0, -3.0], 7, 3)]
+
+	document = json.loads(geo.createPackedDiskIndex(tiles).encode("geo", deterministic=True))
+	primitives = getValue(document, "primitives")
+
+	assert getValue(document, "primitivecount") == 2
+	assert [prim[0] for prim in primitives] == [["type", "PackedDisk"]] * 2
+	assert [getValue(prim[1], "parameters")["filename"] for prim in primitives] == ["tile_0_0.geo", "tile_1_0.geo"]
+	assert [getValue(prim[1], "parameters")["cachedbounds"] for prim in primitives] == [[0.0, 10.0, 1.0, 11.0, -3.0, 5.0], [10.0, 20.0, 1.0, 11.0, -3.0, 5.0]]
+	assert [getValue(prim[1], "pivot") for prim in primitives] == [[5.0, 6.0, 1.0], [15.0, 6.0, 1.0]]
+
+	attributes = getValue(getValue(document, "attributes"), "primitiveattributes")
+	values = dict([(getValue(attrib[0], "name"), attrib[1][-1][-1]) for attrib in attributes])
+
+	assert values["tile_pointcount"] == [[5, 7]]
+	assert values["tile_primcount"] == [[2, 3]]
+
+# --------------------------------------------------------------------------
+
+def test_packed_disk_index_reads_the_tile_objects():
+
+	tile = geo.HouGeo([-1.0, 0.0, 2.0, 1.0, 4.0, -2.0])
+	tile.setPoints([(0.0, 1.0, 0.0), (0.5, 2.0, 0.0), (1.0, 3.0, 0.0)])
+	tile.setPrimitives("open", 1, 3, [3])
+
+	document = json.loads(geo.createPackedDiskIndex([("a.geo", tile)]).encode("geo", deterministic=True))
+	prim = getValue(document, "primitives")[0]
+
+	attributes = getValue(getValue(document, "attributes"), "primitiveattributes")
+	values = dict([(getValue(attrib[0], "name"), attrib[1][-1][-1]) for attrib in attributes])
+
+	assert getValue(prim[1], "parameters")["cachedbounds"] == [-1.0, 1.0, 0.0, 4.0, -2.0, 2.0]
+	assert (values["tile_pointcount"], values["tile_primcount"]) == ([[3]], [[1]])
@@ -0,0 +1,125 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import importlib.util, json, os
+
+import pytest
+
+import geojson
+
+root_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def createFeature(x, **properties):
+
+	return {"type": "Feature", "properties": properties, "geometry": {"type": "Point", "coordinates": [x, 0.0]}}
+
+# --------------------------------------------------------------------------
+
+def loadConverter():
+
+	spec = importlib.util.spec_from_file_location("HoudiniGeoConverter", os.path.join(root_dir, "HoudiniGeoConverter.py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+
+	return module
+
+# --------------------------------------------------------------------------
+
+def writeNDJSON(path, features):
+
+	with open(path, "w") as f:
+
+		for feature in features:
+			f.write(json.dumps(feature) + "\n")
+
+	return str(path)
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_values_are_converted_to_the_schema_types():
+
+	reader = geojson.GeoJSONReader()
+
+	reader.addFeature(createFeature(0.0, h=1, kind=2))
+	reader.addFeature(createFeature(1.0, h=2.5, kind="a", tags=["x", 1]))
+	reader.addFeature(createFeature(2.0, h=3, kind=4))
+
+	srcs = reader.getSources("point")
+
+	assert len(srcs) == 3
+	assert [src.getAttribute("attrib_h") for src in srcs] == [1.0, 2.5, 3.0]
+	assert [src.getAttribute("attrib_kind") for src in srcs] == ["2", "a", "4"]
+
+	# The first source gives every attribute, even those it does not have
+	assert srcs[0].getHouAttribs() == [("h", "float", 1.0), ("kind", "string", "2"), ("tags", "string", None)]
+	assert srcs[1].getAttribute("attrib_tags") == json.dumps(["x", 1])
+
+# --------------------------------------------------------------------------
+
+def test_parts_of_a_multi_geometry_share_their_attributes():
+
+	reader = geojson.GeoJSONReader()
+
+	reader.addFeature({"type": "Feature", "properties": {"id": 7}, "geometry": {"type": "MultiPoint", "coordinates": [[0, 0], [1, 1, 2]]}})
+
+	srcs = reader.getSources("point")
+
+	assert [src.getCoords() for src in srcs] == [[(0, 0, 0.0)], [(1, 1, 2)]]
+	assert [src.getAttribute("attrib_id") for src in srcs] == [7, 7]
+	assert srcs.nrows == 1
+
+# --------------------------------------------------------------------------
+
+def test_features_past_the_budget_are_spilled(tmp_path):
+
+	reader = geojson.GeoJSONReader(budget=3000, spill_dir=str(tmp_path))
+
+	# The attribute becomes a float attribute after the first spill
+	for i in range(100):
+		reader.addFeature(createFeature(float(i), id=i, h=i if i < 50 else i + 0.5, zone="abc"[i % 3]))
+
+	srcs = reader.getSources("point")
+
+	assert srcs.temp_dir is not None and os.listdir(str(tmp_path))
+	assert [src.getCoords()[0][0] for src in srcs] == [float(i) for i in range(100)]
+	assert [src.getAttribute("attrib_h") for src in srcs] == [float(i) if i < 50 else i + 0.5 for i in range(100)]
+	assert [src.getAttribute("attrib_zone") for src in srcs] == ["abc"[i % 3] for i in range(100)]
+
+	reader.close()
+
+	assert os.listdir(str(tmp_path)) == []
+
+# --------------------------------------------------------------------------
+
+def test_converter_streams_every_value_into_its_own_tiles(tmp_path, capsys):
+
+	converter = loadConverter()
+	features = [createFeature(float(i * 10), id=i, zone=zone) for i, zone in enumerate(["a", "a", "a", "b", "b"])]
+	path = writeNDJSON(tmp_path / "points.ndjson", features)
+
+	converter.main([path, "-o", str(tmp_path / "out"), "--stream-by", "zone", "--tile-size", "15", "--buffer-budget", "0.001", "--spill-dir", str(tmp_path)])
+
+	names = [os.path.basename(line) for line in capsys.readouterr().out.split()]
+
+	# The tiles of a value start at its own extent
+	assert names == ["point_a_0_0.geo", "point_a_1_0.geo", "point_a_index.geo", "point_b_0_0.geo", "point_b_index.geo"]
+	assert sorted(os.listdir(str(tmp_path))) == ["out", "points.ndjson"]
+
+# --------------------------------------------------------------------------
+
+def test_converter_rejects_unsorted_features(tmp_path):
+
+	converter = loadConverter()
+	path = writeNDJSON(tmp_path / "points.ndjson", [createFeature(float(i), zone=zone) for i, zone in enumerate(["a", "b", "a"])])
+
+	with pytest.raises(ValueError, match="not sorted"):
+		converter.main([path, "-o", str(tmp_path / "out"), "--stream-by", "zone"])
+
+	assert os.listdir(str(tmp_path / "out")) == ["point_a.geo"]
@@ -0,0 +1,89 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import gc, os
+
+import convert, source
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def createBuffer(spill_dir, count=10):
+
+	buffer = source.SourceBuffer(budget=1, spill_dir=str(spill_dir))
+
+	for i in range(count):
+
+		buffer.append(source.PlainSource([(float(i), 0.0, 1.0)], attributes={"attrib_id": i, "attrib_name": "n{}".format(i % 3)}))
+
+	return buffer
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_spilled_buffer_reads_back_its_sources(tmp_path):
+
+	buffer = createBuffer(tmp_path)
+
+	assert len(os.listdir(tmp_path)) == 1
+
+	assert [src.getCoords() for src in buffer] == [[(float(i), 0.0, 1.0)] for i in range(10)]
+	assert [src.getHouAttribs() for src in buffer][4] == [("id", "int", 4), ("name", "string", "n1")]
+
+	buffer.close()
+
+	assert os.listdir(tmp_path) == []
+
+# --------------------------------------------------------------------------
+
+def test_spill_files_are_removed_when_the_buffer_is_not_closed(tmp_path):
+
+	buffer = createBuffer(tmp_path)
+
+	assert len(os.listdir(tmp_path)) == 1
+
+	del buffer
+	gc.collect()
+
+	assert os.listdir(tmp_path) == []
+
+# --------------------------------------------------------------------------
+
+def test_selection_reads_the_sources_at_its_indices(tmp_path):
+
+	buffer = createBuffer(tmp_path)
+	selection = source.SourceSelection(buffer, [3, 7])
+
+	assert len(selection) == 2
+	assert selection[-1].getAttribute("attrib_id") == 7
+	assert [src.getCoords() for src in selection] == [[(3.0, 0.0, 1.0)], [(7.0, 0.0, 1.0)]]
+
+	buffer.close()
+
+# --------------------------------------------------------------------------
+
+def test_spilled_areas_convert_like_their_sources(tmp_path):
+
+	square = [(0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (4.0, 4.0, 0.0), (0.0, 4.0, 0.0)]
+	hole = [(1.0, 1.0, 0.0), (1.0, 2.0, 0.0), (2.0, 2.0, 0.0), (2.0, 1.0, 0.0)]
+	srcs = [source.PlainSource([(x + i * 4.0, y, z) for x, y, z in square], attributes={"attrib_id": i}) for i in range(5)]
+	srcs.append(source.PlainSource(square + hole, attributes={"attrib_id": 5}, rings=[4, 4]))
+
+	buffer = source.SourceBuffer(budget=1, spill_dir=str(tmp_path))
+
+	for src in srcs:
+		buffer.append(src)
+
+	# The coordinates are copied straight from the memory mapped files
+	assert isinstance(buffer[0].getFlatCoords(), memoryview)
+
+	for weld in (None, 0.0):
+
+		expected = convert.convertAreas(srcs, (0, 0), (0, 0, 0), [0] * 6, weld=weld).encode("geo", deterministic=True)
+
+		assert convert.convertAreas(buffer, (0, 0), (0, 0, 0), [0] * 6, weld=weld).encode("geo", deterministic=True) == expected
+
+	buffer.close()
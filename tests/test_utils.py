@@ -0,0 +1,154 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import json
+
+import pytest
+
+import fmeobjects, utils
+
+from helpers import getComparable, loadBGEO
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def createSquare(x, y, size=1.0):
+
+	return fmeobjects.FMELine([(x, y, 0.0), (x + size, y, 0.0), (x + size, y + size, 0.0), (x, y + size, 0.0)])
+
+# --------------------------------------------------------------------------
+
+def createFeature(geom, fid, zone):
+
+	feature = fmeobjects.FMEFeature()
+	feature.setGeometry(geom)
+	feature.setAttribute("attrib_id", fid)
+	feature.setAttribute("attrib_zone", zone)
+
+	return feature
+
+# --------------------------------------------------------------------------
+
+def createFeatures():
+
+	# A multi area holding a nested multi area, a donut and a plain polygon
+	nested = fmeobjects.FMEMultiArea([fmeobjects.FMEPolygon(createSquare(4.0, 0.0)), fmeobjects.FMEPolygon(createSquare(6.0, 0.0))])
+	donut = fmeobjects.FMEDonut(createSquare(0.0, 0.0, 3.0), [createSquare(1.0, 1.0)])
+
+	return [
+		createFeature(fmeobjects.FMEMultiArea([donut, nested]), 1, "a"),
+		createFeature(fmeobjects.FMEPolygon(createSquare(10.0, 0.0)), 2, "b"),
+	]
+
+# --------------------------------------------------------------------------
+
+def createBox(x, jitter=0.0):
+
+	coords = [(x + dx + jitter, dy - jitter, dz + jitter) for dx in (0.0, 1.0) for dy in (0.0, 1.0) for dz in (0.0, 1.0)]
+
+	return fmeobjects.FMEMesh(coords, [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]])
+
+# --------------------------------------------------------------------------
+
+def getPrimitiveValues(hougeo):
+
+	document = json.loads(hougeo.encode("geo", deterministic=True))
+	attributes = document[document.index("attributes") + 1]
+
+	return dict([(attrib[0][5], attrib[1][-1][-1][0]) for attrib in attributes[attributes.index("primitiveattributes") + 1]])
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_aggregates_expand_into_parts_sharing_their_feature():
+
+	features = createFeatures()
+	srcs = utils.getFMESources(features, "area")
+
+	assert len(srcs) == 4
+	assert [src.getAttribute("attrib_id") for src in srcs] == [1, 1, 1, 2]
+	assert [src.getRings() for src in srcs][:2] == [[4, 4], None]
+	assert [src.getBounds()[0][0] for src in srcs] == [0.0, 4.0, 6.0, 10.0]
+
+# --------------------------------------------------------------------------
+
+def test_aggregate_parts_become_primitives_carrying_the_feature_attributes():
+
+	groups = [utils.convert.geo.HouGroupBuilder("attrib_zone", "primitive")]
+	hougeo = utils.convertFMEAreas(createFeatures(), (0, 0), (0, 0, 0), [0] * 6, groups=groups)
+
+	assert getPrimitiveValues(hougeo) == {"id": [1, 1, 1, 1, 2], "zone": [0, 0, 0, 0, 1], "hole": [0, 1, 0, 0, 0]}
+	assert groups[0].getGroups() == [("zone_a", [4, True, 1, False]), ("zone_b", [4, False, 1, True])]
+
+	document = json.loads(hougeo.encode("geo", deterministic=True))
+
+	assert document[document.index("primitivecount") + 1] == 5
+	assert getComparable(document) == getComparable(loadBGEO(hougeo.encode("bgeo", deterministic=True)))
+
+# --------------------------------------------------------------------------
+
+def test_buffered_aggregate_parts_share_one_attribute_row():
+
+	buffer = utils.convert.source.SourceBuffer()
+
+	for feature in createFeatures():
+		buffer.appendParts(utils.getFMESources([feature], "area"))
+
+	hougeo = utils.convert.convertAreas(buffer, (0, 0), (0, 0, 0), [0] * 6)
+
+	assert len(buffer) == 4
+	assert (buffer.nrows, list(buffer.rows)) == (2, [0, 0, 0, 1])
+	assert getPrimitiveValues(hougeo) == {"id": [1, 1, 1, 1, 2], "zone": [0, 0, 0, 0, 1], "hole": [0, 1, 0, 0, 0]}
+
+	buffer.close()
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("dims", [3, 2])
+@pytest.mark.parametrize("kind", ["line", "area"])
+def test_bulk_coordinates_match_the_vertex_by_vertex_ones(kind, dims):
+
+	line = fmeobjects.FMELine([(i * 1.5, (i % 3) * 0.25, 0.0 if dims == 2 else i * 0.5) for i in range(7)])
+	geom = line if kind == "line" else fmeobjects.FMEPolygon(line)
+	feature = createFeature(geom, 1, "a")
+	coords = feature.getAllCoordinates()
+	calls = []
+
+	# FME returns the coordinates of 2D geometry as (x, y) pairs
+	def getAllCoordinates():
+
+		calls.append(kind)
+
+		return coords if dims == 3 else [(x, y) for x, y, z in coords]
+
+	feature.getAllCoordinates = getAllCoordinates
+
+	bulk = utils.getFMECoordinates(feature, geom, kind)
+
+	assert calls == [kind]
+	assert bulk == utils.getFMECoordinates(None, geom, kind)
+	assert len(bulk) == 7
+
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("weld, jitter", [(0.0, 0.0), (0.001, 0.00001)])
+@pytest.mark.parametrize("numpy", [True, False])
+def test_weld_shares_the_vertices_of_the_meshes_of_a_multisurface(monkeypatch, numpy, weld, jitter):
+
+	if numpy:
+		pytest.importorskip("numpy")
+	else:
+		monkeypatch.setattr(utils.convert, "np", None)
+
+	# Two unit boxes side by side sharing the face at x = 1
+	feature = createFeature(fmeobjects.FMEMultiSurface([createBox(0.0), createBox(1.0, jitter)]), 1, "a")
+	faces = [0, 1, 3, 2, 4, 6, 7, 5, 0, 4, 5, 1, 2, 3, 7, 6, 0, 2, 6, 4, 1, 5, 7, 3]
+
+	document = json.loads(utils.convertFMESurface(feature, weld=weld).encode("geo", deterministic=True))
+	topology = document[document.index("topology") + 1]
+
+	assert document[document.index("pointcount") + 1] == 12
+	assert topology[1][1] == faces + [i + 4 for i in faces]
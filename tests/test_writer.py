@@ -0,0 +1,170 @@
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+
+import importlib.util, json, os
+
+import pytest
+
+import fme, fmeobjects
+
+from helpers import loadBGEO
+
+'''
+The PythonCaller module reads its published parameters from fme.macroValues when it is
+imported, so every test loads its own copy with the parameters it needs
+'''
+
+root_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+
+def createWriter(monkeypatch, **params):
+
+	macro_values = dict([("HoudiniGeoWriter_" + name, str(val)) for name, val in params.items()])
+	macro_values["HoudiniGeoWriter_PythonLib"] = os.path.join(root_dir, "lib")
+	monkeypatch.setattr(fme, "macroValues", macro_values)
+
+	spec = importlib.util.spec_from_file_location("HoudiniGeoWriter", os.path.join(root_dir, "HoudiniGeoWriter.py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+
+	writer = module.HouGeoWriter()
+	writer.outputs = []
+	writer.pyoutput = writer.outputs.append
+
+	return writer
+
+# --------------------------------------------------------------------------
+
+def createFeature(geomtype, geom, **attribs):
+
+	feature = fmeobjects.FMEFeature()
+	feature.setGeometry(geom)
+	feature.setAttribute("geomtype", geomtype)
+
+	for name, val in attribs.items():
+		feature.setAttribute("attrib_" + name, val)
+
+	return feature
+
+# --------------------------------------------------------------------------
+
+def createBox(x, size):
+
+	coords = [(x + dx, dy, dz) for dx in (0.0, size) for dy in (0.0, size) for dz in (0.0, size)]
+
+	return fmeobjects.FMEMesh(coords, [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]])
+
+# --------------------------------------------------------------------------
+
+def getPointIds(path):
+
+	with open(path) as f:
+		document = json.load(f)
+
+	attributes = document[document.index("attributes") + 1]
+	values = dict([(attrib[0][5], attrib[1][-1][-1]) for attrib in attributes[attributes.index("pointattributes") + 1]])
+
+	return values["id"][0]
+
+# --------------------------------------------------------------------------
+# Tests
+# --------------------------------------------------------------------------
+
+def test_tiles_hold_the_features_inside_them(monkeypatch, tmp_path):
+
+	writer = createWriter(monkeypatch, OutputDir=tmp_path, TileSize=10)
+	coords = [(1.0, 1.0), (9.5, 2.0), (12.0, 3.0), (25.0, 4.0), (2.0, 15.0), (19.0, 19.0), (29.0, 28.0)]
+
+	writer.input(createFeature("bbx", fmeobjects.FMEBox((0.0, 0.0, 0.0, 30.0, 30.0, 0.0))))
+
+	for i, (x, y) in enumerate(coords):
+		writer.input(createFeature("point", fmeobjects.FMEPoint(x, y, 0.0), id=i))
+
+	writer.close()
+
+	tiles = [out for out in writer.outputs if out.getAttribute("geomtype") == "point"]
+	expected = {}
+
+	for i, (x, y) in enumerate(coords):
+		expected.setdefault((int(x // 10), int(y // 10)), []).append(i)
+
+	# One file per tile holding the points inside it, ordered by row then column
+	assert [(out.getAttribute("tile_col"), out.getAttribute("tile_row")) for out in tiles] == sorted(expected, key=lambda t: (t[1], t[0]))
+
+	for out in tiles:
+
+		path = out.getAttribute("hougeo_path")
+
+		assert os.path.basename(path) == "point_{}_{}.geo".format(out.getAttribute("tile_col"), out.getAttribute("tile_row"))
+		assert getPointIds(path) == expected[(out.getAttribute("tile_col"), out.getAttribute("tile_row"))]
+
+	index = [out for out in writer.outputs if out.getAttribute("geomtype") == "point_index"]
+
+	assert len(index) == 1 and os.path.isfile(index[0].getAttribute("hougeo_path"))
+
+# --------------------------------------------------------------------------
+
+def test_worker_pool_output_matches_the_serial_output(monkeypatch, tmp_path):
+
+	features = [createFeature("object", fmeobjects.FMEMultiSurface([createBox(i * 3.0, 1.0 + i % 4)]), id=i) for i in range(12)]
+	results = []
+
+	# A cache makes the documents deterministic (no date or hostname) so they compare byte for byte
+	for workers in (1, 3):
+
+		writer = createWriter(monkeypatch, Format="bgeo", Workers=workers, CacheDir=tmp_path / str(workers))
+
+		for feature in features:
+			writer.input(feature)
+
+		writer.close()
+
+		assert (writer.executor is not None) == (workers > 1)
+		assert [out.getAttribute("attrib_id") for out in writer.outputs] == list(range(12))
+
+		results.append([out.getAttribute("hougeo") for out in writer.outputs])
+
+	documents = [loadBGEO(data) for data in results[1]]
+
+	assert results[0] == results[1]
+	assert [document[document.index("pointcount") + 1] for document in documents] == [8] * 12
+
+# --------------------------------------------------------------------------
+
+def test_stream_by_outputs_each_group_when_the_value_changes(monkeypatch, tmp_path):
+
+	writer = createWriter(monkeypatch, OutputDir=tmp_path, StreamBy="attrib_zone")
+	zones = ["a", "a", "b", "b", "b", "c"]
+	counts = []
+
+	for i, zone in enumerate(zones):
+
+		writer.input(createFeature("point", fmeobjects.FMEPoint(float(i), 0.0, 0.0), id=i, zone=zone))
+		counts.append(len(writer.outputs))
+
+	# A group is output by the first feature of the next one, the last one on close
+	assert counts == [0, 0, 1, 1, 1, 2]
+
+	writer.close()
+
+	paths = [out.getAttribute("hougeo_path") for out in writer.outputs]
+
+	assert [out.getAttribute("attrib_zone") for out in writer.outputs] == ["a", "b", "c"]
+	assert [os.path.basename(path) for path in paths] == ["point_a.geo", "point_b.geo", "point_c.geo"]
+	assert [getPointIds(path) for path in paths] == [[0, 1], [2, 3, 4], [5]]
+
+# --------------------------------------------------------------------------
+
+def test_stream_by_rejects_unsorted_features(monkeypatch, tmp_path):
+
+	writer = createWriter(monkeypatch, OutputDir=tmp_path, StreamBy="attrib_zone")
+
+	for i, zone in enumerate(["a", "b"]):
+		writer.input(createFeature("point", fmeobjects.FMEPoint(float(i), 0.0, 0.0), id=i, zone=zone))
+
+	with pytest.raises(ValueError, match="not sorted"):
+		writer.input(createFeature("point", fmeobjects.FMEPoint(2.0, 0.0, 0.0), id=2, zone="a"))